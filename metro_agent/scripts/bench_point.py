@@ -0,0 +1,135 @@
+"""
+Benchmark of the Point type.
+
+Compares the current Point with the previous uuid-identified frozen dataclass
+on the operations of the metro movement hot loop, then runs a headless game
+to report how many points are created per tick and what they cost.
+
+Usage (from metro_agent/): python -m scripts.bench_point [--ticks N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+import timeit
+import tracemalloc
+from dataclasses import dataclass, field
+
+from shortuuid import uuid
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from src.engine.engine import Engine  # noqa: E402
+from src.geometry.point import Point  # noqa: E402
+
+
+@dataclass(frozen=True, slots=True)
+class LegacyPoint:
+    """The Point implementation before it dropped its uuid"""
+
+    left: float
+    top: float
+    id: str = field(
+        init=False,
+        default_factory=lambda: f"Point-{uuid()}",
+        compare=False,
+        repr=False,
+    )
+
+    def __add__(self, other: LegacyPoint) -> LegacyPoint:
+        return LegacyPoint(self.left + other.left, self.top + other.top)
+
+    def __mul__(self, other: float) -> LegacyPoint:
+        return LegacyPoint(other * self.left, other * self.top)
+
+
+def bench_movement_step(point_type: type, number: int) -> float:
+    """Seconds per `position += direction * distance`, the metro movement update"""
+    position = point_type(100.0, 200.0)
+    direction = point_type(0.6, 0.8)
+    timer = timeit.Timer(lambda: position + direction * 2.5)
+    return min(timer.repeat(repeat=5, number=number)) / number
+
+
+def bench_allocation(point_type: type, number: int) -> float:
+    """Bytes allocated per point kept alive"""
+    tracemalloc.start()
+    points = [point_type(float(i), float(i)) for i in range(number)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del points
+    return size / number
+
+
+def create_engine_with_paths() -> Engine:
+    engine = Engine()
+    path_manager = engine.path_manager
+    stations = engine._components.stations
+    for start in range(0, len(stations) - 1, 2):
+        path_manager.start_path_on_station(stations[start])
+        creating = path_manager._creating_or_expanding_path
+        assert creating is not None
+        creating.add_station_to_path(stations[start + 1])
+        creating.try_to_end_path_on_station(stations[start + 1])
+    return engine
+
+
+def count_points_per_tick(engine: Engine, ticks: int, dt_ms: int) -> float:
+    created = 0
+    init = Point.__init__
+
+    def counting_init(self: Point, left: float, top: float) -> None:
+        nonlocal created
+        created += 1
+        init(self, left, top)
+
+    Point.__init__ = counting_init  # type: ignore [method-assign]
+    try:
+        for _ in range(ticks):
+            engine.increment_time(dt_ms)
+    finally:
+        Point.__init__ = init  # type: ignore [method-assign]
+    return created / ticks
+
+
+def bench_ticks(engine: Engine, ticks: int, dt_ms: int) -> float:
+    """Seconds per tick"""
+    start = time.perf_counter()
+    for _ in range(ticks):
+        engine.increment_time(dt_ms)
+    return (time.perf_counter() - start) / ticks
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--ticks", type=int, default=2000)
+    parser.add_argument("--dt-ms", type=int, default=16)
+    args = parser.parse_args()
+
+    legacy_step = bench_movement_step(LegacyPoint, 20_000)
+    step = bench_movement_step(Point, 20_000)
+    legacy_bytes = bench_allocation(LegacyPoint, 20_000)
+    point_bytes = bench_allocation(Point, 20_000)
+    print("movement update (2 points)")
+    print(f"  legacy: {legacy_step * 1e6:8.2f} us  {legacy_bytes:6.0f} B/point")
+    print(f"  point:  {step * 1e6:8.2f} us  {point_bytes:6.0f} B/point")
+    print(f"  speedup: {legacy_step / step:.1f}x")
+
+    engine = create_engine_with_paths()
+    points_per_tick = count_points_per_tick(engine, args.ticks, args.dt_ms)
+    tick_time = bench_ticks(engine, args.ticks, args.dt_ms)
+    saved_per_tick = points_per_tick * (legacy_step - step) / 2
+    print(f"headless game ({args.ticks} ticks of {args.dt_ms} ms)")
+    print(f"  points created per tick: {points_per_tick:.1f}")
+    print(f"  time per tick:           {tick_time * 1e6:.1f} us")
+    print(f"  time saved per tick:     {saved_per_tick * 1e6:.1f} us")
+    print(
+        "  bytes saved per tick:    "
+        f"{points_per_tick * (legacy_bytes - point_bytes):.0f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark of the MiniMetro vector envs against the stable-baselines3 ones.
+
+MiniMetroVecEnv is compared to DummyVecEnv and MiniMetroSubprocVecEnv to
+SubprocVecEnv. Steps the vector envs with the same random actions, as PPO
+does while collecting rollouts, and reports the env steps per second for each
+number of envs. The process pools are only measured with --workers,
+SubprocVecEnv runs one process per env.
+
+Usage (from metro_agent/): python -m scripts.bench_vec_env [--steps N] [--num-envs 8 16 32 64] [--workers W]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from stable_baselines3.common.vec_env import (  # noqa: E402
+    DummyVecEnv,
+    SubprocVecEnv,
+    VecEnv,
+)
+
+from src.rl_env import MiniMetroRLEnv  # noqa: E402
+from src.vec_env import MiniMetroSubprocVecEnv, MiniMetroVecEnv  # noqa: E402
+
+
+def bench(venv: VecEnv, num_steps: int, seed: int) -> float:
+    """Env steps per second over `num_steps` vector steps"""
+    rng = np.random.default_rng(seed)
+    nvec = venv.action_space.nvec
+    actions = rng.integers(0, nvec, size=(num_steps, venv.num_envs, len(nvec)))
+    venv.seed(seed)
+    venv.reset()
+    start = time.perf_counter()
+    for step_actions in actions:
+        venv.step(step_actions)
+    elapsed = time.perf_counter() - start
+    venv.close()
+    return num_steps * venv.num_envs / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--steps", type=int, default=200, help="vector steps")
+    parser.add_argument("--num-envs", type=int, nargs="+", default=[8, 16, 32, 64])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=0, help="processes")
+    args = parser.parse_args()
+
+    header = f"{'envs':>5} {'DummyVecEnv':>14} {'MiniMetroVecEnv':>16} {'speedup':>8}"
+    if args.workers:
+        header += (
+            f" {'SubprocVecEnv':>14} {'MiniMetroSubprocVecEnv':>23} {'speedup':>8}"
+        )
+    print(header)
+    for num_envs in args.num_envs:
+        dummy = bench(DummyVecEnv([MiniMetroRLEnv] * num_envs), args.steps, args.seed)
+        native = bench(MiniMetroVecEnv(num_envs), args.steps, args.seed)
+        line = (
+            f"{num_envs:>5} {dummy:>10.0f} st/s {native:>12.0f} st/s"
+            f" {native / dummy:>7.2f}x"
+        )
+        if args.workers:
+            venv = SubprocVecEnv([MiniMetroRLEnv] * num_envs)
+            subproc = bench(venv, args.steps, args.seed)
+            venv = MiniMetroSubprocVecEnv(num_envs, args.workers)
+            pool = bench(venv, args.steps, args.seed)
+            line += f" {subproc:>10.0f} st/s {pool:>19.0f} st/s {pool / subproc:>7.2f}x"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
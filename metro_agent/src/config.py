@@ -79,8 +79,12 @@ class Config:
     path_width = _path_width
     # rules
     allow_self_crossing_lines = False
+    # performance
+    vectorized_metro_movement = False
     # debug
     unfilled_shapes = _unfilled_shapes
     padding_segments_color = _padding_segments_color
     debug_path_and_metros = False
+    # also scan every holder when a passenger is added (slow)
+    debug_passengers_mediator = False
     stop = False
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from collections.abc import Sequence
+from typing import Final
+
+import numpy as np
+from numpy.typing import NDArray
+
+Arrivals = NDArray[np.int64]
+# progress of a demand model, see `DemandModel.snapshot`
+DemandState = tuple[float, ...]
+
+
+class DemandModel(ABC):
+    """
+    Decides how many passengers spawn at every station.
+
+    The spawner advances the model with the game time and asks it, once per
+    step, for the arrivals of all the stations at once.
+    """
+
+    __slots__ = ()
+
+    @abstractmethod
+    def reset(self) -> None: ...
+
+    @abstractmethod
+    def increment_time(self, dt_ms: float) -> None: ...
+
+    @abstractmethod
+    def snapshot(self) -> DemandState:
+        """Time dependent state of the model, the parameters are not included"""
+
+    @abstractmethod
+    def restore(self, state: DemandState) -> None: ...
+
+    @property
+    @abstractmethod
+    def ms_until_next_spawn(self) -> float:
+        """Game time without any spawning, 0 if passengers can spawn on any step"""
+
+    @abstractmethod
+    def sample_arrivals(
+        self, num_stations: int, rng: np.random.Generator
+    ) -> Arrivals | None:
+        """
+        Number of passengers spawning at each station since the last call,
+        or None if no passenger spawns.
+        """
+
+
+class FixedIntervalDemand(DemandModel):
+    """One passenger per station at a fixed interval, the original game rule"""
+
+    __slots__ = ("_interval_ms", "_first_time_divisor", "_ms_until_next_spawn")
+
+    def __init__(self, interval_ms: float, first_time_divisor: float = 1) -> None:
+        self._interval_ms: Final = interval_ms
+        self._first_time_divisor: Final = first_time_divisor
+        self._ms_until_next_spawn: float = 0
+        self.reset()
+
+    def reset(self) -> None:
+        self._ms_until_next_spawn = self._interval_ms / self._first_time_divisor
+
+    def increment_time(self, dt_ms: float) -> None:
+        self._ms_until_next_spawn -= dt_ms
+
+    def snapshot(self) -> DemandState:
+        return (self._ms_until_next_spawn,)
+
+    def restore(self, state: DemandState) -> None:
+        (self._ms_until_next_spawn,) = state
+
+    @property
+    def ms_until_next_spawn(self) -> float:
+        return self._ms_until_next_spawn
+
+    def sample_arrivals(
+        self, num_stations: int, rng: np.random.Generator
+    ) -> Arrivals | None:
+        if self._ms_until_next_spawn > 0:
+            return None
+        self._ms_until_next_spawn = self._interval_ms
+        return np.ones(num_stations, dtype=np.int64)
+
+
+class PoissonDemand(DemandModel):
+    """
+    Passengers arrive independently at every station, `rate_per_s` per
+    second on average. The arrivals of a step are drawn in one call.
+    """
+
+    __slots__ = ("_rate_per_s", "_elapsed_ms", "_pending_ms")
+
+    def __init__(self, rate_per_s: float) -> None:
+        assert rate_per_s >= 0
+        self._rate_per_s: Final = rate_per_s
+        self._elapsed_ms: float = 0
+        self._pending_ms: float = 0
+
+    def reset(self) -> None:
+        self._elapsed_ms = 0
+        self._pending_ms = 0
+
+    def increment_time(self, dt_ms: float) -> None:
+        self._elapsed_ms += dt_ms
+        self._pending_ms += dt_ms
+
+    def snapshot(self) -> DemandState:
+        return self._elapsed_ms, self._pending_ms
+
+    def restore(self, state: DemandState) -> None:
+        self._elapsed_ms, self._pending_ms = state
+
+    @property
+    def ms_until_next_spawn(self) -> float:
+        return 0
+
+    def sample_arrivals(
+        self, num_stations: int, rng: np.random.Generator
+    ) -> Arrivals | None:
+        if self._pending_ms <= 0:
+            return None
+        start_ms = self._elapsed_ms - self._pending_ms
+        mean = self._get_mean_arrivals(start_ms, self._elapsed_ms)
+        self._pending_ms = 0
+        arrivals = rng.poisson(mean, size=num_stations)
+        return arrivals if arrivals.any() else None
+
+    def _get_mean_arrivals(self, start_ms: float, end_ms: float) -> float:
+        """Expected arrivals at one station between two game times"""
+        return self._rate_per_s * (end_ms - start_ms) / 1000
+
+
+class TimeVaryingDemand(PoissonDemand):
+    """
+    Poisson demand whose rate follows a piecewise linear curve of the game
+    time, e.g. rush hours. The curve repeats every `period_s` if given.
+    """
+
+    __slots__ = ("_times_s", "_rates_per_s", "_period_s")
+
+    def __init__(
+        self,
+        times_s: Sequence[float],
+        rates_per_s: Sequence[float],
+        period_s: float | None = None,
+    ) -> None:
+        assert len(times_s) == len(rates_per_s) > 0
+        assert min(rates_per_s) >= 0
+        super().__init__(max(rates_per_s))
+        self._times_s: Final = np.asarray(times_s, dtype=float)
+        self._rates_per_s: Final = np.asarray(rates_per_s, dtype=float)
+        self._period_s: Final = period_s
+
+    def get_rate_per_s(self, time_ms: float) -> float:
+        time_s = time_ms / 1000
+        if self._period_s:
+            time_s %= self._period_s
+        return float(np.interp(time_s, self._times_s, self._rates_per_s))
+
+    def _get_mean_arrivals(self, start_ms: float, end_ms: float) -> float:
+        # steps are short compared to the curve, the midpoint rate is enough
+        return self.get_rate_per_s((start_ms + end_ms) / 2) * (end_ms - start_ms) / 1000
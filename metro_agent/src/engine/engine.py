@@ -1,21 +1,29 @@
+import math
+import os
 import pprint
 import sys
-from typing import Final, NoReturn
+from typing import Callable, Final, NoReturn
 
+import numpy as np
 import pygame
 
 from src.config import Config
 from src.entity import Station, get_random_stations
+from src.entity.ids import IdAllocator
 from src.geometry.point import Point
 from src.gui.gui import GUI, get_gui_height, get_main_surface_height
 from src.gui.path_button import PathButton
 from src.passengers_mediator import PassengersMediator
 
+from .demand_model import DemandModel, FixedIntervalDemand
 from .game_components import GameComponents
 from .game_renderer import GameRenderer
+from .metro_mover import VectorizedMetroMover
 from .passenger_mover import PassengerMover
 from .passenger_spawner import PassengerSpawner, TravelPlansMapping
 from .path_manager import PathManager
+from .serialization import decode_snapshot, encode_snapshot
+from .snapshot import EngineSnapshot, restore_components, snapshot_components
 from .status import EngineStatus
 from .travel_plan_finder import TravelPlanFinder
 
@@ -32,22 +40,33 @@ class Engine:
         "_passenger_mover",
         "_game_renderer",
         "_travel_plan_finder",
+        "_metro_mover",
         "steps_allowed",
     )
 
     _main_surface_height: Final = get_main_surface_height()
 
-    def __init__(self) -> None:
-        pygame.font.init()
+    def __init__(
+        self,
+        headless: bool = False,
+        seed: int | None = None,
+        demand_model: DemandModel | None = None,
+    ) -> None:
         passengers_mediator = PassengersMediator()
+        rng = _create_rng(seed)
+        ids = IdAllocator()
 
         # components
         self._components: Final = GameComponents(
             paths=[],
-            stations=get_random_stations(Config.num_stations, passengers_mediator),
+            stations=get_random_stations(
+                Config.num_stations, passengers_mediator, rng, ids
+            ),
             metros=[],
             status=EngineStatus(),
             passengers_mediator=passengers_mediator,
+            rng=rng,
+            ids=ids,
         )
         self._travel_plan_finder = TravelPlanFinder(self._components)
 
@@ -56,13 +75,17 @@ class Engine:
         self.game_speed = 1
         self.steps_allowed: int | None = None
 
-        # UI
-        self._game_renderer = GameRenderer(self._components)
+        # UI, created on the first render when headless
+        self._game_renderer: GameRenderer | None = None
 
         # delegated classes
         self._passenger_spawner = PassengerSpawner(
             self._components,
-            Config.passenger_spawning.interval_step,
+            demand_model
+            or FixedIntervalDemand(
+                Config.passenger_spawning.interval_step * 1000,
+                Config.passenger_spawning.first_time_divisor,
+            ),
         )
 
         self.path_manager = PathManager(
@@ -70,13 +93,104 @@ class Engine:
             self._travel_plan_finder,
         )
         self._passenger_mover = PassengerMover(self._components)
+        self._metro_mover: Final = (
+            VectorizedMetroMover(self._components)
+            if Config.vectorized_metro_movement
+            else None
+        )
 
-        self._components.gui.init(self.path_manager.max_num_paths)
+        if not headless:
+            self._init_rendering()
 
     ######################
     ### public methods ###
     ######################
 
+    def reset(self, seed: int | None = None) -> None:
+        """
+        Starts a new game reusing the components of this engine. The stations are
+        generated as in a new Engine, so the same seed gives the same layout.
+        """
+        components = self._components
+        if seed is not None:
+            components.rng.bit_generator.state = _create_rng(seed).bit_generator.state
+
+        components.paths.clear()
+        components.metros.clear()
+        components.stations.clear()
+        components.passengers_mediator.reset()
+        components.ids.reset()
+        components.stations.extend(
+            get_random_stations(
+                Config.num_stations,
+                components.passengers_mediator,
+                components.rng,
+                components.ids,
+            )
+        )
+        components.status.reset()
+        components.path_color_manager.reset()
+        components.gui.assign_paths_to_buttons(components.paths)
+        components.topology.bump()
+
+        self._passenger_spawner.reset()
+        self.path_manager.reset()
+        self.game_speed = 1
+        self.steps_allowed = None
+
+    def snapshot(self) -> EngineSnapshot:
+        """
+        Captures the state of the game, for `restore` to bring it back. Much
+        cheaper than a deep copy: entities are shared with the snapshot and only
+        their mutable attributes are copied. Paths can't be being edited.
+        """
+        assert not self.path_manager.is_creating_or_expanding
+        assert not self.path_manager.editing_intermediate_stations
+        if self._metro_mover:
+            self._metro_mover.sync_positions()
+        return EngineSnapshot(
+            components=snapshot_components(self._components),
+            travel_plan_finder=self._travel_plan_finder.snapshot(),
+            demand=self._passenger_spawner.snapshot(),
+            game_speed=self.game_speed,
+            steps_allowed=self.steps_allowed,
+        )
+
+    def restore(self, snapshot: EngineSnapshot) -> None:
+        """
+        Brings the game back to a snapshot of this engine. The game then goes on
+        exactly as it did after the snapshot was taken, given the same actions.
+        """
+        assert not self.path_manager.is_creating_or_expanding
+        assert not self.path_manager.editing_intermediate_stations
+        restore_components(self._components, snapshot.components)
+        self._travel_plan_finder.restore(snapshot.travel_plan_finder)
+        self._passenger_spawner.restore(snapshot.demand)
+        if self._metro_mover:
+            self._metro_mover.reset()
+        self._components.gui.assign_paths_to_buttons(self._components.paths)
+        self.game_speed = snapshot.game_speed
+        self.steps_allowed = snapshot.steps_allowed
+
+    def serialize(self) -> bytes:
+        """
+        Saved game in a versioned binary format, see `serialization`. The
+        demand model parameters are not included, only its progress.
+        """
+        return encode_snapshot(self.snapshot())
+
+    def deserialize(self, data: bytes) -> None:
+        """Replaces the game with a saved one, which can come from another process"""
+        self.restore(decode_snapshot(data, self._components))
+
+    def save(self, path: str | os.PathLike[str]) -> None:
+        with open(path, "wb") as file:
+            file.write(self.serialize())
+
+    def load(self, path: str | os.PathLike[str]) -> None:
+        with open(path, "rb") as file:
+            self.deserialize(file.read())
+
     def set_clock(self, clock: pygame.time.Clock) -> None:
         self._components.gui.clock = clock
 
@@ -92,10 +206,10 @@ class Engine:
 
         self._components.status.game_time += 1
         dt_ms *= self.game_speed
+        self._components.status.elapsed_ms += dt_ms
         self._passenger_spawner.increment_time(dt_ms)
 
-        # is this needed? or is better only to find travel plans when
-        # something change (paths)
+        # only replans everything when the network topology has changed
         self._travel_plan_finder.find_travel_plan_for_passengers()
         self._move_passengers()
 
@@ -108,6 +222,35 @@ class Engine:
                     self.toggle_pause()
                     self.steps_allowed = None
 
+    def advance(
+        self,
+        ms: int,
+        step_ms: int,
+        on_step: Callable[[int], None] | None = None,
+    ) -> None:
+        """
+        Advances the game `ms` milliseconds with the same outcome as calling
+        `increment_time(step_ms)` repeatedly (and once more with the remainder).
+
+        Consecutive steps in which no discrete event happens (a metro reaching
+        the end of its segment or passengers spawning) are merged into a single
+        call, so metros travel the merged distance in one move. Positions only
+        differ from the fixed-step ones by floating point rounding.
+        The step of an event is never merged, so stations and metros only change
+        their passengers in calls of a single step.
+        `on_step` is called after every call to `increment_time` with its dt.
+        """
+        remaining = ms
+        while remaining > 0 and not self.is_paused:
+            num_steps = min(
+                remaining // step_ms, self._get_steps_until_next_event(step_ms)
+            )
+            dt_ms = num_steps * step_ms if num_steps else min(step_ms, remaining)
+            self.increment_time(dt_ms)
+            remaining -= dt_ms
+            if on_step:
+                on_step(dt_ms)
+
     def try_starting_path_edition(self, position: Point) -> None:
         self.path_manager.try_starting_path_edition(position)
 
@@ -115,6 +258,11 @@ class Engine:
         return len(self._components.paths) < self.path_manager.max_num_paths
 
     def render(self, screen: pygame.surface.Surface) -> None:
+        if not self._game_renderer:
+            self._init_rendering()
+        assert self._game_renderer
+        if self._metro_mover:
+            self._metro_mover.sync_positions()
         self._game_renderer.render_game(
             screen,
             main_surface_height=self._main_surface_height,
@@ -159,7 +307,43 @@ class Engine:
     ### private methods ###
     #######################
 
+    def _init_rendering(self) -> None:
+        pygame.font.init()
+        self._game_renderer = GameRenderer(self._components)
+        self._components.gui.init(self.path_manager.max_num_paths)
+        self._components.gui.assign_paths_to_buttons(self._components.paths)
+
+    def _get_steps_until_next_event(self, step_ms: int) -> int:
+        """Number of steps that can be merged, the step of the event excluded"""
+        step_game_ms = step_ms * self.game_speed
+        # passengers spawn in the step that brings the spawn timer to 0
+        num_steps = (
+            math.ceil(self._passenger_spawner.ms_until_next_spawn / step_game_ms) - 1
+        )
+        # a metro does not move in the step it reaches the end of its segment
+        ms_until_segment_end = self._get_ms_until_next_segment_end()
+        if ms_until_segment_end < math.inf:
+            num_steps = min(
+                num_steps, math.ceil(ms_until_segment_end / step_game_ms) - 1
+            )
+        return max(num_steps, 0)
+
+    def _get_ms_until_next_segment_end(self) -> float:
+        if self._metro_mover:
+            return self._metro_mover.get_ms_until_next_segment_end()
+        return min(
+            (
+                path.get_ms_until_segment_end(metro)
+                for path in self._components.paths
+                for metro in path.metros
+            ),
+            default=math.inf,
+        )
+
     def _move_metros(self, dt_ms: int) -> None:
+        if self._metro_mover:
+            self._metro_mover.move_metros(dt_ms)
+            return
         for path in self._components.paths:
             for metro in path.metros:
                 path.move_metro(metro, dt_ms)
@@ -171,3 +355,13 @@ class Engine:
                 continue
 
             self._passenger_mover.move_passengers(metro)
+
+
+def _create_rng(seed: int | None) -> np.random.Generator:
+    """
+    Without a seed, the generator is seeded from the global numpy random state,
+    so games stay reproducible for callers that seed it.
+    """
+    if seed is None:
+        seed = int(np.random.randint(2**31 - 1))
+    return np.random.default_rng(seed)
@@ -1,11 +1,17 @@
 from dataclasses import dataclass, field
 
+import numpy as np
+
 from src.engine.path_color_manager import PathColorManager
-from src.entity import Metro, Passenger, Path, Station
+from src.entity import Metro, Path, Station
+from src.entity.ids import IdAllocator
 from src.gui.gui import GUI
+from src.passenger_registry import PassengerRegistry
 from src.protocols.passenger_mediator import PassengersMediatorProtocol
 
+from .path_index import PathIndex
 from .status import EngineStatus
+from .topology import NetworkTopology
 
 
 @dataclass(frozen=True)
@@ -15,17 +21,19 @@ class GameComponents:
     metros: list[Metro]
     status: EngineStatus
     passengers_mediator: PassengersMediatorProtocol
+    rng: np.random.Generator = field(default_factory=np.random.default_rng)
+    ids: IdAllocator = field(default_factory=IdAllocator)
     path_color_manager: PathColorManager = field(
         init=False, default_factory=PathColorManager
     )
     gui: GUI = field(init=False, default_factory=GUI)
+    topology: NetworkTopology = field(init=False, default_factory=NetworkTopology)
+    path_index: PathIndex = field(init=False)
 
-    @property
-    def passengers(self) -> list[Passenger]:
-        passengers: list[Passenger] = []
-        for metro in self.metros:
-            passengers.extend(metro.passengers)
+    def __post_init__(self) -> None:
+        # frozen dataclass
+        object.__setattr__(self, "path_index", PathIndex(self.paths, self.topology))
 
-        for station in self.stations:
-            passengers.extend(station.passengers)
-        return passengers
+    @property
+    def passengers(self) -> PassengerRegistry:
+        return self.passengers_mediator.passengers
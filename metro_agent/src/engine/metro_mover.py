@@ -0,0 +1,161 @@
+import math
+from typing import Final
+
+import numpy as np
+
+from src.entity import Metro, Path
+from src.geometry.point import Point
+from src.geometry.polygons import Polygon
+from src.geometry.types import radians_to_degrees
+from src.geometry.utils import EPS, get_direction
+
+from .game_components import GameComponents
+
+
+class VectorizedMetroMover:
+    """
+    Moves all the metros of the network with one NumPy step.
+
+    Positions, segment destinations and speeds are kept in contiguous arrays,
+    one row per metro. Only the metros that reach the end of their segment go
+    through `Path.move_metro`, their row is then reloaded on the next step.
+    Metro positions are written back lazily, see `sync_positions`.
+    """
+
+    __slots__ = (
+        "_components",
+        "_metros",
+        "_paths",
+        "_positions",
+        "_destinations",
+        "_speeds",
+        "_leaving_station",
+        "_stale_rows",
+        "_positions_synced",
+        "_signature",
+    )
+
+    def __init__(self, components: GameComponents):
+        self._components: Final = components
+        self._metros: list[Metro] = []
+        self._paths: list[Path] = []
+        self._positions = np.empty((0, 2))
+        self._destinations = np.empty((0, 2))
+        self._speeds = np.empty(0)
+        self._leaving_station = np.empty(0, dtype=bool)
+        self._stale_rows: list[int] = []
+        self._positions_synced = True
+        self._signature: tuple[int, int] | None = None
+
+    ######################
+    ### public methods ###
+    ######################
+
+    def move_metros(self, dt_ms: int) -> None:
+        self._refresh()
+        if not self._metros:
+            return
+        self._load_stale_rows()
+
+        diff = self._destinations - self._positions
+        distances = np.hypot(diff[:, 0], diff[:, 1])
+        distances_can_travel = self._speeds * dt_ms
+        # same tolerance as Path.move_metro
+        reached = distances_can_travel >= distances - EPS
+        moving = ~reached
+
+        directions = diff[moving] / distances[moving, np.newaxis]
+        self._positions[moving] += directions * distances_can_travel[moving, np.newaxis]
+        self._positions_synced = False
+
+        for row in np.flatnonzero(moving & self._leaving_station).tolist():
+            self._metros[row].current_station = None
+            self._leaving_station[row] = False
+
+        for row in np.flatnonzero(reached).tolist():
+            metro = self._metros[row]
+            metro.position = self._get_position(row)
+            self._paths[row].move_metro(metro, dt_ms)
+            position = metro.position
+            self._positions[row] = (position.left, position.top)
+            self._stale_rows.append(row)
+
+    def get_ms_until_next_segment_end(self) -> float:
+        """Game time until the first metro reaches the end of its segment"""
+        self._refresh()
+        if not self._metros:
+            return math.inf
+        self._load_stale_rows()
+
+        diff = self._destinations - self._positions
+        distances = np.hypot(diff[:, 0], diff[:, 1])
+        return float(np.min(np.maximum(distances - EPS, 0.0) / self._speeds))
+
+    def sync_positions(self) -> None:
+        """Writes the positions of the arrays back to the metros"""
+        if self._positions_synced:
+            return
+        for row, metro in enumerate(self._metros):
+            metro.position = self._get_position(row)
+        self._positions_synced = True
+
+    def reset(self) -> None:
+        """
+        Drops the arrays without writing them back, for when the metros have
+        been moved from outside (a restored snapshot).
+        """
+        self._metros = []
+        self._paths = []
+        self._stale_rows = []
+        self._positions_synced = True
+        self._signature = None
+
+    #######################
+    ### private methods ###
+    #######################
+
+    def _refresh(self) -> None:
+        """Rebuilds the arrays when metros have been added or the network changed"""
+        paths = self._components.paths
+        signature = (
+            self._components.topology.version,
+            sum(len(path.metros) for path in paths),
+        )
+        if signature == self._signature:
+            return
+        self.sync_positions()
+        self._signature = signature
+
+        self._metros = [metro for path in paths for metro in path.metros]
+        self._paths = [path for path in paths for _ in path.metros]
+        num_metros = len(self._metros)
+        self._positions = np.empty((num_metros, 2))
+        self._destinations = np.empty((num_metros, 2))
+        self._speeds = np.empty(num_metros)
+        self._leaving_station = np.zeros(num_metros, dtype=bool)
+        self._stale_rows = list(range(num_metros))
+
+    def _load_stale_rows(self) -> None:
+        for row in self._stale_rows:
+            self._load_row(row)
+        self._stale_rows.clear()
+
+    def _load_row(self, row: int) -> None:
+        metro = self._metros[row]
+        segment = metro.current_segment
+        destination = segment.end if metro.is_forward else segment.start
+
+        position = metro.position
+        self._positions[row] = (position.left, position.top)
+        self._destinations[row] = (destination.left, destination.top)
+        self._speeds[row] = metro.game_speed
+        self._leaving_station[row] = metro.current_station is not None
+
+        if isinstance(metro.shape, Polygon):
+            direction = get_direction(position, destination)
+            radians = math.atan2(direction.top, direction.left)
+            metro.shape.set_degrees(radians_to_degrees(radians))
+
+    def _get_position(self, row: int) -> Point:
+        left, top = self._positions[row].tolist()
+        return Point(left, top)
@@ -1,42 +1,115 @@
 from __future__ import annotations
 
-import random
 from collections.abc import Sequence
-from typing import Final, Mapping
+from typing import Final
+
+import numpy as np
+from numpy.typing import NDArray
 
 from src.config import passenger_color, passenger_size
 from src.entity import Passenger, Station
+from src.entity.ids import IdAllocator
+from src.geometry.shape import Shape
 from src.geometry.type import ShapeType
 from src.utils import get_shape_from_type
 
-ShapeTypesToOthers = Mapping[ShapeType, Sequence[ShapeType]]
+_passenger_shapes: dict[ShapeType, Shape] = {}
 
 
 class PassengerCreator:
-    __slots__ = ("_shape_types_to_others",)
-    _shape_types_to_others: Final[ShapeTypesToOthers]
+    """
+    Creates passengers heading to a shape type other than their station's.
+
+    The shape type tables are cached until the stations change, and the
+    destinations of all the passengers of a spawning are drawn in one call.
+    """
 
-    def __init__(self, station_types: Sequence[ShapeType]):
-        self._shape_types_to_others = self._map_shape_types_to_others(station_types)
+    __slots__ = (
+        "_rng",
+        "_ids",
+        "_stations",
+        "_shape_types",
+        "_station_type_idxs",
+        "_other_type_idxs",
+    )
+
+    def __init__(
+        self,
+        rng: np.random.Generator | None = None,
+        ids: IdAllocator | None = None,
+    ):
+        self._rng: Final = rng or np.random.default_rng()
+        self._ids: Final = ids
+        self._stations: tuple[Station, ...] = ()
+        # station shape types, in order of first appearance
+        self._shape_types: list[ShapeType] = []
+        self._station_type_idxs: NDArray[np.intp] = np.empty(0, dtype=np.intp)
+        # row i: indexes of the shape types other than the i-th one
+        self._other_type_idxs: NDArray[np.intp] = np.empty((0, 0), dtype=np.intp)
 
     # public methods
 
-    def create_passenger(self, station: Station) -> Passenger:
-        other_shape_types = self._shape_types_to_others[station.shape.type]
-        destination_shape_type = random.choice(other_shape_types)
-        return _create_passenger_with_shape_type(destination_shape_type)
+    def create_passengers(
+        self, stations: Sequence[Station], counts: NDArray[np.int64]
+    ) -> list[list[Passenger]]:
+        """Creates counts[i] passengers for the i-th station"""
+        self._refresh(stations)
+        num_types = len(self._shape_types)
+        if num_types < 2:
+            # nowhere else to go
+            return [[] for _ in stations]
+
+        origin_idxs = np.repeat(self._station_type_idxs, counts)
+        draws = self._rng.integers(num_types - 1, size=len(origin_idxs))
+        destination_idxs = self._other_type_idxs[origin_idxs, draws].tolist()
+
+        passengers: list[list[Passenger]] = []
+        start = 0
+        for count in counts.tolist():
+            passengers.append(
+                [
+                    _create_passenger_with_shape_type(self._shape_types[idx], self._ids)
+                    for idx in destination_idxs[start : start + count]
+                ]
+            )
+            start += count
+        return passengers
 
     # private methods
 
-    def _map_shape_types_to_others(
-        self, station_types: Sequence[ShapeType]
-    ) -> ShapeTypesToOthers:
-        return {
-            shape_type: [x for x in station_types if x != shape_type]
-            for shape_type in set(station_types)
-        }
+    def _refresh(self, stations: Sequence[Station]) -> None:
+        if len(stations) == len(self._stations) and all(
+            a is b for a, b in zip(stations, self._stations)
+        ):
+            return
+        self._stations = tuple(stations)
+        type_idxs: dict[ShapeType, int] = {}
+        for station in stations:
+            type_idxs.setdefault(station.shape.type, len(type_idxs))
+        self._shape_types = list(type_idxs)
+        self._station_type_idxs = np.array(
+            [type_idxs[station.shape.type] for station in stations], dtype=np.intp
+        )
+        num_types = len(type_idxs)
+        self._other_type_idxs = np.array(
+            [[j for j in range(num_types) if j != i] for i in range(num_types)],
+            dtype=np.intp,
+        ).reshape(num_types, max(num_types - 1, 0))
+
+
+def get_passenger_shape(shape_type: ShapeType) -> Shape:
+    """
+    Shape of the passengers heading to `shape_type`. Passenger shapes are only
+    drawn, so one per shape type is shared by all the passengers.
+    """
+    shape = _passenger_shapes.get(shape_type)
+    if shape is None:
+        shape = get_shape_from_type(shape_type, passenger_color, passenger_size)
+        _passenger_shapes[shape_type] = shape
+    return shape
 
 
-def _create_passenger_with_shape_type(shape_type: ShapeType) -> Passenger:
-    shape = get_shape_from_type(shape_type, passenger_color, passenger_size)
-    return Passenger(shape)
+def _create_passenger_with_shape_type(
+    shape_type: ShapeType, ids: IdAllocator | None
+) -> Passenger:
+    return Passenger(get_passenger_shape(shape_type), ids)
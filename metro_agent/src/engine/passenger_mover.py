@@ -8,6 +8,14 @@ from .path_finder import find_next_path_for_passenger_at_station
 
 
 class PassengerMover:
+    """
+    Exchanges passengers between a metro and the station it stops at.
+
+    Holders queue their passengers by where they go next (see
+    `Station._get_queue_key` and `Metro._get_queue_key`), so a stop only
+    touches the passengers that actually board or alight.
+    """
+
     __slots__ = ("_components",)
 
     def __init__(self, components: GameComponents):
@@ -19,20 +27,16 @@ class PassengerMover:
         station = metro.current_station
         assert station
 
-        to_arrive: list[Passenger] = []
-        from_metro_to_station: list[Passenger] = []
-        from_station_to_metro: list[Passenger] = []
-
         # queue
-        for passenger in metro.passengers:
-            if have_same_shape_type(station, passenger):
-                to_arrive.append(passenger)
-            elif self._is_next_planned_station(station, passenger):
-                from_metro_to_station.append(passenger)
-
-        for passenger in station.passengers:
-            if self._metro_is_in_passenger_next_path(passenger, metro):
-                from_station_to_metro.append(passenger)
+        to_arrive = self._get_passengers_arriving_at(station, metro)
+        from_metro_to_station = [
+            passenger
+            for passenger in metro.get_queued_passengers(station)
+            if not have_same_shape_type(station, passenger)
+        ]
+        from_station_to_metro = station.get_queued_passengers(
+            metro.path_id, limit=metro.capacity
+        )
 
         # process
         self._make_passengers_arrive(to_arrive, metro)
@@ -45,20 +49,17 @@ class PassengerMover:
 
     # private methods
 
-    def _is_next_planned_station(self, station: Station, passenger: Passenger) -> bool:
-        travel_plan = passenger.travel_plan
-        assert travel_plan
-        return travel_plan.get_next_station() == station
-
-    def _metro_is_in_passenger_next_path(
-        self, passenger: Passenger, metro: Metro
-    ) -> bool:
-        travel_plan = passenger.travel_plan
-        assert travel_plan
-        next_path = travel_plan.next_path
-        if not next_path:
-            return False
-        return next_path.id == metro.path_id
+    def _get_passengers_arriving_at(
+        self, station: Station, metro: Metro
+    ) -> list[Passenger]:
+        registry = self._components.passengers_mediator.passengers
+        if not registry.get_destination_counts(metro).get(station.shape.type):
+            return []
+        return [
+            passenger
+            for passenger in metro.passengers
+            if have_same_shape_type(station, passenger)
+        ]
 
     def _make_passengers_arrive(
         self, to_arrive: Sequence[Passenger], metro: Metro
@@ -100,8 +101,9 @@ class PassengerMover:
         assert travel_plan
         travel_plan.increment_next_station()
         find_next_path_for_passenger_at_station(
-            self._components.paths, travel_plan, station
+            self._components.path_index, travel_plan, station
         )
+        station.requeue_passenger(passenger)
 
 
 def have_same_shape_type(station: Station, passenger: Passenger) -> bool:
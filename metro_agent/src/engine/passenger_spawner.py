@@ -2,11 +2,12 @@ from __future__ import annotations
 
 from typing import Final, Mapping
 
-from src.config import Config
+import numpy as np
+
 from src.entity.passenger import Passenger
-from src.geometry.type import ShapeType
 from src.protocols.travel_plan import TravelPlanProtocol
 
+from .demand_model import Arrivals, DemandModel, DemandState
 from .game_components import GameComponents
 from .passenger_creator import PassengerCreator
 
@@ -16,56 +17,61 @@ TravelPlansMapping = Mapping[Passenger, TravelPlanProtocol]
 class PassengerSpawner:
     __slots__ = (
         "_components",
-        "_interval_step",
-        "_ms_until_next_spawn",
+        "_demand_model",
+        "_passenger_creator",
     )
 
-    def __init__(self, components: GameComponents, interval_step: int):
+    def __init__(self, components: GameComponents, demand_model: DemandModel):
         self._components = components
-        self._interval_step: Final[int] = interval_step * 1000
-
-        self._ms_until_next_spawn: float = (
-            self._interval_step / Config.passenger_spawning.first_time_divisor
+        self._demand_model: Final = demand_model
+        self._passenger_creator: Final = PassengerCreator(
+            components.rng, components.ids
         )
 
     ######################
     ### public methods ###
     ######################
 
+    def reset(self) -> None:
+        self._demand_model.reset()
+
+    def snapshot(self) -> DemandState:
+        return self._demand_model.snapshot()
+
+    def restore(self, state: DemandState) -> None:
+        self._demand_model.restore(state)
+
     def increment_time(self, dt_ms: int) -> None:
-        self._ms_until_next_spawn -= dt_ms
+        self._demand_model.increment_time(dt_ms)
 
     def manage_passengers_spawning(self) -> None:
-        if self._is_passenger_spawn_time():
-            self._spawn_passengers()
-            self._reset()
+        arrivals = self._demand_model.sample_arrivals(
+            len(self._components.stations), self._components.rng
+        )
+        if arrivals is not None:
+            self._spawn_passengers(arrivals)
 
     @property
     def ms_until_next_spawn(self) -> float:
-        return self._ms_until_next_spawn
+        return self._demand_model.ms_until_next_spawn
 
     #######################
     ### private methods ###
     #######################
 
-    def _spawn_passengers(self) -> None:
-        station_types = self._get_station_shape_types()
-        passenger_creator = PassengerCreator(station_types)
-        for station in self._components.stations:
-            if not station.has_room():
-                continue
-            passenger = passenger_creator.create_passenger(station)
-            station.add_new_passenger(passenger)
-
-    def _get_station_shape_types(self) -> list[ShapeType]:
-        station_shape_types: list[ShapeType] = []
-        for station in self._components.stations:
-            if station.shape.type not in station_shape_types:
-                station_shape_types.append(station.shape.type)
-        return station_shape_types
-
-    def _is_passenger_spawn_time(self) -> bool:
-        return self._ms_until_next_spawn <= 0
-
-    def _reset(self) -> None:
-        self._ms_until_next_spawn = self._interval_step
+    def _spawn_passengers(self, arrivals: Arrivals | None = None) -> None:
+        """Spawns arrivals[i] passengers at the i-th station, one by default"""
+        stations = self._components.stations
+        if arrivals is None:
+            arrivals = np.ones(len(stations), dtype=np.int64)
+        # arrivals at a full station are turned away before any id is allocated
+        free_room = np.fromiter(
+            (station.capacity - station.occupation for station in stations),
+            dtype=np.int64,
+            count=len(stations),
+        )
+        arrivals = np.minimum(arrivals, np.maximum(free_room, 0))
+        created = self._passenger_creator.create_passengers(stations, arrivals)
+        for station, passengers in zip(stations, created):
+            for passenger in passengers:
+                station.add_new_passenger(passenger)
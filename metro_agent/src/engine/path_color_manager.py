@@ -36,6 +36,21 @@ class PathColorManager:
         self._path_colors[path.color] = False
         del self._color_status[path]
 
+    def reset(self) -> None:
+        """Releases the colors of all the paths"""
+        self._color_status.clear()
+        for color in self._path_colors:
+            self._path_colors[color] = False
+
+    def snapshot(self) -> tuple[dict[Path, Color], dict[Color, bool]]:
+        return dict(self._color_status), dict(self._path_colors)
+
+    def restore(self, state: tuple[dict[Path, Color], dict[Color, bool]]) -> None:
+        color_status, path_colors = state
+        self._color_status.clear()
+        self._color_status.update(color_status)
+        self._path_colors.update(path_colors)
+
     #######################
     ### private methods ###
     #######################
@@ -72,7 +72,7 @@ class CreatingPath(CreatingOrExpandingPathBase):
         return len(self._components.metros) < max_num_metros
 
     def _add_new_metro(self) -> None:
-        metro = Metro(self._components.passengers_mediator)
+        metro = Metro(self._components.passengers_mediator, self._components.ids)
         self.path.add_metro(metro)
         self._components.metros.append(metro)
         if Config.debug_path_and_metros:
@@ -81,6 +81,7 @@ class CreatingPath(CreatingOrExpandingPathBase):
     def _finish_path_creation(self) -> None:
         assert self.is_active
         self.path.is_being_created = False
+        self._on_topology_changed()
         if self._can_add_metro():
             self._add_new_metro()
         self._stop_creating_or_expanding()
@@ -89,3 +90,4 @@ class CreatingPath(CreatingOrExpandingPathBase):
     def _remove_path_from_network(self) -> None:
         self._components.path_color_manager.release_color_for_path(self.path)
         self._components.paths.remove(self.path)
+        self._on_topology_changed()
@@ -70,11 +70,13 @@ class CreatingOrExpandingPathBase(ABC):
         # loop
         if self._can_make_loop(station):
             self.path.set_loop()
+            self._on_topology_changed()
             return
         # non-loop
         allowed = station not in self.path.stations
         if allowed:
             self.path.add_station(station)
+            self._on_topology_changed()
         return
 
     def _stop_creating_or_expanding(self) -> None:
@@ -83,6 +85,9 @@ class CreatingOrExpandingPathBase(ABC):
         self.path.selected = False
         self.is_active = False
 
+    def _on_topology_changed(self) -> None:
+        self._components.topology.bump()
+
     def _num_stations_in_this_path(self) -> int:
         return len(self.path.stations)
 
@@ -66,6 +66,7 @@ class ExpandingPath(CreatingOrExpandingPathBase):
             )
             if can_make_loop:
                 self.path.set_loop()
+                self._on_topology_changed()
                 return
 
             allowed = station not in self.path.stations
@@ -89,3 +90,4 @@ class ExpandingPath(CreatingOrExpandingPathBase):
         path.stations.insert(index + 1, station)
         # TODO: update metros' travel step
         path.update_segments()
+        self._on_topology_changed()
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import itertools
+from collections.abc import Sequence
+from typing import Final
+
+from src.entity import Path, Station
+
+from .topology import NetworkTopology
+
+_NO_PATHS: Final[tuple[Path, ...]] = ()
+
+
+class PathIndex:
+    """
+    Station to paths and station pair to shared paths lookups.
+
+    The index is rebuilt lazily, on the first query after the network topology
+    changed. Paths are always returned in the order of the paths sequence.
+    """
+
+    __slots__ = (
+        "_paths",
+        "_topology",
+        "_version",
+        "_paths_by_station",
+        "_shared_paths",
+    )
+
+    def __init__(self, paths: Sequence[Path], topology: NetworkTopology) -> None:
+        self._paths: Final = paths
+        self._topology: Final = topology
+        self._version: int | None = None
+        self._paths_by_station: dict[Station, tuple[Path, ...]] = {}
+        self._shared_paths: dict[tuple[Station, Station], tuple[Path, ...]] = {}
+
+    ######################
+    ### public methods ###
+    ######################
+
+    def get_paths_with_station(self, station: Station) -> Sequence[Path]:
+        self._refresh()
+        return self._paths_by_station.get(station, _NO_PATHS)
+
+    def get_shared_paths(
+        self, station_a: Station, station_b: Station
+    ) -> Sequence[Path]:
+        if station_a == station_b:
+            return self.get_paths_with_station(station_a)
+        self._refresh()
+        return self._shared_paths.get((station_a, station_b), _NO_PATHS)
+
+    def get_shared_path(self, station_a: Station, station_b: Station) -> Path | None:
+        """Returns the first path both stations belong to, or None if there is none"""
+        shared_paths = self.get_shared_paths(station_a, station_b)
+        return shared_paths[0] if shared_paths else None
+
+    def is_connected(self, station: Station) -> bool:
+        self._refresh()
+        return station in self._paths_by_station
+
+    #######################
+    ### private methods ###
+    #######################
+
+    def _refresh(self) -> None:
+        if self._version == self._topology.version:
+            return
+        paths_by_station: dict[Station, list[Path]] = {}
+        shared_paths: dict[tuple[Station, Station], list[Path]] = {}
+        for path in self._paths:
+            stations = list(dict.fromkeys(path.stations))
+            for station in stations:
+                paths_by_station.setdefault(station, []).append(path)
+            for pair in itertools.permutations(stations, 2):
+                shared_paths.setdefault(pair, []).append(path)
+        self._paths_by_station = {
+            station: tuple(paths) for station, paths in paths_by_station.items()
+        }
+        self._shared_paths = {
+            pair: tuple(paths) for pair, paths in shared_paths.items()
+        }
+        self._version = self._topology.version
@@ -57,7 +57,7 @@ class PathManager:
         result = self._components.path_color_manager.get_first_path_color_available()
         assert result
         path_order, color = result
-        path = Path(color, path_order)
+        path = Path(color, path_order, self._components.ids)
         path.is_being_created = True
         path.selected = True
         self._creating_or_expanding_path = CreatingPath(self._components, path)
@@ -65,6 +65,7 @@ class PathManager:
         self._components.paths.append(path)
 
         path.add_station(station)
+        self._on_topology_changed()
         return gen_wrapper_creating_or_expanding(self._creating_or_expanding_path)
 
     def start_expanding_path_on_station(
@@ -79,12 +80,12 @@ class PathManager:
         return gen_wrapper_creating_or_expanding(self._creating_or_expanding_path)
 
     def remove_path(self, path: Path) -> None:
-        self._components.gui.path_to_button[path].remove_path()
         for metro in path.metros:
             self._remove_metro(metro)
         self._components.path_color_manager.release_color_for_path(path)
         self._components.paths.remove(path)
         self._components.gui.assign_paths_to_buttons(self._components.paths)
+        self._on_topology_changed()
         self._find_travel_plan_for_passengers()
 
     def try_to_set_temporary_point(self, position: Point) -> None:
@@ -129,8 +130,63 @@ class PathManager:
         self.editing_intermediate_stations.path.selected = False
         self.editing_intermediate_stations = None
 
-    def get_paths_with_station(self, station: Station) -> list[Path]:
-        return [path for path in self._components.paths if station in path.stations]
+    def get_paths_with_station(self, station: Station) -> Sequence[Path]:
+        return self._components.path_index.get_paths_with_station(station)
+
+    def get_shared_paths(
+        self, station_a: Station, station_b: Station
+    ) -> Sequence[Path]:
+        return self._components.path_index.get_shared_paths(station_a, station_b)
+
+    def is_station_connected(self, station: Station) -> bool:
+        return self._components.path_index.is_connected(station)
+
+    def can_create(self, station_a: Station, station_b: Station) -> bool:
+        """
+        Whether creating a path from `station_a` to `station_b` would succeed,
+        by the rules of `CreatingPath`. Nothing is allocated or changed.
+        """
+        return (
+            not self._creating_or_expanding_path
+            and len(self._components.paths) < self.max_num_paths
+            and station_a is not station_b
+        )
+
+    def can_expand(self, path: Path, anchor: Station, target: Station) -> bool:
+        """
+        Whether expanding `path` from `anchor` to `target` would change it, by
+        the rules of `ExpandingPath`: the target is added at the anchor side,
+        or closes the loop if it is the other end of a path of 3+ stations.
+        Nothing is allocated or changed.
+        """
+        if self._creating_or_expanding_path or path.is_looped:
+            return False
+        stations = path.stations
+        if anchor not in stations:
+            return False
+        if target not in stations:
+            return True
+        other_end = (
+            path.first_station if anchor is path.last_station else path.last_station
+        )
+        return target is other_end and len(stations) > 2
+
+    def can_remove(self, path: Path) -> bool:
+        """Whether `path` is in the game and not being edited"""
+        edited = (
+            edition.path
+            for edition in (
+                self._creating_or_expanding_path,
+                self.editing_intermediate_stations,
+            )
+            if edition
+        )
+        return path in self._components.paths and path not in edited
+
+    def reset(self) -> None:
+        """Drops any edition in progress, paths and metros are cleared by the engine"""
+        self._creating_or_expanding_path = None
+        self.editing_intermediate_stations = None
 
     @property
     def is_creating_or_expanding(self) -> bool:
@@ -149,11 +205,13 @@ class PathManager:
         # we insert the station *after* that index
         path.stations.insert(index + 1, station)
         path.update_segments()
+        self._on_topology_changed()
         self.stop_edition()
 
     def _remove_station(self, station: Station) -> None:
         assert self.editing_intermediate_stations
         self.editing_intermediate_stations.remove_station(station)
+        self._on_topology_changed()
         self.stop_edition()
 
     def _remove_metro(self, metro: Metro) -> None:
@@ -167,6 +225,9 @@ class PathManager:
                 f"Removed item from metros. Total metros: {len(self._components.metros)}"
             )
 
+    def _on_topology_changed(self) -> None:
+        self._components.topology.bump()
+
     def _find_travel_plan_for_passengers(self) -> None:
         self._travel_plan_finder.find_travel_plan_for_passengers()
 
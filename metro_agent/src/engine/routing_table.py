@@ -0,0 +1,99 @@
+from collections.abc import Iterable, Mapping, Sequence, Set
+
+from src.entity import Path, Station
+from src.geometry.type import ShapeType
+from src.graph.node import Node
+from src.graph.station_graph import NO_STATION, StationGraph
+from src.travel_plan import Route
+
+from .path_index import PathIndex
+
+
+class RoutingTable:
+    """
+    Routes from every station to every shape type, built once per network
+    topology so planning a passenger is a dict lookup.
+
+    When built from the previous table, the routes that don't ride on any of
+    the affected paths and still go through the same stations are carried
+    over as the same objects, so the passengers holding them keep their plan.
+    """
+
+    __slots__ = ("_routes",)
+
+    def __init__(
+        self,
+        graph: StationGraph,
+        stations_by_shape_type: Mapping[ShapeType, Sequence[Station]],
+        path_index: PathIndex,
+        previous: "RoutingTable | None" = None,
+        affected_paths: Set[Path] = frozenset(),
+    ) -> None:
+        self._routes: dict[tuple[Station, ShapeType], Route] = {}
+        nodes = [Node(station) for station in graph.stations]
+        for shape_type, candidates in stations_by_shape_type.items():
+            # candidates at the same distance are chosen in the order given
+            sources = [graph.station_index[station] for station in candidates]
+            distances, next_hops = graph.find_nearest(sources)
+            for origin_idx, distance in enumerate(distances):
+                # unreachable or already a station of that shape type
+                if distance <= 0:
+                    continue
+                idx_path = [origin_idx]
+                while next_hops[idx_path[-1]] != NO_STATION:
+                    idx_path.append(next_hops[idx_path[-1]])
+                idx_path = graph.skip_stations_on_same_path(idx_path)
+
+                key = (graph.stations[origin_idx], shape_type)
+                stations = [graph.stations[idx] for idx in idx_path]
+                route = previous.get_route(*key) if previous else None
+                if (
+                    route is None
+                    or not route.paths.isdisjoint(affected_paths)
+                    or [node.station for node in route.node_path] != stations[1:]
+                ):
+                    route = _create_route(
+                        stations,
+                        shape_type,
+                        [nodes[idx] for idx in idx_path],
+                        path_index,
+                    )
+                self._routes[key] = route
+
+    @classmethod
+    def from_routes(cls, routes: Iterable[Route]) -> "RoutingTable":
+        """Table holding the given routes, e.g. when loading a saved game"""
+        table = cls.__new__(cls)
+        table._routes = {(route.origin, route.destination): route for route in routes}
+        return table
+
+    @property
+    def routes(self) -> Iterable[Route]:
+        return self._routes.values()
+
+    def get_route(self, station: Station, shape_type: ShapeType) -> Route | None:
+        return self._routes.get((station, shape_type))
+
+    def is_current(self, route: Route) -> bool:
+        """Whether the route is still the one planned from its origin"""
+        return self._routes.get((route.origin, route.destination)) is route
+
+
+def _create_route(
+    stations: Sequence[Station],
+    shape_type: ShapeType,
+    nodes: Sequence[Node],
+    path_index: PathIndex,
+) -> Route:
+    legs = [
+        path_index.get_shared_path(start, end)
+        for start, end in zip(stations, stations[1:])
+    ]
+    return Route(
+        origin=stations[0],
+        destination=shape_type,
+        next_hop=stations[1],
+        node_path=tuple(nodes[1:]),
+        next_path=legs[0],
+        paths=frozenset(path for path in legs if path is not None),
+    )
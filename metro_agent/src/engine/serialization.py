@@ -0,0 +1,809 @@
+"""
+Versioned binary format of a game, built on top of engine snapshots.
+
+A saved game is a set of NumPy arrays, one column per attribute, packed
+after a header giving their names, types and shapes, and compressed.
+Entities refer to each other through their index in their own table
+(stations, paths, metros, routes), -1 standing for None, and are created
+again with their original ids when the game is loaded. Many games can be
+packed into one archive file, read back through a memory map.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import mmap
+import os
+import struct
+import zlib
+from collections import Counter
+from collections.abc import Hashable, Iterable, Iterator, Sequence
+from typing import Final, TypeVar
+
+import numpy as np
+from numpy.typing import NDArray
+
+from src.config import station_color, station_size
+from src.entity import Metro, Passenger, Path, Station
+from src.entity.holder import Holder, HolderState
+from src.entity.ids import EntityId
+from src.entity.metro import MetroMovementState
+from src.entity.passenger import PassengerState
+from src.entity.segments import Segment
+from src.entity.travel_step import TravelStep
+from src.exceptions import GameException
+from src.geometry.point import Point
+from src.geometry.type import ShapeType
+from src.geometry.types import create_degrees
+from src.graph.node import Node
+from src.passenger_registry import RegistryState
+from src.travel_plan import Route, TravelPlan
+from src.utils import get_shape_from_type
+
+from .game_components import GameComponents
+from .passenger_creator import get_passenger_shape
+from .routing_table import RoutingTable
+from .snapshot import ComponentsSnapshot, EngineSnapshot
+from .travel_plan_finder import TravelPlanFinderState
+
+FORMAT_VERSION: Final = 1
+NONE: Final = -1
+
+_SHAPE_TYPES: Final = list(ShapeType)
+_SHAPE_TYPE_CODES: Final = {
+    shape_type: code for code, shape_type in enumerate(ShapeType)
+}
+_MAGIC: Final = b"METROSAV"
+# format version and header size
+_PREAMBLE: Final = struct.Struct("<II")
+_ARCHIVE_MAGIC: Final = b"METROSTATES\x00"
+_ARCHIVE_FOOTER: Final = np.dtype([("index_offset", "<u8"), ("count", "<u8")])
+
+Arrays = dict[str, NDArray[np.generic]]
+_T = TypeVar("_T", bound=Hashable)
+
+
+def encode_snapshot(snapshot: EngineSnapshot) -> bytes:
+    return pack_arrays(_MAGIC, FORMAT_VERSION, _Encoder(snapshot).encode())
+
+
+def decode_snapshot(data: bytes, components: GameComponents) -> EngineSnapshot:
+    """
+    Creates the entities of a saved game for the given components, to be
+    brought in with `Engine.restore`.
+    """
+    version, arrays = unpack_arrays(_MAGIC, data)
+    if version != FORMAT_VERSION:
+        raise GameException(f"Unsupported saved game version {version}")
+    return _Decoder(arrays, components).decode()
+
+
+def pack_arrays(magic: bytes, version: int, arrays: Arrays) -> bytes:
+    """Magic bytes, version, header with the names, types and shapes, payload"""
+    header = json.dumps(
+        [(name, array.dtype.str, array.shape) for name, array in arrays.items()]
+    ).encode()
+    payload = zlib.compress(b"".join(array.tobytes() for array in arrays.values()))
+    return magic + _PREAMBLE.pack(version, len(header)) + header + payload
+
+
+def unpack_arrays(magic: bytes, data: bytes) -> tuple[int, Arrays]:
+    """Version and read-only arrays of data written by `pack_arrays`"""
+    if data[: len(magic)] != magic:
+        raise GameException(f"Data doesn't start with {magic!r}")
+    start = len(magic) + _PREAMBLE.size
+    version, header_size = _PREAMBLE.unpack(data[len(magic) : start])
+    header = json.loads(data[start : start + header_size])
+    payload = zlib.decompress(data[start + header_size :])
+    arrays: Arrays = {}
+    offset = 0
+    for name, dtype, shape in header:
+        array = np.frombuffer(payload, dtype, count=math.prod(shape), offset=offset)
+        arrays[name] = array.reshape(shape)
+        offset += array.nbytes
+    return version, arrays
+
+
+class StateArchiveWriter:
+    """
+    Appends saved games to a single file. The offsets of the games are
+    written at the end when the writer is closed.
+    """
+
+    __slots__ = ("_file", "_offsets")
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        self._file = open(path, "wb")
+        self._file.write(_ARCHIVE_MAGIC)
+        self._offsets: list[int] = []
+
+    def __enter__(self) -> StateArchiveWriter:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def append(self, data: bytes) -> None:
+        self._offsets.append(self._file.tell())
+        self._file.write(data)
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        index_offset = self._file.tell()
+        self._offsets.append(index_offset)
+        self._file.write(np.asarray(self._offsets, dtype="<u8").tobytes())
+        footer = np.array([(index_offset, len(self._offsets) - 1)], _ARCHIVE_FOOTER)
+        self._file.write(footer.tobytes())
+        self._file.close()
+
+
+class StateArchive:
+    """
+    Saved games written by `StateArchiveWriter`, memory mapped so reading a
+    game only touches its own bytes.
+    """
+
+    __slots__ = ("_file", "_mmap", "_offsets")
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[: len(_ARCHIVE_MAGIC)] != _ARCHIVE_MAGIC:
+            self.close()
+            raise GameException(f"{path} is not a saved games archive")
+        footer = np.frombuffer(
+            self._mmap,
+            _ARCHIVE_FOOTER,
+            count=1,
+            offset=len(self._mmap) - _ARCHIVE_FOOTER.itemsize,
+        )[0]
+        # offsets of the games, then the end of the last one
+        self._offsets = np.frombuffer(
+            self._mmap,
+            "<u8",
+            count=int(footer["count"]) + 1,
+            offset=int(footer["index_offset"]),
+        )
+
+    def __enter__(self) -> StateArchive:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, idx: int) -> bytes:
+        if not -len(self) <= idx < len(self):
+            raise IndexError(idx)
+        idx %= len(self)
+        return self._mmap[int(self._offsets[idx]) : int(self._offsets[idx + 1])]
+
+    def __iter__(self) -> Iterator[bytes]:
+        return (self[idx] for idx in range(len(self)))
+
+    def close(self) -> None:
+        # the offsets view must go before the map can be closed
+        self._offsets = np.empty(1, dtype="<u8")
+        self._mmap.close()
+        self._file.close()
+
+
+class _Encoder:
+    __slots__ = ("_snapshot", "_stations", "_paths", "_metros", "_holders", "_routes")
+
+    def __init__(self, snapshot: EngineSnapshot) -> None:
+        components = snapshot.components
+        self._snapshot: Final = snapshot
+        self._stations: Final = _index(station for station, _ in components.stations)
+        self._paths: Final = _index(path for path, _ in components.paths)
+        self._metros: Final = _index(metro for metro, _, _ in components.metros)
+        # stations first, then metros
+        self._holders: Final[dict[Holder, int]] = {}
+        self._holders.update(self._stations.items())
+        self._holders.update(
+            (metro, len(self._stations) + i) for metro, i in self._metros.items()
+        )
+        self._routes: Final[dict[Route, int]] = {}
+
+    def encode(self) -> Arrays:
+        snapshot = self._snapshot
+        components = snapshot.components
+        game_time, elapsed_ms, is_paused, score = components.status
+        return {
+            "status": np.array(
+                [
+                    game_time,
+                    is_paused,
+                    score,
+                    snapshot.game_speed,
+                    _or_none(snapshot.steps_allowed),
+                    components.next_id,
+                ],
+                dtype=np.int64,
+            ),
+            "elapsed_ms": np.array(elapsed_ms, dtype=np.float64),
+            "rng": np.frombuffer(json.dumps(components.rng).encode(), dtype=np.uint8),
+            "demand": np.array(snapshot.demand, dtype=np.float64),
+            **self._encode_stations(),
+            **self._encode_paths(),
+            **self._encode_metros(),
+            # passengers first, they collect the routes they hold
+            **self._encode_passengers(),
+            **self._encode_travel_plan_finder(),
+            **self._encode_routes(),
+        }
+
+    def _encode_stations(self) -> Arrays:
+        stations = list(self._stations)
+        return {
+            "station_id": np.array([s.id for s in stations], dtype=np.int64),
+            "station_shape": _shape_codes(s.shape.type for s in stations),
+            "station_xy": _points(s.position for s in stations),
+        }
+
+    def _encode_paths(self) -> Arrays:
+        snapshots = [
+            path_snapshot for _, path_snapshot in self._snapshot.components.paths
+        ]
+        paths = list(self._paths)
+        station_counts, station_idxs = _ragged(
+            [self._stations[s] for s in snapshot[0]] for snapshot in snapshots
+        )
+        metro_counts, metro_idxs = _ragged(
+            [self._metros[m] for m in snapshot[1]] for snapshot in snapshots
+        )
+        return {
+            "path_id": np.array([p.id for p in paths], dtype=np.int64),
+            "path_color": np.array([p.color for p in paths], dtype=np.uint8).reshape(
+                -1, 3
+            ),
+            "path_order": np.array([p.path_order for p in paths], dtype=np.int32),
+            "path_looped": np.array([s[3] for s in snapshots], dtype=bool),
+            "path_selected": np.array([s[5] for s in snapshots], dtype=bool),
+            "path_station_counts": station_counts,
+            "path_stations": station_idxs,
+            "path_metro_counts": metro_counts,
+            "path_metros": metro_idxs,
+        }
+
+    def _encode_metros(self) -> Arrays:
+        segments_by_path_id = {
+            path.id: path_snapshot[2]
+            for path, path_snapshot in self._snapshot.components.paths
+        }
+        paths_by_id = {path.id: idx for path, idx in self._paths.items()}
+        movements = [movement for _, _, movement in self._snapshot.components.metros]
+        metro_path: list[int] = []
+        metro_segment: list[int] = []
+        metro_forward: list[bool] = []
+        for *_, travel_step, path_id in movements:
+            assert travel_step and path_id is not None
+            segments = segments_by_path_id[path_id]
+            metro_path.append(paths_by_id[path_id])
+            metro_segment.append(_find_segment(segments, travel_step))
+            metro_forward.append(travel_step.is_forward)
+        return {
+            "metro_id": np.array([m.id for m in self._metros], dtype=np.int64),
+            "metro_path": np.array(metro_path, dtype=np.int32),
+            "metro_segment": np.array(metro_segment, dtype=np.int32),
+            "metro_forward": np.array(metro_forward, dtype=bool),
+            "metro_xy": _points(m[0] for m in movements),
+            "metro_degrees": np.array([m[1] for m in movements], dtype=np.float64),
+            "metro_station": self._station_idxs(m[2] for m in movements),
+        }
+
+    def _encode_passengers(self) -> Arrays:
+        components = self._snapshot.components
+        holder_states = [
+            *(s for _, s in components.stations),
+            *(s for _, s, _ in components.metros),
+        ]
+        holders_by_passenger, *_ = components.passengers_mediator[1]
+        slots: dict[Passenger, int] = {}
+        queue_slots: dict[Passenger, int] = {}
+        queue_keys: dict[Passenger, int] = {}
+        for holder_passengers, queues in holder_states:
+            slots.update((p, i) for i, p in enumerate(holder_passengers))
+            for key, queue in queues:
+                queue_slots.update((p, i) for i, p in enumerate(queue))
+                queue_keys.update((p, _encode_queue_key(key)) for p in queue)
+
+        passengers = [passenger for passenger, _ in components.passengers]
+        states = [state for _, state in components.passengers]
+        plans = [state[2] for state in states]
+        return {
+            "passenger_id": np.array([p.id for p in passengers], dtype=np.int64),
+            "passenger_shape": _shape_codes(
+                p.destination_shape.type for p in passengers
+            ),
+            "passenger_holder": np.array(
+                [self._holders[holders_by_passenger[p]] for p in passengers],
+                dtype=np.int32,
+            ),
+            "passenger_slot": np.array([slots[p] for p in passengers], dtype=np.int32),
+            "passenger_queue_slot": np.array(
+                [queue_slots[p] for p in passengers], dtype=np.int32
+            ),
+            "passenger_queue_key": np.array(
+                [queue_keys[p] for p in passengers], dtype=np.int64
+            ),
+            "passenger_last_station": self._station_idxs(state[3] for state in states),
+            "passenger_has_plan": np.array(
+                [state[1] is not None for state in states], dtype=bool
+            ),
+            "passenger_route": np.array(
+                [
+                    self._route_idx(state[1].route if state[1] else None)
+                    for state in states
+                ],
+                dtype=np.int32,
+            ),
+            "passenger_next_path": self._path_idxs(
+                plan[0] if plan else None for plan in plans
+            ),
+            "passenger_next_station": self._station_idxs(
+                plan[1] if plan else None for plan in plans
+            ),
+            "passenger_cursor": np.array(
+                [plan[2] if plan else 0 for plan in plans], dtype=np.int32
+            ),
+        }
+
+    def _encode_travel_plan_finder(self) -> Arrays:
+        connected, routing_table, layouts, is_current = (
+            self._snapshot.travel_plan_finder
+        )
+        # layouts of removed paths are lost, they only matter to reuse routes
+        layouts = {p: layout for p, layout in layouts.items() if p in self._paths}
+        station_counts, station_idxs = _ragged(
+            [self._stations[s] for s in stations] for stations, _ in layouts.values()
+        )
+        return {
+            "finder_current": np.array(is_current),
+            "finder_has_table": np.array(routing_table is not None),
+            "finder_connected": self._station_idxs(connected),
+            "finder_routes": np.array(
+                (
+                    [self._route_idx(r) for r in routing_table.routes]
+                    if routing_table
+                    else []
+                ),
+                dtype=np.int32,
+            ),
+            "layout_path": self._path_idxs(layouts),
+            "layout_looped": np.array(
+                [looped for _, looped in layouts.values()], dtype=bool
+            ),
+            "layout_station_counts": station_counts,
+            "layout_stations": station_idxs,
+        }
+
+    def _encode_routes(self) -> Arrays:
+        routes = list(self._routes)
+        node_counts, node_idxs = _ragged(
+            [self._stations[node.station] for node in r.node_path] for r in routes
+        )
+        path_counts, path_idxs = _ragged(
+            [self._paths[p] for p in r.paths if p in self._paths] for r in routes
+        )
+        return {
+            "route_origin": self._station_idxs(r.origin for r in routes),
+            "route_shape": _shape_codes(r.destination for r in routes),
+            "route_next_path": self._path_idxs(r.next_path for r in routes),
+            "route_node_counts": node_counts,
+            "route_nodes": node_idxs,
+            "route_path_counts": path_counts,
+            "route_paths": path_idxs,
+        }
+
+    def _route_idx(self, route: Route | None) -> int:
+        if route is None:
+            return NONE
+        return self._routes.setdefault(route, len(self._routes))
+
+    def _station_idxs(self, stations: Iterable[Station | None]) -> NDArray[np.int32]:
+        return np.array(
+            [NONE if s is None else self._stations[s] for s in stations], dtype=np.int32
+        )
+
+    def _path_idxs(self, paths: Iterable[Path | None]) -> NDArray[np.int32]:
+        # a path removed since (held by a stale plan) is lost as well
+        return np.array(
+            [self._paths.get(p, NONE) if p else NONE for p in paths], dtype=np.int32
+        )
+
+
+class _Decoder:
+    __slots__ = ("_arrays", "_components", "_stations", "_paths", "_metros", "_routes")
+
+    def __init__(self, arrays: Arrays, components: GameComponents) -> None:
+        self._arrays: Final = arrays
+        self._components: Final = components
+        self._stations: list[Station] = []
+        self._paths: list[Path] = []
+        self._metros: list[Metro] = []
+        self._routes: list[Route] = []
+
+    def decode(self) -> EngineSnapshot:
+        arrays = self._arrays
+        ids = self._components.ids
+        game_time, is_paused, score, game_speed, steps_allowed, next_id = arrays[
+            "status"
+        ].tolist()
+        self._stations = self._decode_stations()
+        self._paths = self._decode_paths()
+        metro_movements = self._decode_metros()
+        self._routes = self._decode_routes()
+        passengers, passenger_states, holder_states, registry_state = (
+            self._decode_passengers()
+        )
+        # entities take their own ids, the segments whatever is left
+        ids.restore(next_id)
+
+        holders: list[Holder] = [*self._stations, *self._metros]
+        _, palette = self._components.path_color_manager.snapshot()
+        colors = {path: path.color for path in self._paths}
+        components = ComponentsSnapshot(
+            paths=tuple((path, path.snapshot()) for path in self._paths),
+            stations=tuple(zip(self._stations, holder_states)),
+            metros=tuple(
+                (metro, holder_states[len(self._stations) + i], movement)
+                for i, (metro, movement) in enumerate(
+                    zip(self._metros, metro_movements)
+                )
+            ),
+            passengers=tuple(zip(passengers, passenger_states)),
+            passengers_mediator=(tuple(holders), registry_state),
+            status=(game_time, float(arrays["elapsed_ms"]), bool(is_paused), score),
+            path_colors=(
+                colors,
+                {color: color in colors.values() for color in palette},
+            ),
+            rng=json.loads(arrays["rng"].tobytes()),
+            next_id=next_id,
+        )
+        return EngineSnapshot(
+            components=components,
+            travel_plan_finder=self._decode_travel_plan_finder(),
+            demand=tuple(arrays["demand"].tolist()),
+            game_speed=game_speed,
+            steps_allowed=None if steps_allowed == NONE else steps_allowed,
+        )
+
+    def _decode_stations(self) -> list[Station]:
+        arrays = self._arrays
+        stations: list[Station] = []
+        for entity_id, shape_code, (left, top) in zip(
+            arrays["station_id"].tolist(),
+            arrays["station_shape"].tolist(),
+            arrays["station_xy"].tolist(),
+        ):
+            self._components.ids.restore(entity_id)
+            shape = get_shape_from_type(
+                _SHAPE_TYPES[shape_code], station_color, station_size
+            )
+            stations.append(
+                Station(
+                    shape,
+                    Point(left, top),
+                    self._components.passengers_mediator,
+                    self._components.ids,
+                )
+            )
+        return stations
+
+    def _decode_paths(self) -> list[Path]:
+        arrays = self._arrays
+        paths: list[Path] = []
+        for entity_id, color, order, looped, selected, station_idxs in zip(
+            arrays["path_id"].tolist(),
+            arrays["path_color"].tolist(),
+            arrays["path_order"].tolist(),
+            arrays["path_looped"].tolist(),
+            arrays["path_selected"].tolist(),
+            _unragged(arrays["path_station_counts"], arrays["path_stations"]),
+        ):
+            self._components.ids.restore(entity_id)
+            path = Path(tuple(color), order, self._components.ids)
+            path.stations.extend(self._stations[idx] for idx in station_idxs)
+            if looped:
+                path.set_loop()
+            else:
+                path.update_segments()
+            path.selected = selected
+            paths.append(path)
+        return paths
+
+    def _decode_metros(self) -> list[MetroMovementState]:
+        arrays = self._arrays
+        mediator = self._components.passengers_mediator
+        self._metros = []
+        for entity_id in arrays["metro_id"].tolist():
+            self._components.ids.restore(entity_id)
+            self._metros.append(Metro(mediator, self._components.ids))
+        for path, metro_idxs in zip(
+            self._paths,
+            _unragged(arrays["path_metro_counts"], arrays["path_metros"]),
+        ):
+            for idx in metro_idxs:
+                path.add_metro(self._metros[idx])
+
+        movements: list[MetroMovementState] = []
+        for (
+            metro,
+            path_idx,
+            segment_idx,
+            is_forward,
+            (left, top),
+            degrees,
+            station_idx,
+        ) in zip(
+            self._metros,
+            arrays["metro_path"].tolist(),
+            arrays["metro_segment"].tolist(),
+            arrays["metro_forward"].tolist(),
+            arrays["metro_xy"].tolist(),
+            arrays["metro_degrees"].tolist(),
+            arrays["metro_station"].tolist(),
+        ):
+            path = self._paths[path_idx]
+            assert metro.travel_step
+            travel_step = _find_travel_step(
+                metro.travel_step, path.snapshot()[2], segment_idx, is_forward
+            )
+            movements.append(
+                (
+                    Point(left, top),
+                    create_degrees(degrees),
+                    self._get_station(station_idx),
+                    travel_step,
+                    path.id,
+                )
+            )
+        return movements
+
+    def _decode_routes(self) -> list[Route]:
+        arrays = self._arrays
+        nodes: dict[Station, Node] = {}
+
+        def get_node(idx: int) -> Node:
+            station = self._stations[idx]
+            node = nodes.get(station)
+            if node is None:
+                node = nodes[station] = Node(station)
+            return node
+
+        routes: list[Route] = []
+        for origin_idx, shape_code, next_path_idx, node_idxs, path_idxs in zip(
+            arrays["route_origin"].tolist(),
+            arrays["route_shape"].tolist(),
+            arrays["route_next_path"].tolist(),
+            _unragged(arrays["route_node_counts"], arrays["route_nodes"]),
+            _unragged(arrays["route_path_counts"], arrays["route_paths"]),
+        ):
+            node_path = tuple(get_node(idx) for idx in node_idxs)
+            routes.append(
+                Route(
+                    origin=self._stations[origin_idx],
+                    destination=_SHAPE_TYPES[shape_code],
+                    next_hop=node_path[0].station,
+                    node_path=node_path,
+                    next_path=self._get_path(next_path_idx),
+                    paths=frozenset(self._paths[idx] for idx in path_idxs),
+                )
+            )
+        return routes
+
+    def _decode_passengers(
+        self,
+    ) -> tuple[list[Passenger], list[PassengerState], list[HolderState], RegistryState]:
+        arrays = self._arrays
+        holders: list[Holder] = [*self._stations, *self._metros]
+        passengers: list[Passenger] = []
+        states: list[PassengerState] = []
+        for (
+            entity_id,
+            shape_code,
+            last_station_idx,
+            has_plan,
+            route_idx,
+            next_path_idx,
+            next_station_idx,
+            cursor,
+        ) in zip(
+            arrays["passenger_id"].tolist(),
+            arrays["passenger_shape"].tolist(),
+            arrays["passenger_last_station"].tolist(),
+            arrays["passenger_has_plan"].tolist(),
+            arrays["passenger_route"].tolist(),
+            arrays["passenger_next_path"].tolist(),
+            arrays["passenger_next_station"].tolist(),
+            arrays["passenger_cursor"].tolist(),
+        ):
+            self._components.ids.restore(entity_id)
+            shape = get_passenger_shape(_SHAPE_TYPES[shape_code])
+            passenger = Passenger(shape, self._components.ids)
+            travel_plan = None
+            if has_plan:
+                route = self._routes[route_idx] if route_idx != NONE else None
+                travel_plan = TravelPlan(route, passenger.id)
+            plan_state = (
+                (
+                    self._get_path(next_path_idx),
+                    self._get_station(next_station_idx),
+                    cursor,
+                )
+                if travel_plan
+                else None
+            )
+            state: PassengerState = (
+                False,
+                travel_plan,
+                plan_state,
+                self._get_station(last_station_idx),
+            )
+            passenger.restore(state)
+            passengers.append(passenger)
+            states.append(state)
+
+        holder_idxs = arrays["passenger_holder"].tolist()
+        by_holder: list[list[tuple[int, int, Hashable, Passenger]]] = [
+            [] for _ in holders
+        ]
+        for passenger, holder_idx, slot, queue_slot, key in zip(
+            passengers,
+            holder_idxs,
+            arrays["passenger_slot"].tolist(),
+            arrays["passenger_queue_slot"].tolist(),
+            arrays["passenger_queue_key"].tolist(),
+        ):
+            key = self._decode_queue_key(holders[holder_idx], key)
+            by_holder[holder_idx].append((slot, queue_slot, key, passenger))
+        holder_states: list[HolderState] = []
+        for entries in by_holder:
+            queues: dict[Hashable, list[tuple[int, Passenger]]] = {}
+            for _, queue_slot, key, passenger in sorted(entries, key=lambda e: e[0]):
+                queues.setdefault(key, []).append((queue_slot, passenger))
+            holder_states.append(
+                (
+                    tuple(p for *_, p in sorted(entries, key=lambda e: e[0])),
+                    tuple(
+                        (key, tuple(p for _, p in sorted(queue, key=lambda e: e[0])))
+                        for key, queue in queues.items()
+                    ),
+                )
+            )
+
+        holder_by_passenger = {
+            p: holders[idx] for p, idx in zip(passengers, holder_idxs)
+        }
+        counts_by_holder: dict[Holder, Counter[ShapeType]] = {}
+        for passenger, holder in holder_by_passenger.items():
+            counts_by_holder.setdefault(holder, Counter())[
+                passenger.destination_shape.type
+            ] += 1
+        registry_state: RegistryState = (
+            holder_by_passenger,
+            Counter(p.destination_shape.type for p in passengers),
+            counts_by_holder,
+        )
+        return passengers, states, holder_states, registry_state
+
+    def _decode_travel_plan_finder(self) -> TravelPlanFinderState:
+        arrays = self._arrays
+        routing_table = (
+            RoutingTable.from_routes(
+                self._routes[idx] for idx in arrays["finder_routes"].tolist()
+            )
+            if bool(arrays["finder_has_table"])
+            else None
+        )
+        layouts = {
+            self._paths[path_idx]: (
+                tuple(self._stations[idx] for idx in station_idxs),
+                looped,
+            )
+            for path_idx, looped, station_idxs in zip(
+                arrays["layout_path"].tolist(),
+                arrays["layout_looped"].tolist(),
+                _unragged(arrays["layout_station_counts"], arrays["layout_stations"]),
+            )
+        }
+        return (
+            tuple(self._stations[idx] for idx in arrays["finder_connected"].tolist()),
+            routing_table,
+            layouts,
+            bool(arrays["finder_current"]),
+        )
+
+    def _decode_queue_key(self, holder: Holder, key: int) -> Hashable:
+        if key == NONE:
+            return None
+        # metros queue by station, stations by path id
+        if isinstance(holder, Metro):
+            return next(station for station in self._stations if station.id == key)
+        return EntityId(key)
+
+    def _get_station(self, idx: int) -> Station | None:
+        return None if idx == NONE else self._stations[idx]
+
+    def _get_path(self, idx: int) -> Path | None:
+        return None if idx == NONE else self._paths[idx]
+
+
+def _index(entities: Iterable[_T]) -> dict[_T, int]:
+    return {entity: idx for idx, entity in enumerate(entities)}
+
+
+def _or_none(value: int | None) -> int:
+    return NONE if value is None else value
+
+
+def _shape_codes(shape_types: Iterable[ShapeType]) -> NDArray[np.int8]:
+    return np.array([_SHAPE_TYPE_CODES[t] for t in shape_types], dtype=np.int8)
+
+
+def _points(points: Iterable[Point]) -> NDArray[np.float64]:
+    return np.array([(p.left, p.top) for p in points], dtype=np.float64).reshape(-1, 2)
+
+
+def _ragged(
+    rows: Iterable[Sequence[int]],
+) -> tuple[NDArray[np.int32], NDArray[np.int32]]:
+    """Lengths of the rows, and their concatenation"""
+    rows = list(rows)
+    counts = np.array([len(row) for row in rows], dtype=np.int32)
+    flat = np.array([idx for row in rows for idx in row], dtype=np.int32)
+    return counts, flat
+
+
+def _unragged(
+    counts: NDArray[np.generic], flat: NDArray[np.generic]
+) -> list[list[int]]:
+    bounds = np.cumsum(counts).tolist()
+    values = flat.tolist()
+    return [values[end - count : end] for count, end in zip(counts.tolist(), bounds)]
+
+
+def _encode_queue_key(key: Hashable) -> int:
+    if key is None:
+        return NONE
+    if isinstance(key, Station):
+        return key.id
+    assert isinstance(key, int)
+    return key
+
+
+def _find_segment(segments: Sequence[Segment], travel_step: TravelStep) -> int:
+    """
+    Index of the segment the metro travels, NONE if its travel steps are
+    from segments the path has rebuilt since (only the first metro of a path
+    follows the rebuilds).
+    """
+    for idx, segment in enumerate(segments):
+        if segment is travel_step.current:
+            return idx
+    return NONE
+
+
+def _find_travel_step(
+    travel_step: TravelStep,
+    segments: Sequence[Segment],
+    segment_idx: int,
+    is_forward: bool,
+) -> TravelStep:
+    """Step of the chain on the given segment, the first one if unknown"""
+    if segment_idx == NONE:
+        return travel_step
+    for _ in range(2 * len(segments)):
+        if travel_step.current is segments[segment_idx] and (
+            travel_step.is_forward == is_forward
+        ):
+            return travel_step
+        assert travel_step.next
+        travel_step = travel_step.next
+    raise GameException("Saved metro is not on a segment of its path")
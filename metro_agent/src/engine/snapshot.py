@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+from src.entity import Metro, Passenger, Path, Station
+from src.entity.holder import HolderState
+from src.entity.metro import MetroMovementState
+from src.entity.passenger import PassengerState
+from src.entity.path.path import PathSnapshot
+from src.passengers_mediator import MediatorState
+from src.type import Color
+
+from .demand_model import DemandState
+from .game_components import GameComponents
+from .travel_plan_finder import TravelPlanFinderState
+
+
+@dataclass(frozen=True, slots=True)
+class ComponentsSnapshot:
+    """
+    State of the game components at one point in time.
+
+    Entities are kept by reference along with the values of their mutable
+    attributes, and what never changes once built (segments, routes, shapes)
+    is shared with the live game, so taking a snapshot only copies a few
+    tuples per entity. A snapshot can be restored any number of times.
+    """
+
+    paths: tuple[tuple[Path, PathSnapshot], ...]
+    stations: tuple[tuple[Station, HolderState], ...]
+    metros: tuple[tuple[Metro, HolderState, MetroMovementState], ...]
+    passengers: tuple[tuple[Passenger, PassengerState], ...]
+    passengers_mediator: MediatorState
+    status: tuple[int, float, bool, int]
+    path_colors: tuple[dict[Path, Color], dict[Color, bool]]
+    rng: dict[str, Any]
+    next_id: int
+
+
+@dataclass(frozen=True, slots=True)
+class EngineSnapshot:
+    """What `Engine.restore` needs to bring a game back, see `Engine.snapshot`"""
+
+    components: ComponentsSnapshot
+    travel_plan_finder: TravelPlanFinderState
+    demand: DemandState
+    game_speed: int
+    steps_allowed: int | None
+
+
+def snapshot_components(components: GameComponents) -> ComponentsSnapshot:
+    return ComponentsSnapshot(
+        paths=tuple((path, path.snapshot()) for path in components.paths),
+        stations=tuple(
+            (station, station.snapshot_passengers()) for station in components.stations
+        ),
+        metros=tuple(
+            (metro, metro.snapshot_passengers(), metro.snapshot_movement())
+            for metro in components.metros
+        ),
+        passengers=tuple(
+            (passenger, passenger.snapshot()) for passenger in components.passengers
+        ),
+        passengers_mediator=components.passengers_mediator.snapshot(),
+        status=components.status.snapshot(),
+        path_colors=components.path_color_manager.snapshot(),
+        rng=dict(components.rng.bit_generator.state),
+        next_id=components.ids.snapshot(),
+    )
+
+
+def restore_components(
+    components: GameComponents, snapshot: ComponentsSnapshot
+) -> None:
+    """Brings the components back, then bumps the topology version"""
+    components.paths[:] = [path for path, _ in snapshot.paths]
+    components.stations[:] = [station for station, _ in snapshot.stations]
+    components.metros[:] = [metro for metro, _, _ in snapshot.metros]
+
+    # paths repair the travel steps of their metros
+    for metro, passengers, movement in snapshot.metros:
+        metro.restore_passengers(passengers)
+        metro.restore_movement(movement)
+    for path, path_snapshot in snapshot.paths:
+        path.restore(path_snapshot)
+    for station, passengers in snapshot.stations:
+        station.restore_passengers(passengers)
+    for passenger, state in snapshot.passengers:
+        passenger.restore(state)
+
+    components.passengers_mediator.restore(snapshot.passengers_mediator)
+    components.status.restore(snapshot.status)
+    components.path_color_manager.restore(snapshot.path_colors)
+    components.rng.bit_generator.state = snapshot.rng
+    components.ids.restore(snapshot.next_id)
+    components.topology.bump()
@@ -1,11 +1,26 @@
 class EngineStatus:
     __slots__ = (
         "game_time",
+        "elapsed_ms",
         "is_paused",
         "score",
     )
 
     def __init__(self) -> None:
         self.game_time: int = 0
+        # game time, in ms, scaled by the game speed
+        self.elapsed_ms: float = 0
         self.is_paused: bool = False
         self.score: int = 0
+
+    def reset(self) -> None:
+        self.game_time = 0
+        self.elapsed_ms = 0
+        self.is_paused = False
+        self.score = 0
+
+    def snapshot(self) -> tuple[int, float, bool, int]:
+        return self.game_time, self.elapsed_ms, self.is_paused, self.score
+
+    def restore(self, state: tuple[int, float, bool, int]) -> None:
+        self.game_time, self.elapsed_ms, self.is_paused, self.score = state
@@ -0,0 +1,20 @@
+class NetworkTopology:
+    """
+    Version counter of the metro network.
+
+    It must be bumped every time a path is created, removed or its stations
+    (or loop) change, so cached structures derived from the network know
+    when they have to be rebuilt.
+    """
+
+    __slots__ = ("_version",)
+
+    def __init__(self) -> None:
+        self._version = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def bump(self) -> None:
+        self._version += 1
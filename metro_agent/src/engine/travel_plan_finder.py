@@ -1,62 +1,144 @@
-import random
-from collections.abc import Sequence
-from typing import Final, Mapping
+from typing import Final
 
 from src.entity import Passenger, Station
 from src.entity.path.path import Path
 from src.geometry.type import ShapeType
-from src.graph.graph_algo import bfs, build_station_nodes_dict
-from src.graph.node import Node
-from src.graph.skip_intermediate import skip_stations_on_same_path
+from src.graph.station_graph import StationGraph
 from src.travel_plan import TravelPlan
+from src.utils import random_shuffle
 
 from .game_components import GameComponents
-from .path_finder import find_next_path_for_passenger_at_station
+from .routing_table import RoutingTable
 
 DEBUG = False
 
+# connected stations, routing table, path layouts and whether they are current
+TravelPlanFinderState = tuple[
+    tuple[Station, ...],
+    RoutingTable | None,
+    dict[Path, tuple[tuple[Station, ...], bool]],
+    bool,
+]
+
 
 class TravelPlanFinder:
     __slots__ = (
         "_components",
-        "_station_nodes_mapping",
+        "_connected_stations",
+        "_routing_table",
+        "_topology_version",
+        "_path_layouts",
     )
 
     def __init__(self, components: GameComponents):
         self._components: Final = components
-        self._station_nodes_mapping: Mapping[Station, Node] | None = None
+        self._connected_stations: list[Station] = []
+        self._routing_table: RoutingTable | None = None
+        self._topology_version: int | None = None
+        # stations and loop flag of every path when the routing table was built
+        self._path_layouts: dict[Path, tuple[tuple[Station, ...], bool]] = {}
 
     ######################
     ### public methods ###
     ######################
 
     def find_travel_plan_for_passengers(self) -> None:
-        self._station_nodes_mapping = build_station_nodes_dict(
-            self._components.stations, self._components.paths
+        """
+        Replans every passenger waiting at a station if the network changed since
+        the last call. Otherwise, only the passengers without a travel plan (the
+        newly spawned ones) are looked up against the cached graph.
+        """
+        if self._topology_version != self._components.topology.version:
+            self._rebuild_graph()
+            self._find_travel_plan_for_all_passengers()
+        else:
+            self._find_travel_plan_for_new_passengers()
+
+    def snapshot(self) -> TravelPlanFinderState:
+        """The routing table is immutable once built, it is shared"""
+        return (
+            tuple(self._connected_stations),
+            self._routing_table,
+            dict(self._path_layouts),
+            self._topology_version == self._components.topology.version,
         )
+
+    def restore(self, state: TravelPlanFinderState) -> None:
+        """
+        To be called after the topology version was bumped for the restored
+        paths. The routing table is not rebuilt, it would consume random draws.
+        """
+        connected_stations, self._routing_table, path_layouts, is_current = state
+        self._connected_stations = list(connected_stations)
+        self._path_layouts = dict(path_layouts)
+        self._topology_version = (
+            self._components.topology.version if is_current else None
+        )
+
+    #######################
+    ### private methods ###
+    #######################
+
+    def _rebuild_graph(self) -> None:
+        graph = StationGraph(self._components.stations, self._components.paths)
+        self._connected_stations = [
+            station
+            for station in self._components.stations
+            if self._components.path_index.is_connected(station)
+        ]
+        self._routing_table = RoutingTable(
+            graph,
+            {
+                shape_type: self._get_stations_for_shape_type(shape_type)
+                for shape_type in dict.fromkeys(
+                    station.shape.type for station in self._components.stations
+                )
+            },
+            self._components.path_index,
+            previous=self._routing_table,
+            affected_paths=self._get_affected_paths(),
+        )
+        self._topology_version = self._components.topology.version
+
+    def _get_affected_paths(self) -> set[Path]:
+        """Paths created, removed or edited since the routing table was built"""
+        layouts = {
+            path: (tuple(path.stations), path.is_looped)
+            for path in self._components.paths
+        }
+        affected = {
+            path
+            for path in layouts.keys() | self._path_layouts.keys()
+            if layouts.get(path) != self._path_layouts.get(path)
+        }
+        self._path_layouts = layouts
+        return affected
+
+    def _find_travel_plan_for_all_passengers(self) -> None:
         for station in self._components.stations:
             # if station is not in any path
-            if not self._station_is_connected(station):
+            if station not in self._connected_stations:
                 # passengers shouldn't have a travel plan
                 for passenger in station.passengers:
                     if passenger.travel_plan:
                         passenger.travel_plan = None
+                        station.requeue_passenger(passenger)
                 continue
             for passenger in station.passengers[:]:
-                if _passenger_has_travel_plan_with_next_path(
-                    passenger, self._components.paths
-                ):
+                if self._passenger_has_current_route(passenger):
                     continue
                 if DEBUG:
                     print(f"Looking for a travel plan for passenger {passenger}")
                 self._find_travel_plan_for_passenger(station, passenger)
 
-    #######################
-    ### private methods ###
-    #######################
-
-    def _station_is_connected(self, station: Station) -> bool:
-        return any(station in path.stations for path in self._components.paths)
+    def _find_travel_plan_for_new_passengers(self) -> None:
+        for station in self._connected_stations:
+            for passenger in station.passengers[:]:
+                if passenger.travel_plan is not None:
+                    continue
+                if DEBUG:
+                    print(f"Looking for a travel plan for passenger {passenger}")
+                self._find_travel_plan_for_passenger(station, passenger)
 
     def _find_travel_plan_for_passenger(
         self,
@@ -66,35 +148,23 @@ class TravelPlanFinder:
         if station.shape.type == passenger.destination_shape.type:
             passenger.is_at_destination = True
             passenger.travel_plan = None
-            if passenger in station.passengers:
-                station.passengers.remove(passenger)
+            if self._components.passengers_mediator.get_holder(passenger) is station:
+                station.passenger_arrives(passenger)
             self._components.status.score += 1
             return
 
-        assert self._station_nodes_mapping
-        possible_dst_stations = self._get_stations_for_shape_type(
-            passenger.destination_shape.type
-        )
-
-        for possible_dst_station in possible_dst_stations:
-            if possible_dst_station == station:
-                continue
-            start = self._station_nodes_mapping[station]
-            end = self._station_nodes_mapping[possible_dst_station]
-            node_path = bfs(start, end)
-            if len(node_path) == 0:
-                continue
-
-            assert len(node_path) > 1, "The passenger should have already arrived"
-            node_path = skip_stations_on_same_path(node_path)
-            passenger.travel_plan = TravelPlan(node_path[1:], passenger.num_id)
-            self._find_next_path_for_passenger_at_station(passenger, station)
-            break
-
+        assert self._routing_table
+        route = self._routing_table.get_route(station, passenger.destination_shape.type)
+        if route:
+            travel_plan = TravelPlan(route, passenger.num_id)
+            travel_plan.get_next_station()
+            travel_plan.next_path = route.next_path
+            passenger.travel_plan = travel_plan
         else:
-            travel_plan = TravelPlan([], passenger.num_id)
+            travel_plan = TravelPlan(None, passenger.num_id)
             if travel_plan != passenger.travel_plan:
                 passenger.travel_plan = travel_plan
+        station.requeue_passenger(passenger)
 
     def _get_stations_for_shape_type(self, shape_type: ShapeType) -> list[Station]:
         stations = [
@@ -102,24 +172,12 @@ class TravelPlanFinder:
             for station in self._components.stations
             if station.shape.type == shape_type
         ]
-        random.shuffle(stations)
+        random_shuffle(stations, self._components.rng)
         return stations
 
-    def _find_next_path_for_passenger_at_station(
-        self, passenger: Passenger, station: Station
-    ) -> None:
-        assert passenger.travel_plan
-        find_next_path_for_passenger_at_station(
-            self._components.paths, passenger.travel_plan, station
-        )
-
-
-def _passenger_has_travel_plan_with_next_path(
-    passenger: Passenger, paths: Sequence[Path]
-) -> bool:
-    if not passenger.travel_plan:
-        return False
-    return (
-        passenger.travel_plan.next_path in paths
-        or passenger.travel_plan.next_station is not None
-    )
+    def _passenger_has_current_route(self, passenger: Passenger) -> bool:
+        travel_plan = passenger.travel_plan
+        if not travel_plan or not travel_plan.route:
+            return False
+        assert self._routing_table
+        return self._routing_table.is_current(travel_plan.route)
@@ -1,28 +1,32 @@
+from __future__ import annotations
+
 from abc import ABC
-from collections import defaultdict
-from typing import ClassVar, Final
+from typing import Final
 
-from .ids import EntityId, EntityNumId
+from .ids import EntityId, IdAllocator, default_id_allocator
 
 
 class Entity(ABC):
-    __slots__ = ("_id", "_num_id")
+    __slots__ = ("_id", "_ids")
     _id: Final[EntityId]
-    _num_ids: ClassVar[dict[str, int]] = defaultdict(int)
+    _ids: Final[IdAllocator]
 
-    def __init__(self, id: EntityId):
-        self._id = id
-        this_class = type(self)
-        self._num_id = EntityNumId(this_class._num_ids[this_class.__name__])
-        this_class._num_ids[this_class.__name__] += 1
+    def __init__(self, ids: IdAllocator | None = None):
+        self._ids = ids or default_id_allocator
+        self._id = self._ids.allocate()
 
     @property
     def id(self) -> EntityId:
         return self._id
 
     @property
-    def num_id(self) -> EntityNumId:
-        return self._num_id
+    def num_id(self) -> EntityId:
+        """Same as `id`, which used to be a string"""
+        return self._id
+
+    def has_same_id(self, other: Entity) -> bool:
+        """Ids are only unique among the entities of the same allocator"""
+        return self._id == other._id and self._ids is other._ids
 
     def __repr__(self) -> str:
-        return f"{type(self).__name__}-{self.num_id}"
+        return f"{type(self).__name__}-{self._id}"
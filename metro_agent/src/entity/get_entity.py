@@ -3,52 +3,76 @@ from __future__ import annotations
 from collections.abc import Sequence
 from typing import Iterator
 
+import numpy as np
+
 from src.config import Config
 from src.geometry.point import Point
+from src.geometry.shape import Shape
+from src.geometry.utils import get_distance
 from src.gui.gui import get_gui_height, get_main_surface_height
 from src.protocols.passenger_mediator import PassengersMediatorProtocol
 from src.utils import get_random_position, get_random_station_shape
 
+from .ids import IdAllocator
 from .metro import Metro
 from .station import Station
 
 
-def get_random_station(passengers_mediator: PassengersMediatorProtocol) -> Station:
-    shape = get_random_station_shape()
-    position = get_random_position(
-        Config.screen_width, round(get_main_surface_height())
-    )
-    return Station(
-        shape, position + Point(0, round(get_gui_height())), passengers_mediator
-    )
+def get_random_station(
+    passengers_mediator: PassengersMediatorProtocol,
+    rng: np.random.Generator | None = None,
+    ids: IdAllocator | None = None,
+) -> Station:
+    shape, position = _get_random_station_shape_and_position(rng)
+    return Station(shape, position, passengers_mediator, ids)
 
 
 def generate_stations(
-    previous: Sequence[Station], passengers_mediator: PassengersMediatorProtocol
+    previous: Sequence[Station],
+    passengers_mediator: PassengersMediatorProtocol,
+    rng: np.random.Generator | None = None,
+    ids: IdAllocator | None = None,
 ) -> Iterator[Station]:
     while True:
-        new_station = get_random_station(passengers_mediator)
+        # the station is only created once its position is accepted, so
+        # rejected candidates don't use up ids
+        shape, position = _get_random_station_shape_and_position(rng)
         if all(
-            station.get_distance_to(new_station) >= Config.min_distance
+            get_distance(station.position, position) >= Config.min_distance
             for station in previous
         ):
-            yield new_station
+            yield Station(shape, position, passengers_mediator, ids)
 
 
 def get_random_stations(
-    num: int, passengers_mediator: PassengersMediatorProtocol
+    num: int,
+    passengers_mediator: PassengersMediatorProtocol,
+    rng: np.random.Generator | None = None,
+    ids: IdAllocator | None = None,
 ) -> list[Station]:
     stations: list[Station] = []
-    generator = generate_stations(stations, passengers_mediator)
+    generator = generate_stations(stations, passengers_mediator, rng, ids)
     for _ in range(num):
         stations.append(next(generator))
     return stations
 
 
 def get_metros(
-    num: int, passengers_mediator: PassengersMediatorProtocol
+    num: int,
+    passengers_mediator: PassengersMediatorProtocol,
+    ids: IdAllocator | None = None,
 ) -> list[Metro]:
     metros: list[Metro] = []
     for _ in range(num):
-        metros.append(Metro(passengers_mediator))
+        metros.append(Metro(passengers_mediator, ids))
     return metros
+
+
+def _get_random_station_shape_and_position(
+    rng: np.random.Generator | None,
+) -> tuple[Shape, Point]:
+    shape = get_random_station_shape(rng)
+    position = get_random_position(
+        Config.screen_width, round(get_main_surface_height()), rng
+    )
+    return shape, position + Point(0, round(get_gui_height()))
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import itertools
+from collections.abc import Hashable
 from typing import ClassVar, Final, Sequence
 
 import pygame
@@ -10,11 +12,25 @@ from src.geometry.shape import Shape
 from src.protocols.passenger_mediator import PassengersMediatorProtocol
 
 from .entity import Entity
-from .ids import EntityId
+from .ids import IdAllocator
 from .passenger import Passenger
 
+# passengers in boarding order, and the queues with their keys
+HolderState = tuple[
+    tuple[Passenger, ...], tuple[tuple[Hashable, tuple[Passenger, ...]], ...]
+]
+
 
 class Holder(Entity):
+    """
+    Entity carrying passengers.
+
+    Besides the list of passengers, a holder keeps them in queues keyed by
+    `_get_queue_key`, so the passengers going the same way can be looked up
+    without scanning all of them. The key is computed when a passenger
+    enters; call `requeue_passenger` when something it depends on changes.
+    """
+
     __slots__ = (
         "shape",
         "_capacity",
@@ -22,6 +38,8 @@ class Holder(Entity):
         "position",
         "_mediator",
         "_passengers",
+        "_queues",
+        "_queue_keys",
     )
 
     _size: ClassVar[int] = 0
@@ -31,11 +49,11 @@ class Holder(Entity):
         self,
         shape: Shape,
         capacity: int,
-        id: EntityId,
         passengers_per_row: int,
         mediator: PassengersMediatorProtocol,
+        ids: IdAllocator | None = None,
     ) -> None:
-        super().__init__(id)
+        super().__init__(ids)
         assert self._size  # make sure derived class define it
         self.shape: Final[Shape] = shape
         self._capacity: Final[int] = capacity
@@ -43,6 +61,9 @@ class Holder(Entity):
         self._mediator: Final[PassengersMediatorProtocol] = mediator
         self._mediator.register(self)
         self._passengers: Final[list[Passenger]] = []
+        # dicts keep insertion order, so queues are first in, first out
+        self._queues: Final[dict[Hashable, dict[Passenger, None]]] = {}
+        self._queue_keys: Final[dict[Passenger, Hashable]] = {}
 
     ######################
     ### public methods ###
@@ -61,12 +82,51 @@ class Holder(Entity):
     def add_new_passenger(self, passenger: Passenger) -> None:
         self._mediator.on_new_passenger_added(passenger)
         self._add_passenger(passenger)
+        self._mediator.on_passenger_entered(self, passenger)
 
     def move_passenger(self, passenger: Passenger, dest: Holder) -> None:
         source = self
         self._mediator.on_passenger_exit(self, passenger)
-        dest._add_passenger(passenger)
+        assert dest is source or dest.has_room()
         source._remove_passenger(passenger)
+        dest._add_passenger(passenger)
+        self._mediator.on_passenger_entered(dest, passenger)
+
+    def passenger_arrives(self, passenger: Passenger) -> None:
+        self._remove_passenger(passenger)
+        self._mediator.on_passenger_arrived(self, passenger)
+
+    def requeue_passenger(self, passenger: Passenger) -> None:
+        """Moves the passenger to the queue matching its current key"""
+        key = self._get_queue_key(passenger)
+        if self._queue_keys[passenger] == key:
+            return
+        self._dequeue(passenger)
+        self._enqueue(passenger, key)
+
+    def get_queued_passengers(
+        self, key: Hashable, limit: int | None = None
+    ) -> list[Passenger]:
+        """First passengers of the queue, the holder can be modified meanwhile"""
+        queue = self._queues.get(key)
+        if not queue:
+            return []
+        return list(itertools.islice(queue, limit))
+
+    def snapshot_passengers(self) -> HolderState:
+        return tuple(self._passengers), tuple(
+            (key, tuple(queue)) for key, queue in self._queues.items()
+        )
+
+    def restore_passengers(self, state: HolderState) -> None:
+        """Puts back the passengers, bypassing the mediator"""
+        passengers, queues = state
+        self._passengers[:] = passengers
+        self._queues.clear()
+        self._queue_keys.clear()
+        for key, queue in queues:
+            self._queues[key] = dict.fromkeys(queue)
+            self._queue_keys.update(dict.fromkeys(queue, key))
 
     @property
     def passengers(self) -> Sequence[Passenger]:
@@ -87,10 +147,29 @@ class Holder(Entity):
     def _add_passenger(self, passenger: Passenger) -> None:
         assert self.has_room()
         self._passengers.append(passenger)
+        self._enqueue(passenger, self._get_queue_key(passenger))
 
     def _remove_passenger(self, passenger: Passenger) -> None:
-        assert passenger in self._passengers
+        # raises ValueError if the passenger is not here
         self._passengers.remove(passenger)
+        self._dequeue(passenger)
+
+    def _get_queue_key(self, passenger: Passenger) -> Hashable:
+        return None
+
+    def _enqueue(self, passenger: Passenger, key: Hashable) -> None:
+        self._queue_keys[passenger] = key
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = {}
+        queue[passenger] = None
+
+    def _dequeue(self, passenger: Passenger) -> None:
+        key = self._queue_keys.pop(passenger)
+        queue = self._queues[key]
+        del queue[passenger]
+        if not queue:
+            del self._queues[key]
 
     def _draw_passengers(self, surface: pygame.surface.Surface) -> None:
         assert self._mediator
@@ -102,8 +181,9 @@ class Holder(Entity):
         row = 0
         col = 0
         for passenger in self.passengers:
-            rel_offset = Point(col * gap, row * gap)
-            passenger.position = base_position + rel_offset
+            passenger.position = Point(
+                base_position.left + col * gap, base_position.top + row * gap
+            )
             passenger.draw(surface)
 
             if col < (self._passengers_per_row - 1):
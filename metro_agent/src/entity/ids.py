@@ -1,36 +1,36 @@
-from typing import NewType
+from typing import Final, NewType
 
-from shortuuid import uuid
+EntityId = NewType("EntityId", int)
 
-from src.geometry.type import ShapeType
 
-EntityId = NewType("EntityId", str)
-EntityNumId = NewType("EntityNumId", int)
+class IdAllocator:
+    """
+    Hands out compact integer ids to the entities of one engine.
 
+    Ids are unique among the entities created with the same allocator, so
+    engines running in the same process number their entities the same way.
+    """
 
-def create_new_passenger_id() -> EntityId:
-    return _create_new_entity_id(label="Passenger")
+    __slots__ = ("_next_id",)
 
+    def __init__(self) -> None:
+        self._next_id = 0
 
-def create_new_path_id() -> EntityId:
-    return _create_new_entity_id(label="Path")
+    def allocate(self) -> EntityId:
+        entity_id = EntityId(self._next_id)
+        self._next_id += 1
+        return entity_id
 
+    def reset(self) -> None:
+        """Restarts the numbering, once the entities of the engine are dropped"""
+        self._next_id = 0
 
-def create_new_path_segment_id() -> EntityId:
-    return _create_new_entity_id(label="PathSegment")
+    def snapshot(self) -> int:
+        return self._next_id
 
+    def restore(self, next_id: int) -> None:
+        self._next_id = next_id
 
-def create_new_padding_segment_id() -> EntityId:
-    return _create_new_entity_id(label="PaddingSegment")
 
-
-def create_new_metro_id() -> EntityId:
-    return _create_new_entity_id(label="Metro")
-
-
-def create_new_station_id(shape_type: ShapeType) -> EntityId:
-    return EntityId(f"Station-{uuid()}-{shape_type}")
-
-
-def _create_new_entity_id(*, label: str) -> EntityId:
-    return EntityId(f"{label}-{uuid()}")
+# for the entities created outside of an engine (tests, tools)
+default_id_allocator: Final = IdAllocator()
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from collections.abc import Hashable
 from typing import Final
 
 from src.config import (
@@ -11,15 +12,22 @@ from src.config import (
     metro_speed_per_ms,
 )
 from src.entity.travel_step import TravelStep
-from src.geometry.polygons import Rect
+from src.geometry.point import Point
+from src.geometry.polygons import Polygon, Rect
+from src.geometry.types import Degrees
 from src.protocols.passenger_mediator import PassengersMediatorProtocol
 
 from .holder import Holder
-from .ids import EntityId, create_new_metro_id
+from .ids import EntityId, IdAllocator
 from .passenger import Passenger
 from .segments import Segment
 from .station import Station
 
+# position, rotation, current station, travel step and path id
+MetroMovementState = tuple[
+    Point, Degrees, "Station | None", TravelStep | None, EntityId | None
+]
+
 
 class Metro(Holder):
     __slots__ = (
@@ -30,14 +38,18 @@ class Metro(Holder):
     game_speed: Final = metro_speed_per_ms
     _size = metro_size
 
-    def __init__(self, passengers_mediator: PassengersMediatorProtocol) -> None:
+    def __init__(
+        self,
+        passengers_mediator: PassengersMediatorProtocol,
+        ids: IdAllocator | None = None,
+    ) -> None:
         metro_shape = Rect(color=metro_color, width=2 * self._size, height=self._size)
         super().__init__(
             shape=metro_shape,
             capacity=metro_capacity,
-            id=create_new_metro_id(),
             passengers_per_row=metro_passengers_per_row,
             mediator=passengers_mediator,
+            ids=ids,
         )
         self._current_station: Station | None = None
         self.travel_step: TravelStep | None = None
@@ -74,14 +86,40 @@ class Metro(Holder):
         if station:
             self._update_passengers_last_station()
 
-    def passenger_arrives(self, passenger: Passenger) -> None:
-        assert passenger in self._passengers
-        self._remove_passenger(passenger)
+    def snapshot_movement(self) -> MetroMovementState:
+        assert isinstance(self.shape, Polygon)
+        return (
+            self.position,
+            self.shape.degrees,
+            self._current_station,
+            self.travel_step,
+            self.path_id,
+        )
+
+    def restore_movement(self, state: MetroMovementState) -> None:
+        """
+        Travel steps are shared with the snapshot, the path repairs them if
+        its segments were rebuilt meanwhile.
+        """
+        position, degrees, self._current_station, self.travel_step, self.path_id = state
+        self.position = position
+        assert isinstance(self.shape, Polygon)
+        self.shape.set_degrees(degrees)
 
     #######################
     ### private methods ###
     #######################
 
+    def _get_queue_key(self, passenger: Passenger) -> Hashable:
+        """Station where the passenger plans to alight"""
+        travel_plan = passenger.travel_plan
+        if travel_plan is None:
+            return None
+        node_path = travel_plan.node_path
+        if travel_plan.next_station_idx >= len(node_path):
+            return None
+        return node_path[travel_plan.next_station_idx].station
+
     def _update_passengers_last_station(self) -> None:
         for passenger in self.passengers:
             passenger.last_station = self.current_station
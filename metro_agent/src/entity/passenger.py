@@ -1,17 +1,25 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Final
 
 import pygame
 
 from src.geometry.point import Point
 from src.geometry.shape import Shape
-from src.protocols.travel_plan import TravelPlanProtocol
+from src.protocols.travel_plan import TravelPlanProtocol, TravelPlanState
 
 from .entity import Entity
-from .ids import create_new_passenger_id
+from .ids import IdAllocator
 
 if TYPE_CHECKING:
     from .station import Station
 
+# points are immutable, passengers start from the same one
+_ORIGIN: Final = Point(0, 0)
+
+# is at destination, travel plan and its cursor, last station
+PassengerState = tuple[
+    bool, TravelPlanProtocol | None, TravelPlanState | None, "Station | None"
+]
+
 
 class Passenger(Entity):
     __slots__ = (
@@ -22,9 +30,11 @@ class Passenger(Entity):
         "last_station",
     )
 
-    def __init__(self, destination_shape: Shape) -> None:
-        super().__init__(create_new_passenger_id())
-        self.position = Point(0, 0)
+    def __init__(
+        self, destination_shape: Shape, ids: IdAllocator | None = None
+    ) -> None:
+        super().__init__(ids)
+        self.position = _ORIGIN
         self.destination_shape = destination_shape
         self.is_at_destination = False
         self._travel_plan: TravelPlanProtocol | None = None
@@ -47,6 +57,25 @@ class Passenger(Entity):
 
     @travel_plan.setter
     def travel_plan(self, value: TravelPlanProtocol | None) -> None:
-        if self._travel_plan and value:
-            assert value.node_path != self._travel_plan.node_path
+        if self._travel_plan and value and value.route:
+            assert value.route is not self._travel_plan.route
         self._travel_plan = value
+
+    def snapshot(self) -> PassengerState:
+        travel_plan = self._travel_plan
+        return (
+            self.is_at_destination,
+            travel_plan,
+            travel_plan.snapshot() if travel_plan else None,
+            self.last_station,
+        )
+
+    def restore(self, state: PassengerState) -> None:
+        self.is_at_destination, travel_plan, travel_plan_state, self.last_station = (
+            state
+        )
+        # the plan may have been replaced meanwhile, don't go through the setter
+        self._travel_plan = travel_plan
+        if travel_plan:
+            assert travel_plan_state
+            travel_plan.restore(travel_plan_state)
@@ -7,7 +7,7 @@ from src.entity.station import Station
 from src.geometry.point import Point
 from src.geometry.polygons import Polygon
 from src.geometry.types import radians_to_degrees
-from src.geometry.utils import get_direction, get_distance
+from src.geometry.utils import EPS, get_distance
 
 from .state import PathState
 
@@ -34,12 +34,24 @@ class MetroMovementSystem:
 
         distance_can_travel = metro.game_speed * dt_ms
 
-        segment_end_reached = distance_can_travel >= distance_to_destination
+        # the tolerance makes the arrival step independent of how the distance
+        # was travelled, in one move or in several shorter ones
+        segment_end_reached = distance_can_travel >= distance_to_destination - EPS
         if segment_end_reached:
             self._handle_metro_movement_at_the_end_of_the_segment(metro, dst_station)
         else:
             metro.current_station = None
-            metro.position += direction * distance_can_travel
+            position = metro.position
+            metro.position = Point(
+                position.left + direction.left * distance_can_travel,
+                position.top + direction.top * distance_can_travel,
+            )
+
+    def get_ms_until_segment_end(self, metro: Metro) -> float:
+        """Game time the metro needs to reach the end of its current segment"""
+        dst_position, _ = _determine_destination(metro)
+        distance = get_distance(metro.position, dst_position)
+        return max(distance - EPS, 0.0) / metro.game_speed
 
     #######################
     ### private methods ###
@@ -93,6 +105,9 @@ def _calculate_direction_and_distance(
     start_point: Point, end_point: Point
 ) -> tuple[Point, float]:
     """Calculate the distance and direction to the destination point"""
-    distance = get_distance(start_point, end_point)
-    direction = get_direction(start_point, end_point)
-    return direction, distance
+    diff_left = end_point.left - start_point.left
+    diff_top = end_point.top - start_point.top
+    distance = math.hypot(diff_left, diff_top)
+    if distance < EPS:
+        return Point(0.0, 0.0), distance
+    return Point(diff_left / distance, diff_top / distance), distance
@@ -17,11 +17,23 @@ from src.geometry.point import Point
 from src.type import Color
 
 from ..entity import Entity
-from ..ids import create_new_path_id
+from ..ids import IdAllocator
 from ..metro import Metro
 from ..segments import PaddingSegment, PathSegment, Segment
 from ..station import Station
 
+# stations, metros, segments, loop flag, then the edition flags and temp point
+PathSnapshot = tuple[
+    tuple[Station, ...],
+    tuple[Metro, ...],
+    tuple[Segment, ...],
+    bool,
+    bool,
+    bool,
+    Point | None,
+    bool,
+]
+
 
 class Path(Entity):
     __slots__ = (
@@ -38,8 +50,11 @@ class Path(Entity):
         "_location_service",
     )
 
-    def __init__(self, color: Color, path_order: int) -> None:
-        super().__init__(create_new_path_id())
+    def __init__(
+        self, color: Color, path_order: int, ids: IdAllocator | None = None
+    ) -> None:
+        # the allocator also numbers the segments of the path
+        super().__init__(ids)
 
         # Final attributes
         self.color: Final = color
@@ -68,6 +83,10 @@ class Path(Entity):
     def is_looped(self) -> bool:
         return self._state.is_looped
 
+    @property
+    def path_order(self) -> int:
+        return self._path_order
+
     @property
     def first_station(self) -> Station:
         return self.stations[0]
@@ -83,7 +102,7 @@ class Path(Entity):
     def update_segments(self) -> None:
         """This should be called only when it is really needed"""
         segments: list[Segment] = _get_updated_segments(
-            self.stations, self._state.is_looped, self.color
+            self.stations, self._state.is_looped, self.color, self._ids
         )
         if segments:
             travel_step = build_travel_steps(segments, self.is_looped)
@@ -152,6 +171,9 @@ class Path(Entity):
     def move_metro(self, metro: Metro, dt_ms: int) -> None:
         self._metro_movement_system.move_metro(metro, dt_ms)
 
+    def get_ms_until_segment_end(self, metro: Metro) -> float:
+        return self._metro_movement_system.get_ms_until_segment_end(metro)
+
     def get_containing_path_segment(self, position: Point) -> PathSegment | None:
         for segment in self.get_path_segments():
             if segment.includes(position):
@@ -161,10 +183,63 @@ class Path(Entity):
     def get_path_segments(self) -> list[PathSegment]:
         return [seg for seg in self._state.segments if isinstance(seg, PathSegment)]
 
+    def snapshot(self) -> PathSnapshot:
+        """Segments are immutable once built, they are shared with the path"""
+        return (
+            tuple(self.stations),
+            tuple(self.metros),
+            tuple(self._state.segments),
+            self._state.is_looped,
+            self.is_being_created,
+            self.selected,
+            self.temp_point,
+            self.temp_point_is_from_end,
+        )
+
+    def restore(self, snapshot: PathSnapshot) -> None:
+        """To be called after the movement of the metros has been restored"""
+        (
+            stations,
+            metros,
+            segments,
+            self._state.is_looped,
+            self.is_being_created,
+            self.selected,
+            self.temp_point,
+            self.temp_point_is_from_end,
+        ) = snapshot
+        self.stations[:] = stations
+        self.metros[:] = metros
+        self._state.segments[:] = segments
+        for metro in self.metros:
+            self._repair_travel_steps(metro)
+
     #########################
     ### private interface ###
     #########################
 
+    def _repair_travel_steps(self, metro: Metro) -> None:
+        """
+        Rebuilding the segments cuts the travel steps of the first metro, they
+        are built again and the metro put back on the same step.
+        """
+        travel_step = metro.travel_step
+        assert travel_step
+        if _is_travel_step_cycle(travel_step):
+            return
+        new_travel_step = build_travel_steps(self._state.segments, self.is_looped)
+        for _ in range(2 * len(self._state.segments)):
+            if (
+                new_travel_step.current is travel_step.current
+                and new_travel_step.is_forward == travel_step.is_forward
+            ):
+                break
+            assert new_travel_step.next
+            new_travel_step = new_travel_step.next
+        else:
+            assert False, "the metro is not on a segment of the path"
+        metro.travel_step = new_travel_step
+
     def _draw_highlighted_stations(self, surface: pygame.surface.Surface) -> None:
         surface_size = surface.get_size()
         selected_surface = pygame.surface.Surface(surface_size, pygame.SRCALPHA)
@@ -228,16 +303,26 @@ def build_travel_steps(segments: Sequence[Segment], is_looped: bool) -> TravelSt
     return travel_step
 
 
+def _is_travel_step_cycle(travel_step: TravelStep) -> bool:
+    step = travel_step.next
+    while step is not None:
+        if step is travel_step:
+            return True
+        step = step.next
+    return False
+
+
 def _get_updated_segments(
     stations: Sequence[Station],
     is_looped: bool,
     color: Color,
+    ids: IdAllocator | None,
 ) -> list[Segment]:
 
     path_segments: Sequence[PathSegment] = _create_path_segments(
-        stations, color, is_looped
+        stations, color, is_looped, ids
     )
-    segments = _add_padding_segments(path_segments, color, is_looped)
+    segments = _add_padding_segments(path_segments, color, is_looped, ids)
     _update_connections(segments)
     return segments
 
@@ -246,10 +331,11 @@ def _create_path_segments(
     stations: Sequence[Station],
     color: Color,
     is_looped: bool,
+    ids: IdAllocator | None,
 ) -> list[PathSegment]:
 
     def create_path_segment(s1: Station, s2: Station) -> PathSegment:
-        return PathSegment(color, s1, s2)
+        return PathSegment(color, s1, s2, ids)
 
     path_segments = [
         create_path_segment(s1, s2) for s1, s2 in itertools.pairwise(stations)
@@ -264,6 +350,7 @@ def _add_padding_segments(
     path_segments: Sequence[PathSegment],
     color: Color,
     is_looped: bool,
+    ids: IdAllocator | None,
 ) -> list[Segment]:
     if not path_segments:
         return []
@@ -278,6 +365,7 @@ def _add_padding_segments(
                 current_segment.stations.end,
                 next_segment.stations.end,
             ),
+            ids,
         )
 
         segments.append(padding_segment)
@@ -296,6 +384,7 @@ def _add_padding_segments(
                     prev_segment.stations.end,
                     next_segment.stations.end,
                 ),
+                ids,
             )
         )
     return segments
@@ -1,7 +1,7 @@
 from dataclasses import dataclass
 from typing import Final
 
-from src.entity.ids import create_new_padding_segment_id
+from src.entity.ids import IdAllocator
 from src.entity.station import Station
 from src.type import Color
 
@@ -18,11 +18,13 @@ class GroupOfThreeStations:
 class PaddingSegment(Segment):
     __slots__ = ("stations",)
 
-    def __init__(self, color: Color, stations: GroupOfThreeStations) -> None:
-        super().__init__(
-            color,
-            create_new_padding_segment_id(),
-        )
+    def __init__(
+        self,
+        color: Color,
+        stations: GroupOfThreeStations,
+        ids: IdAllocator | None = None,
+    ) -> None:
+        super().__init__(color, ids)
         self.stations: Final = stations
 
     def __eq__(self, other: object) -> bool:
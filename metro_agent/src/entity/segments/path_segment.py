@@ -1,7 +1,7 @@
 from dataclasses import dataclass
 from typing import Final
 
-from src.entity.ids import create_new_path_segment_id
+from src.entity.ids import IdAllocator
 from src.entity.station import Station
 from src.type import Color
 
@@ -22,10 +22,11 @@ class PathSegment(Segment):
         color: Color,
         start_station: Station,
         end_station: Station,
+        ids: IdAllocator | None = None,
     ) -> None:
         self.stations: Final = StationPair(start_station, end_station)
 
-        super().__init__(color, create_new_path_segment_id())
+        super().__init__(color, ids)
 
     def __eq__(self, other: object) -> bool:
         return type(other) == PathSegment and other.stations == self.stations
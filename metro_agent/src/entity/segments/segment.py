@@ -7,7 +7,7 @@ from typing import Final
 import pygame
 
 from src.entity.entity import Entity
-from src.entity.ids import EntityId
+from src.entity.ids import IdAllocator
 from src.entity.segments.visual_segment import VisualSegment
 from src.geometry.point import Point
 from src.type import Color
@@ -25,9 +25,9 @@ class Segment(Entity, ABC):
     def __init__(
         self,
         color: Color,
-        id: EntityId,
+        ids: IdAllocator | None = None,
     ) -> None:
-        super().__init__(id)
+        super().__init__(ids)
         self.connections: Final = SegmentConnections()
         self.visual: Final = VisualSegment(color)
 
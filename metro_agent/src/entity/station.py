@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from collections.abc import Hashable
+
 from src.config import station_capacity, station_passengers_per_row, station_size
 from src.geometry.point import Point
 from src.geometry.shape import Shape
@@ -7,7 +9,8 @@ from src.geometry.utils import get_distance
 from src.protocols.passenger_mediator import PassengersMediatorProtocol
 
 from .holder import Holder
-from .ids import create_new_station_id
+from .ids import IdAllocator
+from .passenger import Passenger
 
 
 class Station(Holder):
@@ -19,21 +22,29 @@ class Station(Holder):
         shape: Shape,
         position: Point,
         passengers_mediator: PassengersMediatorProtocol,
+        ids: IdAllocator | None = None,
     ) -> None:
         super().__init__(
             shape=shape,
             capacity=station_capacity,
-            id=create_new_station_id(shape.type),
             passengers_per_row=station_passengers_per_row,
             mediator=passengers_mediator,
+            ids=ids,
         )
         self.position = position
 
     def __eq__(self, other: object) -> bool:
-        return isinstance(other, Station) and self.id == other.id
+        return isinstance(other, Station) and self.has_same_id(other)
 
     def __hash__(self) -> int:
         return hash(self.id)
 
     def get_distance_to(self, other: Station) -> float:
         return get_distance(self.position, other.position)
+
+    def _get_queue_key(self, passenger: Passenger) -> Hashable:
+        """Id of the path the passenger waits for, None if it can't board"""
+        travel_plan = passenger.travel_plan
+        if travel_plan is None or travel_plan.next_path is None:
+            return None
+        return travel_plan.next_path.id
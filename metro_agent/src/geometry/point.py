@@ -1,30 +1,63 @@
 from __future__ import annotations
 
+import itertools
 import math
-from dataclasses import dataclass, field
-from typing import Any
-
-from shortuuid import uuid
+from dataclasses import FrozenInstanceError
+from typing import Any, Final, NoReturn
 
 from src.geometry.types import Degrees
 
 FloatOrInt = (int, float)
 
-
-def create_point_id() -> str:
-    return f"Point-{uuid()}"
+_point_ids = itertools.count()
 
 
-@dataclass(frozen=True, slots=True)
 class Point:
+    """
+    2D vector, also used as a position.
+
+    Points are created in the hottest loops of the game (metro movement,
+    drawing), so they are kept as light as possible: two floats and an id that
+    is only assigned the first time it is requested. Points are hashable and
+    immutable, arithmetic always returns a new one.
+    """
+
+    __slots__ = ("left", "top", "_id")
+
     left: float
     top: float
-    id: str = field(
-        init=False,
-        default_factory=create_point_id,
-        compare=False,
-        repr=False,
-    )
+    _id: int
+
+    def __init__(self, left: float, top: float) -> None:
+        _set_left(self, left)
+        _set_top(self, top)
+
+    def __setattr__(self, name: str, value: Any) -> NoReturn:
+        raise FrozenInstanceError(f"cannot assign to field {name!r}")
+
+    def __delattr__(self, name: str) -> NoReturn:
+        raise FrozenInstanceError(f"cannot delete field {name!r}")
+
+    @property
+    def id(self) -> int:
+        try:
+            return self._id
+        except AttributeError:
+            point_id = next(_point_ids)
+            _set_id(self, point_id)
+            return point_id
+
+    def __repr__(self) -> str:
+        return f"Point(left={self.left!r}, top={self.top!r})"
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not Point:
+            return NotImplemented
+        assert isinstance(other, Point)
+        return self.left == other.left and self.top == other.top
+
+    def __hash__(self) -> int:
+        return hash((self.left, self.top))
 
     def __add__(self, other: Point | float) -> Point:
         if isinstance(other, Point):
@@ -57,25 +90,36 @@ class Point:
     def __rmul__(self, other: float) -> Point:
         return self.__mul__(other)
 
+    def __copy__(self) -> Point:
+        return self
+
     def __deepcopy__(self, memo: Any) -> "Point":
         return Point(self.left, self.top)
 
+    def __reduce__(self) -> tuple[type[Point], tuple[float, float]]:
+        return (Point, (self.left, self.top))
+
     def rotate(self, degrees: Degrees) -> Point:
         """Returns a point result of rotate this around the origin. Note: a point is also a vector from the origin."""
         radians = math.radians(degrees)
-        sin = math.sin(radians)
-        cos = math.cos(radians)
+        return self._rotate(math.sin(radians), math.cos(radians))
+
+    def to_tuple(self) -> tuple[float, float]:
+        return (self.left, self.top)
+
+    def _rotate(self, sin: float, cos: float) -> Point:
         x = self.left
         y = self.top
         try:
             new_left = round(x * cos - y * sin)
             new_top = round(x * sin + y * cos)
         except ValueError as err:
-            raise RuntimeError(
-                f"radians: {radians}, x: {x}, y: {y}, cos: {cos}, sen: {sin}"
-            ) from err
+            raise RuntimeError(f"x: {x}, y: {y}, cos: {cos}, sen: {sin}") from err
 
         return Point(new_left, new_top)
 
-    def to_tuple(self) -> tuple[float, float]:
-        return (self.left, self.top)
+
+# points can't be assigned to, they are built by setting their slots directly
+_set_left: Final = Point.__dict__["left"].__set__
+_set_top: Final = Point.__dict__["top"].__set__
+_set_id: Final = Point.__dict__["_id"].__set__
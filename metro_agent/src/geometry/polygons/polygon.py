@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import math
 from typing import Any, List, Sequence
 
 import pygame
@@ -21,7 +22,7 @@ from src.type import Color
 
 
 class Polygon(Shape):
-    __slots__ = ("points", "degrees")
+    __slots__ = ("points", "degrees", "_rotated_points", "_rotated_points_degrees")
 
     def __init__(
         self, shape_type: ShapeType, color: Color, points: Sequence[Point]
@@ -30,14 +31,17 @@ class Polygon(Shape):
         self.id = f"Polygon-{uuid()}"
         self.points = points
         self.degrees: Degrees = create_degrees(0)
+        self._rotated_points: list[Point] = []
+        self._rotated_points_degrees: Degrees | None = None
 
     @override
     def draw(self, surface: pygame.surface.Surface, position: Point) -> None:
         super()._set_position(position)
-        tuples: List[tuple[float, float]] = []
-        for point in self.points:
-            rotated_point = point.rotate(self.degrees)
-            tuples.append((rotated_point + self.position).to_tuple())
+        left = position.left
+        top = position.top
+        tuples: List[tuple[float, float]] = [
+            (point.left + left, point.top + top) for point in self._get_rotated_points()
+        ]
         pygame.draw.polygon(
             surface, self.color, tuples, width=1 if Config.unfilled_shapes else 0
         )
@@ -56,6 +60,16 @@ class Polygon(Shape):
     def rotate(self, degree_diff: Degrees) -> None:
         self.degrees = create_degrees(self.degrees + degree_diff)
 
+    def _get_rotated_points(self) -> list[Point]:
+        """Points rotated by the current degrees, only recomputed when they change"""
+        if self._rotated_points_degrees != self.degrees:
+            radians = math.radians(self.degrees)
+            sin = math.sin(radians)
+            cos = math.cos(radians)
+            self._rotated_points = [point._rotate(sin, cos) for point in self.points]
+            self._rotated_points_degrees = self.degrees
+        return self._rotated_points
+
     def get_scaled(self, f: float) -> Polygon:
         return Polygon(
             self.type, self.color, [Point(p.left * f, p.top * f) for p in self.points]
@@ -1,17 +1,17 @@
-import numpy as np
+import math
 
 from src.geometry.point import Point
 
 EPS = 1e-9
 
 def get_distance(p1: Point, p2: Point) -> float:
-    result: float = np.sqrt((p1.left - p2.left) ** 2 + (p1.top - p2.top) ** 2)
-    return result
+    return math.hypot(p1.left - p2.left, p1.top - p2.top)
 
 
 def get_direction(p1: Point, p2: Point) -> Point:
-    diff = p2 - p1
-    diff_magnitude = get_distance(p1, p2)
+    diff_left = p2.left - p1.left
+    diff_top = p2.top - p1.top
+    diff_magnitude = math.hypot(diff_left, diff_top)
     if diff_magnitude < EPS:
         return Point(0.0, 0.0)
-    return Point(diff.left / diff_magnitude, diff.top / diff_magnitude)
+    return Point(diff_left / diff_magnitude, diff_top / diff_magnitude)
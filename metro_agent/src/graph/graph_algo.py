@@ -1,63 +1,47 @@
+from collections import deque
 from collections.abc import Sequence
 
 from src.entity import Path, Station
 from src.graph.node import Node
+from src.graph.station_graph import StationGraph
 
 
 def build_station_nodes_dict(
     stations: Sequence[Station], paths: Sequence[Path]
 ) -> dict[Station, Node]:
-    station_nodes: list[Node] = []
-    connections: list[list[Node]] = []
-    station_nodes_dict: dict[Station, Node] = {}
-
-    for station in stations:
-        node = Node(station)
-        station_nodes.append(node)
-        station_nodes_dict[station] = node
-    for path in paths:
-        if path.is_being_created:
-            continue
-        connection: list[Node] = []
-        for station in path.stations:
-            station_nodes_dict[station].paths.add(path)
-            connection.append(station_nodes_dict[station])
-        connections.append(connection)
-
-    while len(station_nodes) > 0:
-        root = station_nodes[0]
-        for connection in connections:
-            for idx in range(len(connection)):
-                node = connection[idx]
-                if node != root:
-                    continue
-                if idx - 1 >= 0:
-                    root.neighbors.add(connection[idx - 1])
-                if idx + 1 <= len(connection) - 1:
-                    root.neighbors.add(connection[idx + 1])
-        station_nodes.remove(root)
-        station_nodes_dict[root.station] = root
-
-    return station_nodes_dict
+    return build_nodes_from_graph(StationGraph(stations, paths))
+
+
+def build_nodes_from_graph(graph: StationGraph) -> dict[Station, Node]:
+    nodes = [Node(station) for station in graph.stations]
+    for idx, node in enumerate(nodes):
+        node.neighbors.update(nodes[next] for next in graph.neighbors(idx))
+        mask = int(graph.station_path_mask[idx])
+        node.paths.update(
+            path for bit, path in enumerate(graph.paths) if mask & (1 << bit)
+        )
+    return {node.station: node for node in nodes}
 
 
 def bfs(start: Node, end: Node) -> list[Node]:
-    # Create a queue and enqueue the start node\
-    queue = [(start, [start])]
+    parents: dict[Node, Node | None] = {start: None}
+    queue = deque([start])
 
-    # While the queue is not empty
     while queue:
-        # Dequeue the first node
-        (node, path) = queue.pop(0)
+        node = queue.popleft()
 
-        # If the node is the end node, return the path
+        # If the node is the end node, rebuild the path following the parents
         if node == end:
+            path = [node]
+            while (parent := parents[path[-1]]) is not None:
+                path.append(parent)
+            path.reverse()
             return path
 
-        # Enqueue the neighbors of the node
         for next in node.neighbors:
-            if next not in path:
-                queue.append((next, path + [next]))
+            if next not in parents:
+                parents[next] = node
+                queue.append(next)
 
     # If no path was found, return an empty list
     return []
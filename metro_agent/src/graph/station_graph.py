@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import itertools
+from collections import deque
+from collections.abc import Sequence
+from typing import Final
+
+import numpy as np
+
+from src.entity import Path, Station
+
+NO_STATION: Final = -1
+MAX_NUM_PATHS: Final = 64
+
+
+class StationGraph:
+    """
+    Compact representation of the metro network.
+
+    Stations are integer indices (their position in `stations`) and the
+    adjacency is stored in CSR form: the neighbors of station `i` are
+    `indices[indptr[i]:indptr[i + 1]]`. Every edge and every station carries a
+    bitmask of the paths it belongs to, where bit `k` stands for `paths[k]`.
+    Paths being created are not part of the graph.
+    """
+
+    __slots__ = (
+        "stations",
+        "paths",
+        "station_index",
+        "indptr",
+        "indices",
+        "edge_path_mask",
+        "station_path_mask",
+        "_indptr_list",
+        "_indices_list",
+        "_station_path_mask_list",
+    )
+
+    def __init__(self, stations: Sequence[Station], paths: Sequence[Path]) -> None:
+        self.stations: Final = list(stations)
+        self.paths: Final = [path for path in paths if not path.is_being_created]
+        assert len(self.paths) <= MAX_NUM_PATHS
+        self.station_index: Final = {
+            station: idx for idx, station in enumerate(self.stations)
+        }
+
+        num_stations = len(self.stations)
+        edge_masks: dict[tuple[int, int], int] = {}
+        station_masks = [0] * num_stations
+        for bit, path in enumerate(self.paths):
+            path_mask = 1 << bit
+            idxs = [self.station_index[station] for station in path.stations]
+            for idx in idxs:
+                station_masks[idx] |= path_mask
+            pairs = list(itertools.pairwise(idxs))
+            if path.is_looped and len(idxs) > 2:
+                pairs.append((idxs[-1], idxs[0]))
+            for a, b in pairs:
+                edge_masks[(a, b)] = edge_masks.get((a, b), 0) | path_mask
+                edge_masks[(b, a)] = edge_masks.get((b, a), 0) | path_mask
+
+        edges = sorted(edge_masks)
+        counts = np.zeros(num_stations + 1, dtype=np.int32)
+        for a, _ in edges:
+            counts[a + 1] += 1
+        self.indptr: Final = np.cumsum(counts, dtype=np.int32)
+        self.indices: Final = np.array([b for _, b in edges], dtype=np.int32)
+        self.edge_path_mask: Final = np.array(
+            [edge_masks[edge] for edge in edges], dtype=np.uint64
+        )
+        self.station_path_mask: Final = np.array(station_masks, dtype=np.uint64)
+
+        # python lists are faster than numpy arrays for scalar access in loops
+        self._indptr_list: Final[list[int]] = self.indptr.tolist()
+        self._indices_list: Final[list[int]] = self.indices.tolist()
+        self._station_path_mask_list: Final = station_masks
+
+    ######################
+    ### public methods ###
+    ######################
+
+    @property
+    def num_stations(self) -> int:
+        return len(self.stations)
+
+    def neighbors(self, idx: int) -> list[int]:
+        return self._indices_list[self._indptr_list[idx] : self._indptr_list[idx + 1]]
+
+    def degree(self, idx: int) -> int:
+        return self._indptr_list[idx + 1] - self._indptr_list[idx]
+
+    def bfs(self, start: int, end: int) -> list[int]:
+        """Shortest path from start to end (both included), or [] if there is none"""
+        parents = [NO_STATION] * self.num_stations
+        parents[start] = start
+        queue = deque([start])
+        while queue:
+            idx = queue.popleft()
+            if idx == end:
+                return self._get_path_from_parents(parents, end)
+            for next in self.neighbors(idx):
+                if parents[next] == NO_STATION:
+                    parents[next] = idx
+                    queue.append(next)
+        return []
+
+    def find_nearest(self, sources: Sequence[int]) -> tuple[list[int], list[int]]:
+        """
+        Multi-source BFS from all the sources at once.
+
+        Returns, for every station, the number of hops to its nearest source and
+        the next station on the way to it (NO_STATION if it is unreachable or it
+        is a source itself). Ties are broken by the order of the sources.
+        """
+        distances = [NO_STATION] * self.num_stations
+        next_hops = [NO_STATION] * self.num_stations
+        queue: deque[int] = deque()
+        for source in sources:
+            if distances[source] == NO_STATION:
+                distances[source] = 0
+                queue.append(source)
+        while queue:
+            idx = queue.popleft()
+            for next in self.neighbors(idx):
+                if distances[next] == NO_STATION:
+                    distances[next] = distances[idx] + 1
+                    next_hops[next] = idx
+                    queue.append(next)
+        return distances, next_hops
+
+    def skip_stations_on_same_path(self, idx_path: list[int]) -> list[int]:
+        """
+        Index-based equivalent of `skip_intermediate.skip_stations_on_same_path`:
+        keeps only the ends of every stretch travelled on the same path.
+        """
+        assert len(idx_path) >= 2
+        if len(idx_path) == 2:
+            return idx_path
+
+        masks = [self._station_path_mask_list[idx] for idx in idx_path]
+        masks.append(0)  # Prevent index out of range
+        kept = [idx_path[0]]
+        i = 0
+        for j in range(1, len(masks)):
+            if not masks[i] & masks[j] and j - 1 > i:
+                kept.append(idx_path[j - 1])
+                i = j - 1
+        return kept
+
+    #######################
+    ### private methods ###
+    #######################
+
+    def _get_path_from_parents(self, parents: list[int], end: int) -> list[int]:
+        idx_path = [end]
+        while parents[idx_path[-1]] != idx_path[-1]:
+            idx_path.append(parents[idx_path[-1]])
+        idx_path.reverse()
+        return idx_path
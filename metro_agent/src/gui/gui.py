@@ -35,16 +35,20 @@ class GUI:
         "clock",
     )
 
-    def init(self, max_num_paths: int) -> None:
-        pygame.font.init()
+    def __init__(self) -> None:
         self.path_to_button: dict[Path, PathButton] = {}
+        self.path_buttons: Sequence[PathButton] = []
+        self.buttons: list[PathButton] = []
+        self.last_pos: Point | None = None
+        self.clock: pygame.time.Clock | None = None
 
+    def init(self, max_num_paths: int) -> None:
+        """Loads the fonts and creates the buttons, only needed for rendering"""
+        pygame.font.init()
         self.font = pygame.font.SysFont("arial", score_font_size)
         self.small_font = pygame.font.SysFont("arial", 18)
-        self.path_buttons: Sequence[PathButton] = get_path_buttons(max_num_paths)
+        self.path_buttons = get_path_buttons(max_num_paths)
         self.buttons = [*self.path_buttons]
-        self.last_pos: Point | None = None
-        self.clock: pygame.time.Clock | None = None
 
     def assign_paths_to_buttons(self, paths: Sequence[Path]) -> None:
         for path_button in self.path_buttons:
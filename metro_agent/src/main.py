@@ -9,6 +9,7 @@ from src.config import Config, screen_color
 from src.engine.engine import Engine
 from src.event.convert import convert_pygame_event
 from src.reactor import UI_Reactor
+from src.replay import UIRecorder
 from src.tools.setup_logging import configure_logger
 
 logger = configure_logger("main")
@@ -25,6 +26,10 @@ def main() -> None:
 
     parser.add_argument("-st", "--stations", type=int, help="Number of stations")
 
+    parser.add_argument(
+        "-r", "--record", help="Save a replay log of the game to this file on exit"
+    )
+
     args = parser.parse_args()
 
     random_seed = args.seed
@@ -53,15 +58,33 @@ def main() -> None:
     clock = pygame.time.Clock()
     pygame.display.set_caption("Python Minimetro")
 
-    engine = Engine()
+    engine = Engine(seed=random_seed)
     engine.set_clock(clock)
-    reactor = UI_Reactor(engine)
-
+    recorder = UIRecorder(engine) if args.record else None
+    reactor = UI_Reactor(engine, recorder)
+
+    try:
+        _run(engine, reactor, recorder, screen, clock)
+    finally:
+        if recorder:
+            recorder.log.save(args.record)
+            print(f"Replay log saved to {args.record}")
+
+
+def _run(
+    engine: Engine,
+    reactor: UI_Reactor,
+    recorder: UIRecorder | None,
+    screen: pygame.surface.Surface,
+    clock: pygame.time.Clock,
+) -> None:
     while True:
         dt_ms = clock.tick(Config.framerate)
         t = time.time()
         logger.info(f"{dt_ms=}")
         logger.info(f"fps: {round(clock.get_fps(), 2)}\n")
+        if recorder:
+            recorder.start_frame(dt_ms, can_checkpoint=reactor.is_idle)
         engine.increment_time(dt_ms)
         screen.fill(screen_color)
         engine.render(screen)
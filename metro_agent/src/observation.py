@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+from collections.abc import Mapping, Sequence
+from typing import TYPE_CHECKING, Final
+
+import numpy as np
+from numpy.typing import NDArray
+
+from src.geometry.type import ShapeType
+
+if TYPE_CHECKING:
+    from src.engine.engine import Engine
+    from src.engine.topology import NetworkTopology
+    from src.entity import Station
+    from src.entity.ids import EntityId
+
+NUM_GLOBAL_FEATURES: Final = 6
+NUM_PATH_FEATURES: Final = 5
+
+
+class ObservationBuilder:
+    """
+    Observation of `MiniMetroRLEnv`, written in a preallocated buffer.
+
+    The buffer is split in fixed blocks, in this order: station queue ratios,
+    stations on a path, station shapes (one block per shape type), destination
+    shape distributions (one block per shape type), then existence, start and
+    end station rank, length and load of the paths, and the global features.
+
+    Station blocks are computed with NumPy from the station occupations and
+    destination counts. What only depends on the network (stations on a path,
+    path stations) is kept until the topology version changes.
+    """
+
+    __slots__ = (
+        "buffer",
+        "_max_stations",
+        "_max_paths",
+        "_shape_types",
+        "_occupancy_cap",
+        "_station_capacity",
+        "_spawn_interval_ms",
+        "_queues",
+        "_on_path",
+        "_self_shapes",
+        "_dest_shapes",
+        "_path_features",
+        "_path_loads",
+        "_globals",
+        "_topology",
+        "_topology_version",
+        "_num_ranked",
+        "_num_paths",
+        "_load_paths",
+        "_load_stations",
+        "_load_denominators",
+        "_unobserved_stations",
+        "_shape_idxs",
+        "_capacities",
+    )
+
+    def __init__(
+        self,
+        max_stations: int,
+        max_paths: int,
+        shape_types: Sequence[ShapeType],
+        occupancy_cap: float,
+        station_capacity: int,
+        spawn_interval_ms: int,
+    ) -> None:
+        self._max_stations: Final = max_stations
+        self._max_paths: Final = max_paths
+        self._shape_types: Final = tuple(shape_types)
+        self._shape_idxs: Final = {
+            shape_type: idx for idx, shape_type in enumerate(shape_types)
+        }
+        self._occupancy_cap: Final = occupancy_cap
+        self._station_capacity: Final = station_capacity
+        self._spawn_interval_ms: Final = spawn_interval_ms
+
+        num_shapes = len(self._shape_types)
+        size = (
+            (2 + 2 * num_shapes) * max_stations
+            + NUM_PATH_FEATURES * max_paths
+            + NUM_GLOBAL_FEATURES
+        )
+        self.buffer: Final = np.zeros(size, dtype=np.float32)
+        blocks = iter(
+            np.split(
+                self.buffer,
+                np.cumsum(
+                    [max_stations] * 2
+                    + [num_shapes * max_stations] * 2
+                    + [NUM_PATH_FEATURES * max_paths]
+                ),
+            )
+        )
+        self._queues: Final = next(blocks)
+        self._on_path: Final = next(blocks)
+        self._self_shapes: Final = next(blocks).reshape(num_shapes, max_stations)
+        self._dest_shapes: Final = next(blocks).reshape(num_shapes, max_stations)
+        self._path_features: Final = next(blocks).reshape(NUM_PATH_FEATURES, max_paths)
+        self._path_loads: Final = self._path_features[4]
+        self._globals: Final = next(blocks)
+
+        self._topology: NetworkTopology | None = None
+        self._topology_version = -1
+        self._num_ranked = -1
+        self._num_paths = 0
+        # station and path slot of every path station, to sum the path loads
+        self._load_paths: NDArray[np.intp] = np.zeros(0, dtype=np.intp)
+        self._load_stations: NDArray[np.intp] = np.zeros(0, dtype=np.intp)
+        self._load_denominators: NDArray[np.float64] = np.ones(max_paths)
+        # path stations beyond max_stations, their loads come after the others
+        self._unobserved_stations: list[Station] = []
+        self._capacities: NDArray[np.float64] = np.zeros(0)
+
+    ######################
+    ### public methods ###
+    ######################
+
+    def build(
+        self,
+        engine: Engine,
+        stations: Sequence[Station],
+        station_ranks: Mapping[EntityId, int],
+    ) -> NDArray[np.float32]:
+        """
+        Fills the buffer and returns it, it is overwritten by the next call.
+        `stations` are the observed stations in order and `station_ranks` the
+        order in which stations were first seen, by station id.
+        """
+        components = engine._components  # pyright: ignore [reportPrivateUsage]
+        num_stations = len(stations)
+        occupations = np.fromiter(
+            (station.occupation for station in stations), np.float64, num_stations
+        )
+        if self._is_outdated(components.topology, len(station_ranks)):
+            self._update_network_blocks(engine, stations, station_ranks)
+        capacities = self._capacities
+
+        queues = np.divide(
+            occupations,
+            capacities,
+            out=np.zeros(num_stations),
+            where=capacities > 0,
+        )
+        np.minimum(queues, self._occupancy_cap, out=queues)
+        self._queues[:num_stations] = queues
+        self._queues[num_stations:] = 0
+
+        self._fill_destination_blocks(engine, stations, occupations)
+
+        # path loads, from the occupations of their stations
+        station_loads = occupations
+        if self._unobserved_stations:
+            unobserved = self._unobserved_stations
+            station_loads = np.concatenate(
+                (
+                    occupations,
+                    np.fromiter(
+                        (station.occupation for station in unobserved),
+                        np.float64,
+                        len(unobserved),
+                    ),
+                )
+            )
+        loads = np.bincount(
+            self._load_paths,
+            weights=station_loads[self._load_stations],
+            minlength=self._max_paths,
+        )
+        self._path_loads[:] = np.minimum(loads / self._load_denominators, 1.0)
+
+        # global features
+        ms_until_next_spawn = float(
+            engine._passenger_spawner.ms_until_next_spawn  # pyright: ignore [reportPrivateUsage]
+        )
+        spawn_ratio = ms_until_next_spawn / max(1.0, self._spawn_interval_ms)
+        spawn_progress = 1.0 - min(max(spawn_ratio, 0.0), 1.0)
+        max_queue = max(0.0, occupations.max(initial=0.0))
+        on_path = self._on_path[:num_stations]
+        self._globals[:] = (
+            self._num_paths / max(1, self._max_paths),
+            max(0, self._max_paths - self._num_paths) / max(1, self._max_paths),
+            spawn_progress,
+            min(max_queue / max(1.0, self._station_capacity), self._occupancy_cap),
+            float(queues.sum()) / num_stations if num_stations else 0.0,
+            float(np.sum(1.0 - on_path.astype(np.float64)))
+            / max(1.0, float(self._max_stations)),
+        )
+        return self.buffer
+
+    def _is_outdated(self, topology: NetworkTopology, num_ranked: int) -> bool:
+        return (
+            topology is not self._topology
+            or topology.version != self._topology_version
+            or num_ranked != self._num_ranked
+        )
+
+    def _update_network_blocks(
+        self,
+        engine: Engine,
+        stations: Sequence[Station],
+        station_ranks: Mapping[EntityId, int],
+    ) -> None:
+        components = engine._components  # pyright: ignore [reportPrivateUsage]
+        self._topology = components.topology
+        self._topology_version = components.topology.version
+        self._num_ranked = len(station_ranks)
+
+        # the observed stations only change with the ranks
+        self._capacities = np.array(
+            [station.capacity for station in stations], dtype=np.float64
+        )
+        self._self_shapes[:] = 0
+        for column, station in enumerate(stations):
+            if (idx := self._shape_idxs.get(station.shape.type)) is not None:
+                self._self_shapes[idx, column] = 1.0
+
+        path_manager = engine.path_manager
+        self._on_path[:] = 0
+        for idx, station in enumerate(stations):
+            self._on_path[idx] = path_manager.is_station_connected(station)
+
+        paths = sorted(components.paths, key=lambda path: path.path_order)
+        self._num_paths = len(paths)
+        station_idxs = {station: idx for idx, station in enumerate(stations)}
+        max_rank = self._max_stations - 1
+        features = np.zeros((NUM_PATH_FEATURES - 1, self._max_paths))
+        load_paths: list[int] = []
+        load_stations: list[int] = []
+        self._unobserved_stations = []
+        self._load_denominators[:] = 1.0
+        for slot, path in enumerate(paths[: self._max_paths]):
+            path_stations = path.stations
+            if not path_stations:
+                continue
+            ranks = [
+                station_ranks.get(path_stations[0].id),
+                station_ranks.get(path_stations[-1].id),
+            ]
+            features[:, slot] = (
+                1.0,
+                *(
+                    (
+                        min(rank, max_rank) / float(max_rank)
+                        if rank is not None and max_rank > 0
+                        else 0.0
+                    )
+                    for rank in ranks
+                ),
+                min(len(path_stations) / max(1.0, float(self._max_stations)), 1.0),
+            )
+            for station in path_stations:
+                idx = station_idxs.get(station)
+                if idx is None:
+                    idx = len(stations) + len(self._unobserved_stations)
+                    self._unobserved_stations.append(station)
+                load_paths.append(slot)
+                load_stations.append(idx)
+            self._load_denominators[slot] = max(
+                1.0, float(len(path_stations) * self._station_capacity)
+            )
+        self._path_features[:-1] = features
+        self._load_paths = np.array(load_paths, dtype=np.intp)
+        self._load_stations = np.array(load_stations, dtype=np.intp)
+
+    def _fill_destination_blocks(
+        self,
+        engine: Engine,
+        stations: Sequence[Station],
+        occupations: NDArray[np.float64],
+    ) -> None:
+        passengers = (
+            engine._components.passengers
+        )  # pyright: ignore [reportPrivateUsage]
+        shape_idxs = self._shape_idxs
+        counts = np.zeros((len(self._shape_types), self._max_stations))
+        # maintained by the engine, no need to walk the station passengers
+        for column, station in enumerate(stations):
+            for shape_type, count in passengers.get_destination_counts(station).items():
+                if count and (idx := shape_idxs.get(shape_type)) is not None:
+                    counts[idx, column] = count
+        num_stations = len(stations)
+        # stations without passengers are left out of the division
+        self._dest_shapes[:] = 0
+        np.divide(
+            counts[:, :num_stations],
+            occupations,
+            out=self._dest_shapes[:, :num_stations],
+            where=occupations > 0,
+            casting="same_kind",
+        )
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Iterator, Mapping
+from typing import TYPE_CHECKING, Final
+
+from src.entity.passenger import Passenger
+from src.geometry.type import ShapeType
+
+if TYPE_CHECKING:
+    from src.entity.holder import Holder
+
+# holders and destination counts, global and by holder
+RegistryState = tuple[
+    "dict[Passenger, Holder]",
+    Counter[ShapeType],
+    "dict[Holder, Counter[ShapeType]]",
+]
+
+
+class PassengerRegistry:
+    """
+    Live passengers of a game, kept up to date by the passengers mediator.
+
+    Besides the holder of every passenger it maintains the number of
+    passengers by destination shape, globally and per holder, so aggregates
+    don't need to walk every station and metro.
+    """
+
+    __slots__ = (
+        "_holders",
+        "_destination_counts",
+        "_destination_counts_by_holder",
+    )
+
+    def __init__(self) -> None:
+        # dicts keep insertion order, so iteration follows the spawning order
+        self._holders: Final[dict[Passenger, Holder]] = {}
+        self._destination_counts: Final[Counter[ShapeType]] = Counter()
+        self._destination_counts_by_holder: Final[dict[Holder, Counter[ShapeType]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._holders)
+
+    def __iter__(self) -> Iterator[Passenger]:
+        return iter(self._holders)
+
+    def __contains__(self, passenger: object) -> bool:
+        return passenger in self._holders
+
+    ######################
+    ### public methods ###
+    ######################
+
+    def add(self, passenger: Passenger, holder: Holder) -> None:
+        assert passenger not in self._holders
+        self._holders[passenger] = holder
+        destination = passenger.destination_shape.type
+        self._destination_counts[destination] += 1
+        self._get_holder_counts(holder)[destination] += 1
+
+    def move(self, passenger: Passenger, dest: Holder) -> None:
+        source = self._holders[passenger]
+        if source is dest:
+            return
+        self._holders[passenger] = dest
+        destination = passenger.destination_shape.type
+        self._destination_counts_by_holder[source][destination] -= 1
+        self._get_holder_counts(dest)[destination] += 1
+
+    def remove(self, passenger: Passenger) -> None:
+        holder = self._holders.pop(passenger)
+        destination = passenger.destination_shape.type
+        self._destination_counts[destination] -= 1
+        self._destination_counts_by_holder[holder][destination] -= 1
+
+    def clear(self) -> None:
+        self._holders.clear()
+        self._destination_counts.clear()
+        self._destination_counts_by_holder.clear()
+
+    def snapshot(self) -> RegistryState:
+        return (
+            dict(self._holders),
+            self._destination_counts.copy(),
+            {
+                holder: counts.copy()
+                for holder, counts in self._destination_counts_by_holder.items()
+            },
+        )
+
+    def restore(self, state: RegistryState) -> None:
+        """The state is copied, so it can be restored again"""
+        holders, destination_counts, counts_by_holder = state
+        self._holders.clear()
+        self._holders.update(holders)
+        self._destination_counts.clear()
+        self._destination_counts.update(destination_counts)
+        self._destination_counts_by_holder.clear()
+        self._destination_counts_by_holder.update(
+            (holder, counts.copy()) for holder, counts in counts_by_holder.items()
+        )
+
+    def get_holder(self, passenger: Passenger) -> Holder | None:
+        return self._holders.get(passenger)
+
+    def count_with_destination(self, shape_type: ShapeType) -> int:
+        return self._destination_counts[shape_type]
+
+    def get_destination_counts(self, holder: Holder) -> Mapping[ShapeType, int]:
+        """Number of passengers in the holder for each destination shape"""
+        return self._destination_counts_by_holder.get(holder, _NO_COUNTS)
+
+    #######################
+    ### private methods ###
+    #######################
+
+    def _get_holder_counts(self, holder: Holder) -> Counter[ShapeType]:
+        counts = self._destination_counts_by_holder.get(holder)
+        if counts is None:
+            counts = self._destination_counts_by_holder[holder] = Counter()
+        return counts
+
+
+_NO_COUNTS: Final[Mapping[ShapeType, int]] = Counter()
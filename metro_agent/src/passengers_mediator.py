@@ -1,16 +1,22 @@
 from typing import Final
 
+from src.config import Config
 from src.entity.holder import Holder
 from src.entity.passenger import Passenger
 from src.entity.station import Station
 from src.exceptions import GameException
+from src.passenger_registry import PassengerRegistry, RegistryState
+
+# registered holders and passengers
+MediatorState = tuple[tuple[Holder, ...], RegistryState]
 
 
 class PassengersMediator:
-    __slots__ = ("_holders",)
+    __slots__ = ("_holders", "passengers")
 
     def __init__(self) -> None:
         self._holders: Final[list[Holder]] = []
+        self.passengers: Final = PassengerRegistry()
 
     ######################
     ### public methods ###
@@ -19,16 +25,43 @@ class PassengersMediator:
     def register(self, holder: Holder) -> None:
         self._holders.append(holder)
 
+    def reset(self) -> None:
+        """Forgets every registered holder and passenger"""
+        self._holders.clear()
+        self.passengers.clear()
+
+    def snapshot(self) -> MediatorState:
+        return tuple(self._holders), self.passengers.snapshot()
+
+    def restore(self, state: MediatorState) -> None:
+        holders, passengers = state
+        self._holders[:] = holders
+        self.passengers.restore(passengers)
+
     def on_new_passenger_added(self, passenger: Passenger) -> None:
-        if self._any_holder_has(passenger):
+        if passenger in self.passengers or (
+            Config.debug_passengers_mediator and self._any_holder_has(passenger)
+        ):
             raise GameException(
                 "Passengers can be in more than one Holder at the same time"
             )
 
+    def on_passenger_entered(self, holder: Holder, passenger: Passenger) -> None:
+        if passenger in self.passengers:
+            self.passengers.move(passenger, holder)
+        else:
+            self.passengers.add(passenger, holder)
+
     def on_passenger_exit(self, source: Holder, passenger: Passenger) -> None:
         if isinstance(source, Station):
             passenger.last_station = source
 
+    def on_passenger_arrived(self, holder: Holder, passenger: Passenger) -> None:
+        self.passengers.remove(passenger)
+
+    def get_holder(self, passenger: Passenger) -> Holder | None:
+        return self.passengers.get_holder(passenger)
+
     #######################
     ### private methods ###
     #######################
@@ -6,12 +6,28 @@ from src.entity.passenger import Passenger
 
 if TYPE_CHECKING:
     from src.entity.holder import Holder
+    from src.passenger_registry import PassengerRegistry
+    from src.passengers_mediator import MediatorState
 
 
 class PassengersMediatorProtocol(Protocol):
+    @property
+    def passengers(self) -> PassengerRegistry: ...
 
     def register(self, holder: Holder) -> None: ...
 
+    def reset(self) -> None: ...
+
+    def snapshot(self) -> MediatorState: ...
+
+    def restore(self, state: MediatorState) -> None: ...
+
     def on_new_passenger_added(self, passenger: Passenger) -> None: ...
 
+    def on_passenger_entered(self, holder: Holder, passenger: Passenger) -> None: ...
+
     def on_passenger_exit(self, source: Holder, passenger: Passenger) -> None: ...
+
+    def on_passenger_arrived(self, holder: Holder, passenger: Passenger) -> None: ...
+
+    def get_holder(self, passenger: Passenger) -> Holder | None: ...
@@ -6,13 +6,25 @@ from typing import TYPE_CHECKING, Protocol
 if TYPE_CHECKING:
     from src.entity import Path, Station
     from src.graph.node import Node
+    from src.travel_plan import Route
+
+# cursor of a travel plan: next path, next station and its index
+TravelPlanState = tuple["Path | None", "Station | None", int]
 
 
 class TravelPlanProtocol(Protocol):
+    route: Route | None
     next_path: Path | None
     next_station: Station | None
-    node_path: Sequence[Node]
+    next_station_idx: int
+
+    @property
+    def node_path(self) -> Sequence[Node]: ...
 
     def get_next_station(self) -> "Station | None": ...
 
     def increment_next_station(self) -> None: ...
+
+    def snapshot(self) -> TravelPlanState: ...
+
+    def restore(self, state: TravelPlanState) -> None: ...
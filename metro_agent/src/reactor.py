@@ -1,3 +1,7 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
 import pygame
 
 from src.config import Config
@@ -13,6 +17,9 @@ from src.geometry.point import Point
 from src.gui.button import Button
 from src.gui.path_button import PathButton
 
+if TYPE_CHECKING:
+    from src.replay import UIRecorder
+
 
 class UI_Reactor:
     __slots__ = (
@@ -22,17 +29,36 @@ class UI_Reactor:
         "_last_clicked",
         "_index_clicked",
         "wrapper_creating_or_expanding",
+        "_recorder",
     )
 
-    def __init__(self, engine: Engine) -> None:
+    def __init__(
+        self,
+        engine: Engine,
+        recorder: UIRecorder | None = None,
+        console: Console | None = None,
+    ) -> None:
         self._engine = engine
-        self._console = Console()
+        self._recorder = recorder
+        self._console = console or Console()
         self.is_mouse_down: bool = False
         self._last_clicked: Station | None = None
         self._index_clicked = 0
         self.wrapper_creating_or_expanding: WrapperCreatingOrExpanding | None = None
 
+    @property
+    def is_idle(self) -> bool:
+        """No click or path edition in progress, the game can be saved"""
+        return (
+            not self.is_mouse_down
+            and self.wrapper_creating_or_expanding is None
+            and self._last_clicked is None
+            and not self._engine.path_manager.editing_intermediate_stations
+        )
+
     def react(self, event: Event | None) -> None:
+        if self._recorder and event:
+            self._recorder.record_event(event)
         if isinstance(event, MouseEvent):
             self._on_mouse_event(event)
         elif isinstance(event, KeyboardEvent):
@@ -41,6 +67,8 @@ class UI_Reactor:
 
     def _try_process_console_commands(self) -> None:
         cmd = self._console.try_get_command()
+        if self._recorder and cmd:
+            self._recorder.record_console_command(cmd)
         if cmd == "resume":
             if self._engine.is_paused:
                 self._engine.toggle_pause()
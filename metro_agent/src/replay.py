@@ -0,0 +1,381 @@
+"""
+Replay logs: the inputs of an episode plus periodic checkpoints of the game,
+enough to play the episode again without the agent or the player.
+
+For `MiniMetroRLEnv` a step is an action. For human play (`UI_Reactor`) a
+step is a frame: its duration followed by the input events handled after it.
+Replayers run the steps headlessly, as fast as the simulation goes, and jump
+to any step by restoring the nearest checkpoint before it.
+"""
+
+from __future__ import annotations
+
+import bisect
+import collections
+import json
+import os
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Any, ClassVar, Final
+
+import numpy as np
+import pygame
+
+from src.config import Config
+from src.console import Console
+from src.engine.engine import Engine
+from src.engine.serialization import Arrays, pack_arrays, unpack_arrays
+from src.event.event import Event
+from src.event.keyboard import KeyboardEvent
+from src.event.mouse import MouseEvent
+from src.event.type import KeyboardEventType, MouseEventType
+from src.exceptions import GameException
+from src.geometry.point import Point
+from src.reactor import UI_Reactor
+
+if TYPE_CHECKING:
+    from src.rl_env import MiniMetroRLEnv
+
+LOG_VERSION: Final = 1
+_MAGIC: Final = b"METROLOG"
+
+# frame index, kind, position and key of a recorded input
+ReplayEvent = tuple[int, int, float, float, int]
+_EVENT_TYPES: Final = (
+    MouseEventType.MOUSE_DOWN,
+    MouseEventType.MOUSE_UP,
+    MouseEventType.MOUSE_MOTION,
+    KeyboardEventType.KEY_DOWN,
+    KeyboardEventType.KEY_UP,
+)
+# commands typed in the debugging console, recorded after the input events
+_CONSOLE_KIND: Final = len(_EVENT_TYPES)
+_CONSOLE_COMMANDS: Final = ("resume",)
+# the recorded game quits on escape, the replay does not
+_EXIT_KEY: Final = pygame.K_ESCAPE
+
+
+class ReplayLog(ABC):
+    """Inputs of an episode, step by step, and checkpoints by step"""
+
+    __slots__ = ("meta", "checkpoints")
+
+    kind: ClassVar[str]
+
+    def __init__(self, meta: dict[str, Any]) -> None:
+        # how to create the env or the engine again, must be JSON serializable
+        self.meta: Final = meta
+        self.checkpoints: Final[dict[int, bytes]] = {}
+
+    @property
+    @abstractmethod
+    def num_steps(self) -> int: ...
+
+    def add_checkpoint(self, step: int, state: bytes) -> None:
+        self.checkpoints[step] = state
+
+    def to_bytes(self) -> bytes:
+        steps = sorted(self.checkpoints)
+        states = [self.checkpoints[step] for step in steps]
+        return pack_arrays(
+            _MAGIC,
+            LOG_VERSION,
+            {
+                "meta": _json_array({"kind": self.kind, **self.meta}),
+                "checkpoint_steps": np.array(steps, dtype=np.int64),
+                "checkpoint_sizes": np.array([len(s) for s in states], dtype=np.int64),
+                "checkpoint_data": np.frombuffer(b"".join(states), dtype=np.uint8),
+                **self._encode_steps(),
+            },
+        )
+
+    @staticmethod
+    def from_bytes(data: bytes) -> ReplayLog:
+        version, arrays = unpack_arrays(_MAGIC, data)
+        if version != LOG_VERSION:
+            raise GameException(f"Unsupported replay log version {version}")
+        meta = json.loads(arrays["meta"].tobytes())
+        kind = meta.pop("kind")
+        log_class = next(
+            (cls for cls in (EnvReplayLog, UIReplayLog) if cls.kind == kind), None
+        )
+        if log_class is None:
+            raise GameException(f"Unknown replay log kind {kind}")
+        log = log_class(meta)
+        log._decode_steps(arrays)
+        states = arrays["checkpoint_data"].tobytes()
+        ends = np.cumsum(arrays["checkpoint_sizes"]).tolist()
+        for step, size, end in zip(
+            arrays["checkpoint_steps"].tolist(),
+            arrays["checkpoint_sizes"].tolist(),
+            ends,
+        ):
+            log.checkpoints[step] = states[end - size : end]
+        return log
+
+    def save(self, path: str | os.PathLike[str]) -> None:
+        with open(path, "wb") as file:
+            file.write(self.to_bytes())
+
+    @staticmethod
+    def load(path: str | os.PathLike[str]) -> ReplayLog:
+        with open(path, "rb") as file:
+            return ReplayLog.from_bytes(file.read())
+
+    @abstractmethod
+    def _encode_steps(self) -> Arrays: ...
+
+    @abstractmethod
+    def _decode_steps(self, arrays: Arrays) -> None: ...
+
+
+class EnvReplayLog(ReplayLog):
+    """Actions taken in a `MiniMetroRLEnv` episode, recorded by the env itself"""
+
+    __slots__ = ("actions",)
+    kind = "env"
+
+    def __init__(self, meta: dict[str, Any]) -> None:
+        super().__init__(meta)
+        self.actions: Final[list[tuple[int, ...]]] = []
+
+    @property
+    def num_steps(self) -> int:
+        return len(self.actions)
+
+    def _encode_steps(self) -> Arrays:
+        return {
+            "actions": np.array(self.actions, dtype=np.int32).reshape(
+                len(self.actions), -1
+            )
+        }
+
+    def _decode_steps(self, arrays: Arrays) -> None:
+        self.actions.extend(tuple(action) for action in arrays["actions"].tolist())
+
+
+class UIReplayLog(ReplayLog):
+    """Frames of human play, recorded by `UIRecorder`"""
+
+    __slots__ = ("frames_ms", "events")
+    kind = "ui"
+
+    def __init__(self, meta: dict[str, Any]) -> None:
+        super().__init__(meta)
+        self.frames_ms: Final[list[int]] = []
+        self.events: Final[list[ReplayEvent]] = []
+
+    @property
+    def num_steps(self) -> int:
+        return len(self.frames_ms)
+
+    def _encode_steps(self) -> Arrays:
+        events = self.events
+        return {
+            "frames_ms": np.array(self.frames_ms, dtype=np.int32),
+            "event_frame": np.array([e[0] for e in events], dtype=np.int32),
+            "event_kind": np.array([e[1] for e in events], dtype=np.int8),
+            "event_xy": np.array([e[2:4] for e in events], dtype=np.float64).reshape(
+                -1, 2
+            ),
+            "event_key": np.array([e[4] for e in events], dtype=np.int32),
+        }
+
+    def _decode_steps(self, arrays: Arrays) -> None:
+        self.frames_ms.extend(arrays["frames_ms"].tolist())
+        self.events.extend(
+            (frame, kind, left, top, key)
+            for frame, kind, (left, top), key in zip(
+                arrays["event_frame"].tolist(),
+                arrays["event_kind"].tolist(),
+                arrays["event_xy"].tolist(),
+                arrays["event_key"].tolist(),
+            )
+        )
+
+
+class UIRecorder:
+    """
+    Records human play: the main loop calls `start_frame` before advancing the
+    engine, and the reactor the input events it handles.
+    """
+
+    __slots__ = ("log", "_engine", "_checkpoint_every")
+
+    def __init__(self, engine: Engine, checkpoint_every: int = 600) -> None:
+        self.log: Final = UIReplayLog({"num_stations": Config.num_stations})
+        self._engine: Final = engine
+        self._checkpoint_every: Final = checkpoint_every
+        self.log.add_checkpoint(0, engine.serialize())
+
+    def start_frame(self, dt_ms: int, can_checkpoint: bool) -> None:
+        """`can_checkpoint` must be False while a path is being drawn"""
+        frame = len(self.log.frames_ms)
+        if frame and frame % self._checkpoint_every == 0 and can_checkpoint:
+            self.log.add_checkpoint(frame, self._engine.serialize())
+        self.log.frames_ms.append(dt_ms)
+
+    def record_event(self, event: Event) -> None:
+        frame = len(self.log.frames_ms)
+        kind = _EVENT_TYPES.index(event.event_type)
+        if isinstance(event, MouseEvent):
+            position = event.position
+            self.log.events.append((frame, kind, position.left, position.top, 0))
+        elif isinstance(event, KeyboardEvent):
+            self.log.events.append((frame, kind, 0, 0, event.key))
+
+    def record_console_command(self, command: str) -> None:
+        self.log.events.append(
+            (
+                len(self.log.frames_ms),
+                _CONSOLE_KIND,
+                0,
+                0,
+                _CONSOLE_COMMANDS.index(command),
+            )
+        )
+
+
+class Replayer(ABC):
+    """Plays a log again, `seek` jumps to a step through the checkpoints"""
+
+    __slots__ = ("_log", "_step", "_checkpoint_steps")
+
+    def __init__(self, log: ReplayLog) -> None:
+        if 0 not in log.checkpoints:
+            raise GameException("The replay log has no initial state")
+        self._log: Final = log
+        self._step = 0
+        self._checkpoint_steps: Final = sorted(log.checkpoints)
+
+    @property
+    def step(self) -> int:
+        """Number of steps played"""
+        return self._step
+
+    @property
+    def num_steps(self) -> int:
+        return self._log.num_steps
+
+    def seek(self, step: int) -> None:
+        assert 0 <= step <= self.num_steps
+        idx = bisect.bisect_right(self._checkpoint_steps, step) - 1
+        checkpoint = self._checkpoint_steps[idx]
+        # going on is cheaper than restoring when no checkpoint is skipped
+        if not checkpoint <= self._step <= step:
+            self._restore(self._log.checkpoints[checkpoint])
+            self._step = checkpoint
+        while self._step < step:
+            self.advance()
+
+    def run(self) -> None:
+        """Plays the remaining steps"""
+        self.seek(self.num_steps)
+
+    def advance(self) -> Any:
+        """Plays the next step"""
+        assert self._step < self.num_steps
+        result = self._play_step(self._step)
+        self._step += 1
+        return result
+
+    @abstractmethod
+    def _restore(self, state: bytes) -> None: ...
+
+    @abstractmethod
+    def _play_step(self, step: int) -> Any: ...
+
+
+class EnvReplayer(Replayer):
+    """`advance` returns what `MiniMetroRLEnv.step` returned when recording"""
+
+    __slots__ = ("env",)
+
+    def __init__(self, log: EnvReplayLog) -> None:
+        from src.rl_env import MiniMetroRLEnv
+
+        super().__init__(log)
+        Config.num_stations = log.meta["num_stations"]
+        self.env: Final[MiniMetroRLEnv] = MiniMetroRLEnv(**log.meta["env_params"])
+        self.env.reset()
+        self._restore(log.checkpoints[0])
+
+    def _restore(self, state: bytes) -> None:
+        self.env.deserialize(state)
+
+    def _play_step(self, step: int) -> Any:
+        assert isinstance(self._log, EnvReplayLog)
+        return self.env.step(np.array(self._log.actions[step]))
+
+
+class UIReplayer(Replayer):
+    __slots__ = ("engine", "_reactor", "_console", "_screen", "_event_idxs")
+
+    def __init__(self, log: UIReplayLog) -> None:
+        super().__init__(log)
+        Config.num_stations = log.meta["num_stations"]
+        # not headless, path buttons are clicked to remove paths
+        self.engine: Final = Engine()
+        self._console: Final = _ReplayConsole()
+        self._reactor = UI_Reactor(self.engine, console=self._console)
+        # hit tests use where the entities were drawn last
+        self._screen: Final = pygame.Surface(
+            (Config.screen_width, Config.screen_height)
+        )
+        # first event of every frame, and the end of the events
+        frames = [event[0] for event in log.events]
+        self._event_idxs: Final = [
+            bisect.bisect_left(frames, frame) for frame in range(log.num_steps + 2)
+        ]
+        self._restore(log.checkpoints[0])
+
+    def _restore(self, state: bytes) -> None:
+        self.engine.deserialize(state)
+        self._reactor = UI_Reactor(self.engine, console=self._console)
+
+    def _play_step(self, step: int) -> None:
+        assert isinstance(self._log, UIReplayLog)
+        if step == 0:
+            # inputs before the first frame
+            self._react(self._event_idxs[0], self._event_idxs[1])
+        self.engine.increment_time(self._log.frames_ms[step])
+        self._react(self._event_idxs[step + 1], self._event_idxs[step + 2])
+
+    def _react(self, start: int, end: int) -> None:
+        assert isinstance(self._log, UIReplayLog)
+        if start < end:
+            self.engine.render(self._screen)
+        for _, kind, left, top, key in self._log.events[start:end]:
+            if kind == _CONSOLE_KIND:
+                self._console.commands.append(_CONSOLE_COMMANDS[key])
+                self._reactor.react(None)
+                continue
+            event_type = _EVENT_TYPES[kind]
+            if isinstance(event_type, MouseEventType):
+                self._reactor.react(MouseEvent(event_type, Point(left, top)))
+            elif key != _EXIT_KEY:
+                self._reactor.react(KeyboardEvent(event_type, key))
+
+
+def replay(log: ReplayLog) -> Replayer:
+    if isinstance(log, EnvReplayLog):
+        return EnvReplayer(log)
+    assert isinstance(log, UIReplayLog)
+    return UIReplayer(log)
+
+
+class _ReplayConsole(Console):
+    """Gives back the recorded commands instead of opening a console"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.commands: Final[collections.deque[str]] = collections.deque()
+
+    def launch_console(self, engine: Engine) -> None:
+        pass
+
+    def try_get_command(self) -> str | None:
+        return self.commands.popleft() if self.commands else None
+
+
+def _json_array(value: Any) -> np.ndarray:
+    return np.frombuffer(json.dumps(value).encode(), dtype=np.uint8)
@@ -1,7 +1,12 @@
-import random
+import json
+
 import numpy as np
 
 from src.engine.engine import Engine
+from src.engine.serialization import pack_arrays, unpack_arrays
+from src.exceptions import GameException
+from src.observation import ObservationBuilder
+from src.replay import EnvReplayLog
 from src.config import Config, max_num_paths, station_capacity, station_shape_type_list
 
 import gymnasium as gym
@@ -9,6 +14,18 @@ from gymnasium import spaces
 
 BaseEnv = gym.Env
 
+# episode state besides the engine, saved by MiniMetroRLEnv.snapshot
+_SNAPSHOT_SCALARS = (
+    "t", "elapsed_ms", "invalid_streak", "_last_action",
+    "_edit_cooldown_left_ms", "_remove_cooldown_left_ms",
+    "last_total_waiting", "last_score", "last_max_queue",
+)
+_SNAPSHOT_CONTAINERS = (
+    "_path_birth_ms", "_station_rank", "_station_ids", "_timeout_ms_by_station_id",
+)
+_SAVE_MAGIC = b"METROENV"
+_SAVE_VERSION = 1
+
 class MiniMetroRLEnv(BaseEnv):
     metadata = {'render_modes': []}
 
@@ -37,8 +54,19 @@ class MiniMetroRLEnv(BaseEnv):
 
                  invalid_action_penalty = 0.5, # prevent useless action
                  terminal_fail_penalty = 30.0,
+                 fast_forward = True, # merge engine steps between events, see Engine.advance
+
+                 # replay, see src.replay
+                 record_replay = False,
+                 replay_checkpoint_every = 500, # steps
                  ):
+        # a replay creates the env again with the same parameters
+        self._params = {
+            name: value for name, value in locals().items()
+            if name not in ("self", "record_replay", "replay_checkpoint_every")
+        }
         self.dt_ms = dt_ms # engine dt ms
+        self.fast_forward = fast_forward
         self.decision_interval_ms = decision_interval_ms
         self.warning_ratio = warning_ratio
 
@@ -164,6 +192,10 @@ class MiniMetroRLEnv(BaseEnv):
         lower_bound = np.zeros(observation_dim, dtype=np.float32)
 
         self.observation_space = spaces.Box(low=lower_bound, high=higher_bound, dtype = np.float32)
+        self._obs_builder = ObservationBuilder(
+            self.max_stations, self.max_paths, self.dest_shape_types,
+            self.occupancy_rate_capped, self.station_capacity, self.spawn_interval_ms,
+        )
         self.action_space = spaces.MultiDiscrete([self.n_actions, self.max_stations, self.max_stations]) # 0 ... 4
 
         # private
@@ -171,14 +203,20 @@ class MiniMetroRLEnv(BaseEnv):
         self._station_ids = []  # list of station.id in first-seen order
         self._timeout_ms_by_station_id = {}
 
+        self.record_replay = record_replay
+        self.replay_checkpoint_every = replay_checkpoint_every
+        self.replay_log = None  # log of the current episode when recording
+
     def reset(self, *, seed = None, options = None):
         super().reset(seed = seed)
 
         self.invalid_streak = 0
-        random.seed(seed)
-        np.random.seed(seed)
-
-        self.engine = Engine()
+        # the engine owns its random generator, so several environments can
+        # run in the same process without sharing the global random state
+        if self.engine is None:
+            self.engine = Engine(headless=True, seed=seed)
+        else:
+            self.engine.reset(seed)
         self.t = 0
         self.elapsed_ms = 0
         self._station_rank.clear()
@@ -190,16 +228,31 @@ class MiniMetroRLEnv(BaseEnv):
         self._remove_cooldown_left_ms = 0
         self._path_birth_ms = {}
 
-        obs = self._get_obs()
+        obs = self._get_obs().copy()
         info = self._get_info()
         self.last_total_waiting = float(info['total_waiting'])
         self.last_score = float(info["score"])
 
         self.last_max_queue = float(info["max_queue"])
 
+        if self.record_replay:
+            self.replay_log = EnvReplayLog(
+                {"num_stations": Config.num_stations, "env_params": self._params}
+            )
+            self.replay_log.add_checkpoint(0, self.serialize())
+
         return obs, info
 
     def step(self, action):
+        reward, terminated, truncated, info = self._step(action)
+        # a copy, the builder's buffer is overwritten by the next step or reset
+        return self._obs_builder.buffer.copy(), reward, terminated, truncated, info
+
+    def _step(self, action):
+        """
+        `step` without the observation, which is left in the builder's buffer.
+        Used by the vector envs, which copy the buffer into their own arrays.
+        """
         a = np.asarray(action, dtype=int)
         act = int(a.flatten()[0])
         self._last_action = "none" # reset, will be set inside apply action
@@ -296,17 +349,115 @@ class MiniMetroRLEnv(BaseEnv):
         self.last_score = score
         self.last_max_queue = max_queue
 
-        return self._get_obs(), float(reward), terminated, truncated, info
+        if self.replay_log is not None:
+            self.replay_log.actions.append(tuple(int(x) for x in a.flatten()))
+            if self.t % self.replay_checkpoint_every == 0:
+                self.replay_log.add_checkpoint(self.t, self.serialize())
+
+        self._get_obs()
+        return float(reward), terminated, truncated, info
+
+    def snapshot(self):
+        """
+        State of the env and its engine, e.g. for planners that roll out several
+        actions from the same state. Bring it back with `restore`.
+        """
+        env_state = {
+            name: getattr(self, name) for name in _SNAPSHOT_SCALARS
+        }
+        env_state.update(
+            (name, getattr(self, name).copy()) for name in _SNAPSHOT_CONTAINERS
+        )
+        return self.engine.snapshot(), env_state
+
+    def restore(self, snapshot):
+        engine_snapshot, env_state = snapshot
+        self.engine.restore(engine_snapshot)
+        for name, value in env_state.items():
+            # containers are copied again, the snapshot can be restored many times
+            setattr(self, name, value.copy() if name in _SNAPSHOT_CONTAINERS else value)
+
+    def serialize(self):
+        """Bytes of what `snapshot` returns, to load with `deserialize`"""
+        engine_snapshot, env_state = self.snapshot()
+        # JSON keys are strings, dicts are written as lists of items
+        env_state = {
+            name: list(value.items()) if isinstance(value, dict) else value
+            for name, value in env_state.items()
+        }
+        return pack_arrays(_SAVE_MAGIC, _SAVE_VERSION, {
+            "engine": np.frombuffer(self.engine.serialize(), dtype=np.uint8),
+            "env": np.frombuffer(json.dumps(env_state).encode(), dtype=np.uint8),
+        })
+
+    def deserialize(self, data):
+        """Works on an env created with the same parameters, after a `reset`"""
+        version, arrays = unpack_arrays(_SAVE_MAGIC, data)
+        if version != _SAVE_VERSION:
+            raise GameException(f"Unsupported saved env version {version}")
+        self.engine.deserialize(arrays["engine"].tobytes())
+        for name, value in json.loads(arrays["env"].tobytes()).items():
+            if isinstance(getattr(self, name), dict):
+                value = {key: item for key, item in value}
+            setattr(self, name, value)
+
+    def action_masks(self):
+        """
+        Valid values of each action dimension, concatenated as sb3-contrib's
+        MaskablePPO expects for MultiDiscrete: action types, then i, then j.
+
+        A masked action type always fails in `_apply_action`, from the same
+        checks. Do nothing ignores i and j, so they are masked to what the
+        other action types use: station slots, path slots and paths that can
+        be removed. Constraints between dimensions (i != j) are not masked.
+        """
+        pm = self.engine.path_manager
+        stations = self._sorted_stations()[:self.max_stations]
+        paths = self._sorted_paths()
+        n_stations = len(stations)
+        n_paths = min(self.max_paths, len(paths))
+
+        type_mask = np.zeros(self.n_actions, dtype=bool)
+        i_mask = np.zeros(self.max_stations, dtype=bool)
+        j_mask = np.zeros(self.max_stations, dtype=bool)
+        type_mask[0] = True
+
+        # create, between stations i and j
+        if len(paths) < pm.max_num_paths and n_stations >= 2:
+            type_mask[1] = True
+            i_mask[:n_stations] = True
+        if n_paths and n_stations >= 2:
+            # expand path i to a station j it does not have yet
+            on_every_path = [
+                len(pm.get_paths_with_station(st)) >= len(paths) for st in stations
+            ]
+            if not all(on_every_path):
+                type_mask[2] = True
+                i_mask[:n_paths] = True
+            # replace path i, when cooldowns are over and it is old and idle;
+            # an i out of range picks the least loaded path, also in range
+            if self._edit_cooldown_left_ms <= 0 and self._remove_cooldown_left_ms <= 0:
+                removable = [self._can_remove_path(p) for p in paths[:n_paths]]
+                i_mask[:n_paths] |= removable
+                type_mask[3] = any(removable)
+        # expand a path towards a station, i and j are hints
+        if n_paths and n_stations:
+            type_mask[4] = True
+            i_mask[:n_paths] = True
+
+        j_mask[:n_stations] = True
+        # do nothing accepts any i and j
+        if not i_mask.any():
+            i_mask[:] = True
+        if not j_mask.any():
+            j_mask[:] = True
+        return np.concatenate((type_mask, i_mask, j_mask))
 
 # -------------------------
 # private help functions
     def _station_degree(self, station):
         # count how many paths include this station
-        deg = 0
-        for path in self.engine._components.paths:
-            if station in path.stations:
-                deg += 1
-        return deg
+        return len(self.engine.path_manager.get_paths_with_station(station))
 
     def _num_paths(self) -> int:
         return len(self.engine._components.paths)
@@ -319,7 +470,7 @@ class MiniMetroRLEnv(BaseEnv):
 
         for st in current:
             station_id = st.id
-            if station_id not in self._station_ids:
+            if station_id not in self._station_rank:
                 self._station_rank[station_id] = len(self._station_ids)
                 self._station_ids.append(station_id)
 
@@ -329,10 +480,7 @@ class MiniMetroRLEnv(BaseEnv):
         return sorted_stations
 
     def _station_on_any_path(self, station) -> float:
-        for p in self.engine._components.paths:
-            if station in p.stations:
-                return 1.0
-        return 0.0
+        return 1.0 if self.engine.path_manager.is_station_connected(station) else 0.0
 
     def _station_is_endpoint(self, station) -> float:
         for p in self.engine._components.paths:
@@ -366,17 +514,26 @@ class MiniMetroRLEnv(BaseEnv):
         return min(len(sts) / max(1.0, float(self.max_stations)), 1.0)
 
     def _advance_game(self, total_ms: int) -> None:
+        if self.fast_forward:
+            # station occupations only change in the step of an event, which is
+            # never merged, so the overflow timers get the same values as per dt
+            self.engine.advance(int(total_ms), self.dt_ms, on_step=self._on_engine_step)
+            return
+
         remaining = int(total_ms)
         while remaining > 0:
             dt = min(self.dt_ms, remaining)
             self.engine.increment_time(dt)
-            self.elapsed_ms += dt
-            self._update_overflow_timers(dt)
-
-            self._edit_cooldown_left_ms = max(0, self._edit_cooldown_left_ms - dt)
-            self._remove_cooldown_left_ms = max(0, self._remove_cooldown_left_ms - dt)
+            self._on_engine_step(dt)
             remaining -= dt
 
+    def _on_engine_step(self, dt: int) -> None:
+        self.elapsed_ms += dt
+        self._update_overflow_timers(dt)
+
+        self._edit_cooldown_left_ms = max(0, self._edit_cooldown_left_ms - dt)
+        self._remove_cooldown_left_ms = max(0, self._remove_cooldown_left_ms - dt)
+
     def _update_overflow_timers(self, dt_ms: int) -> None:
         for st in self.engine._components.stations:
             self._timeout_ms_by_station_id.setdefault(st.id, 0)
@@ -413,18 +570,12 @@ class MiniMetroRLEnv(BaseEnv):
         return self._station_degree(station) / max(1.0, float(self.max_paths))
 
     def _station_dest_shape_distribution(self, station) -> list[float]:
-        counts = {shape_type: 0.0 for shape_type in self.dest_shape_types}
-
-        passengers = getattr(station, "passengers", [])
-        total = float(len(passengers))
+        total = float(station.occupation)
         if total <= 0:
             return [0.0 for _ in self.dest_shape_types]
 
-        for passenger in passengers:
-            dst_type = passenger.destination_shape.type
-            if dst_type in counts:
-                counts[dst_type] += 1.0
-
+        # maintained by the engine, no need to walk the station passengers
+        counts = self.engine._components.passengers.get_destination_counts(station)
         return [counts[shape_type] / total for shape_type in self.dest_shape_types]
 
     def _sorted_paths(self) -> list:
@@ -438,6 +589,35 @@ class MiniMetroRLEnv(BaseEnv):
     def _path_key(self, path):
         return getattr(path, "id", id(path))
 
+    def _path_load(self, path) -> int:
+        return sum(st.occupation for st in path.stations)
+
+    def _can_remove_path(self, path) -> bool:
+        # what action 3 requires from the path it replaces
+        path_age = self.elapsed_ms - self._path_birth_ms.get(self._path_key(path), self.elapsed_ms)
+        return (
+            path_age >= self.min_path_age_ms
+            and not self._path_is_busy(path)
+            and len(path.stations) >= 2
+        )
+
+    def _create_path(self, s1, s2) -> None:
+        # only called once pm.can_create(s1, s2) holds
+        pm = self.engine.path_manager
+        pm.start_path_on_station(s1)
+        creating = pm._creating_or_expanding_path
+        creating.add_station_to_path(s2)
+        creating.try_to_end_path_on_station(s2)
+        pm._creating_or_expanding_path = None
+
+    def _expand_path(self, path, anchor, target) -> None:
+        # only called once pm.can_expand(path, anchor, target) holds
+        pm = self.engine.path_manager
+        local_idx = pm.get_paths_with_station(anchor).index(path)
+        pm.start_expanding_path_on_station(anchor, local_idx)
+        pm._creating_or_expanding_path.add_station_to_path(target)
+        pm._creating_or_expanding_path = None
+
     def _path_is_busy(self, path) -> bool:
         for metro in getattr(path, "metros", []):
             # there are passengers on the train
@@ -457,159 +637,8 @@ class MiniMetroRLEnv(BaseEnv):
 
     def _get_obs(self):
         stations = self._sorted_stations()[:self.max_stations]
-        paths = self._sorted_paths()[:self.max_paths]
-
-        max_queue = 0.0
-
-        # station features
-        queues = [] # occ_rate
-        #degrees = []
-        on_path = []
-
-        #endpoints = []
-        #warning_flags = []
-        #critical_flags = []
-
-        # one list per destination shape type
-        dest_shape_features = [[] for _ in range(self.num_dest_shape_types)]
-        self_shape_features = [[] for _ in range(self.num_dest_shape_types)]
-
-        for st in stations:
-            occ = float(st.occupation)
-            capacity = float(st.capacity)
-            r = occ / capacity if capacity > 0 else 0.0
-
-            queues.append(min(r, self.occupancy_rate_capped))
-            #degrees.append(self._station_degree(st) / max(1.0, float(self.max_paths)))
-            on_path.append(self._station_on_any_path(st))
-
-            #endpoints.append(self._station_is_endpoint(st))
-            #warning_flags.append(1.0 if occ >= self.warning_ratio * capacity else 0.0)
-            #critical_flags.append(1.0 if occ >= capacity else 0.0)
-            dest_dist = self._station_dest_shape_distribution(st)
-            for k, value in enumerate(dest_dist):
-                dest_shape_features[k].append(value)
-
-            self_shape = self._station_self_shape(st)
-            for k, value in enumerate(self_shape):
-                self_shape_features[k].append(value)
-
-            max_queue = max(max_queue, occ)
-
-        pad = self.max_stations - len(stations) # padding
-        if pad >0:
-            queues.extend([0.0] * pad)
-            #degrees.extend([0.0] * pad)
-            on_path.extend([0.0] * pad)
-
-            #endpoints.extend([0.0] * pad)
-            #warning_flags.extend([0.0] * pad)
-            #critical_flags.extend([0.0] * pad)
-            for k in range(self.num_dest_shape_types):
-                dest_shape_features[k].extend([0.0] * pad)
-                self_shape_features[k].extend([0.0] * pad)
-
-        # path features
-        path_exists = []
-        path_start_idx = []
-        path_end_idx = []
-        path_len = []
-        path_load = []
-
-        #can_expand_left = []
-        #can_expand_right = []
-        #left_endpoint_queue = []
-        #right_endpoint_queue = []
-        #left_endpoint_degree = []
-        #right_endpoint_degree = []
-
-        for p in paths:
-            sts = getattr(p, "stations", [])
-            if not sts:
-                path_exists.append(0.0)
-                path_start_idx.append(0.0)
-                path_end_idx.append(0.0)
-                path_len.append(0.0)
-                path_load.append(0.0)
-
-                #can_expand_left.append(0.0)
-                #can_expand_right.append(0.0)
-                #left_endpoint_queue.append(0.0)
-                #right_endpoint_queue.append(0.0)
-                #left_endpoint_degree.append(0.0)
-                #right_endpoint_degree.append(0.0)
-                continue
-
-            start_st = sts[0]
-            end_st = sts[-1]
-
-            path_exists.append(1.0)
-            path_start_idx.append(self._station_index_norm(start_st))
-            path_end_idx.append(self._station_index_norm(end_st))
-            path_len.append(min(len(sts) / max(1.0, float(self.max_stations)), 1.0))
-            path_load.append(self._path_load_norm(p))
-
-            #can_expand_left.append(self._path_can_expand_from_anchor(p, start_st))
-            #can_expand_right.append(self._path_can_expand_from_anchor(p, end_st))
-            #left_endpoint_queue.append(self._station_queue_ratio(start_st))
-            #right_endpoint_queue.append(self._station_queue_ratio(end_st))
-            #left_endpoint_degree.append(self._station_degree_norm(start_st))
-            #right_endpoint_degree.append(self._station_degree_norm(end_st))
-
-        pad_p = self.max_paths - len(paths)
-        if pad_p > 0:
-            path_exists.extend([0.0] * pad_p)
-            path_start_idx.extend([0.0] * pad_p)
-            path_end_idx.extend([0.0] * pad_p)
-            path_len.extend([0.0] * pad_p)
-            path_load.extend([0.0] * pad_p)
-
-            #can_expand_left.extend([0.0] * pad_p)
-            #can_expand_right.extend([0.0] * pad_p)
-            #left_endpoint_queue.extend([0.0] * pad_p)
-            #right_endpoint_queue.extend([0.0] * pad_p)
-            #left_endpoint_degree.extend([0.0] * pad_p)
-            #right_endpoint_degree.extend([0.0] * pad_p)
-
-        # global features
-        num_paths = self._num_paths()
-        paths_left = max(0, self.max_paths - num_paths)
-
-        num_paths_norm = num_paths / max(1, self.max_paths)
-        paths_left_norm = paths_left / max(1, self.max_paths)
-
-        ms_until_next_spawn = float(self.engine._passenger_spawner.ms_until_next_spawn)
-        spawn_progress = 1.0 - np.clip(ms_until_next_spawn / max(1.0, self.spawn_interval_ms), 0.0, 1.0)
-
-        mean_queue_ratio = float(np.mean(queues[:len(stations)])) if len(stations) > 0 else 0.0
-        num_unserved = sum(1.0 - x for x in on_path[:len(stations)])
-        num_unserved_stations_norm = num_unserved / max(1.0, float(self.max_stations))
-
-        max_queue_ratio = min(max_queue / max(1.0, self.station_capacity), self.occupancy_rate_capped)
-
-        return np.array(
-            queues +
-            #degrees +
-            on_path +
-            #endpoints +
-            #warning_flags +
-            #critical_flags +
-            sum(self_shape_features, []) +
-            sum(dest_shape_features, []) +
-            path_exists +
-            path_start_idx +
-            path_end_idx +
-            path_len +
-            path_load +
-            #can_expand_left +
-            #can_expand_right +
-            #left_endpoint_queue +
-            #right_endpoint_queue +
-            #left_endpoint_degree +
-            #right_endpoint_degree +
-            [num_paths_norm, paths_left_norm, spawn_progress, max_queue_ratio, mean_queue_ratio, num_unserved_stations_norm],
-            dtype=np.float32
-        )
+        # the builder's buffer, overwritten by the next build
+        return self._obs_builder.build(self.engine, stations, self._station_rank)
 
     def _get_info(self):
         stations = self.engine._components.stations
@@ -671,8 +700,7 @@ class MiniMetroRLEnv(BaseEnv):
         except Exception:
             return False
 
-        def path_load(p):
-            return sum(st.occupation for st in p.stations)
+        path_load = self._path_load
 
         def valid_path_idx(idx: int) -> bool:
             return 0 <= idx < n_paths
@@ -735,29 +763,8 @@ class MiniMetroRLEnv(BaseEnv):
                 s2_candidates = unique_keep_order(s2_candidates + remaining_s2)
 
                 for s2 in s2_candidates:
-                    before = self._num_paths()
-
-                    try:
-                        w = pm.start_path_on_station(s1)
-                        if w is None:
-                            continue # reach resources limit
-
-                        creating = pm._creating_or_expanding_path
-                        if creating is None:
-                            continue
-
-                        creating.add_station_to_path(s2)
-                        creating.try_to_end_path_on_station(s2)
-
-                        after = self._num_paths()
-
-                    except Exception as e:
-                        return False
-                    finally:
-                        # close
-                        pm._creating_or_expanding_path = None
-
-                    if after > before: # true if new line has created
+                    if pm.can_create(s1, s2):
+                        self._create_path(s1, s2)
                         new_path = max(self.engine._components.paths, key=lambda p: getattr(p, "path_order", 0))
                         self._path_birth_ms[self._path_key(new_path)] = self.elapsed_ms
                         self._edit_cooldown_left_ms = self.edit_cooldown_ms
@@ -792,34 +799,8 @@ class MiniMetroRLEnv(BaseEnv):
                 anchors.append(chosen_path.stations[0])
 
             for anchor in anchors:
-                if anchor is None:
-                    continue
-
-                candidate_paths = pm.get_paths_with_station(anchor)
-                if not candidate_paths or chosen_path not in candidate_paths:
-                    continue
-
-                local_idx = candidate_paths.index(chosen_path)
-                before_len = len(chosen_path.stations)
-
-                try:
-                    editor = pm.start_expanding_path_on_station(anchor, local_idx)
-                    if editor is None:
-                        continue
-
-                    expanding = pm._creating_or_expanding_path
-                    if not expanding:
-                        continue
-
-                    expanding.add_station_to_path(target)
-
-                except Exception:
-                    pass
-
-                finally:
-                    pm._creating_or_expanding_path = None
-
-                if len(chosen_path.stations) > before_len:
+                if pm.can_expand(chosen_path, anchor, target):
+                    self._expand_path(chosen_path, anchor, target)
                     self._edit_cooldown_left_ms = self.edit_cooldown_ms
                     self._last_action = "expand"
                     return True
@@ -844,37 +825,10 @@ class MiniMetroRLEnv(BaseEnv):
             else:
                 path_remove = min(paths, key=path_load)
 
-            path_age = self.elapsed_ms - self._path_birth_ms.get(self._path_key(path_remove), self.elapsed_ms)
-
-            if path_age < self.min_path_age_ms:
+            # old enough and idle
+            if not self._can_remove_path(path_remove) or not pm.can_remove(path_remove):
                 return False
 
-            if self._path_is_busy(path_remove):
-                return False
-
-            before = self._num_paths()
-
-            # Backup path so we can restore on failure
-            backup_stations = list(getattr(path_remove, "stations", []))
-            if len(backup_stations) < 2:
-                return False  # can't safely remove/restore a degenerate path
-
-            def _build_path_from_station_list(st_list):
-                w = pm.start_path_on_station(st_list[0])
-                if w is None:
-                    return False
-                creating = pm._creating_or_expanding_path
-                if creating is None:
-                    return False
-
-                # Add intermediate stations
-                for st in st_list[1:]:
-                    creating.add_station_to_path(st)
-
-                # Ensure it ends
-                creating.try_to_end_path_on_station(st_list[-1])
-                return True
-
             # choose stations to connect (use i,j if valid, else top-2 congested)
             if 0 <= i < n_stations and 0 <= j < n_stations and i != j:
                 s1, s2 = stations[i], stations[j]
@@ -882,59 +836,17 @@ class MiniMetroRLEnv(BaseEnv):
                 sorted_st = sorted(stations[:n_stations], key=lambda s: s.occupation, reverse=True)
                 s1, s2 = sorted_st[0], sorted_st[1]
 
-            removed = False
-            created_new = False
-            restored_old = False
-
-            try:
-                # 1) Remove old path (free a slot), BUT we have a backup.
-                pm.remove_path(path_remove)
-                removed = True
-
-                # 2) Try to create the new path
-                w = pm.start_path_on_station(s1)
-                if w is None:
-                    return False
-
-                creating = pm._creating_or_expanding_path
-                if creating is None:
-                    return False
-
-                creating.add_station_to_path(s2)
-                creating.try_to_end_path_on_station(s2)
-                created_new = True
-
-            except Exception:
+            # removing the path frees the slot of the new one, so only the
+            # stations can make the creation fail
+            if s1 is s2:
                 return False
 
-            finally:
-                # Always clear any half-open creation state
-                pm._creating_or_expanding_path = None
-
-                # 3) If we removed the old path but failed to create the new one, restore.
-                if removed and not created_new:
-                    try:
-                        # Make sure creating state is clean before restore
-                        pm._creating_or_expanding_path = None
-                        restored_old = _build_path_from_station_list(backup_stations)
-                    except Exception:
-                        restored_old = False
-                    finally:
-                        pm._creating_or_expanding_path = None
-
-            after = self._num_paths()
-
-            # Success if we ended up with at least as many paths as before.
-            # - created_new True => usually after == before
-            # - created_new False + restored_old True => after == before
-            if created_new and after >= before:
-                self._remove_cooldown_left_ms = self.remove_cooldown_ms
-                self._edit_cooldown_left_ms = self.edit_cooldown_ms
-                self._last_action = "remove"
-                return True
-
-            # If we got here, we permanently lost a path
-            return False
+            pm.remove_path(path_remove)
+            self._create_path(s1, s2)
+            self._remove_cooldown_left_ms = self.remove_cooldown_ms
+            self._edit_cooldown_left_ms = self.edit_cooldown_ms
+            self._last_action = "remove"
+            return True
 
         # ---------------------------------------
         # Action 4: x
@@ -976,31 +888,8 @@ class MiniMetroRLEnv(BaseEnv):
                         continue
 
                     for anchor in anchors:
-                        candidate_paths = pm.get_paths_with_station(anchor)
-                        if not candidate_paths or chosen_path not in candidate_paths:
-                            continue
-
-                        local_idx = candidate_paths.index(chosen_path)
-                        before_len = len(chosen_path.stations)
-
-                        try:
-                            editor = pm.start_expanding_path_on_station(anchor, local_idx)
-                            if editor is None:
-                                continue
-
-                            expanding = pm._creating_or_expanding_path
-                            if not expanding:
-                                continue
-
-                            expanding.add_station_to_path(target)
-
-                        except Exception:
-                            pass
-
-                        finally:
-                            pm._creating_or_expanding_path = None
-
-                        if len(chosen_path.stations) > before_len:
+                        if pm.can_expand(chosen_path, anchor, target):
+                            self._expand_path(chosen_path, anchor, target)
                             self._last_action = "expand"
                             return True
 
@@ -1,12 +1,14 @@
+import argparse
 import math
 from pathlib import Path
 
 from stable_baselines3 import PPO
 from stable_baselines3.common.callbacks import CheckpointCallback
-from stable_baselines3.common.vec_env import DummyVecEnv, VecNormalize, VecCheckNan, VecMonitor
+from stable_baselines3.common.vec_env import VecNormalize, VecCheckNan, VecMonitor
 from torch.nn import Tanh
 
 from src.rl_env import MiniMetroRLEnv
+from src.vec_env import MiniMetroSubprocVecEnv, MiniMetroVecEnv
 
 
 BASE_DIR = Path(__file__).resolve().parent
@@ -17,16 +19,19 @@ MODEL_PATH = RUN_DIR / "model.zip"
 NORM_PATH = RUN_DIR / "vecnormalize.pkl"
 
 
-def make_env(seed: int = 42):
-    def _init():
-        env = MiniMetroRLEnv()
-        env.reset(seed=seed)
-        return env
-    return _init
-
-
-def build_vec_env(seed: int = 42, load_norm: bool = True):
-    base = DummyVecEnv([make_env(seed)])
+def build_vec_env(
+    seed: int = 42,
+    load_norm: bool = True,
+    num_envs: int = 1,
+    workers: int = 0,
+    masked: bool = False,
+):
+    # env i starts from seed + i, the envs run in the process without workers
+    if workers:
+        # MaskablePPO reads the action masks on every step
+        base = MiniMetroSubprocVecEnv(num_envs, workers, seed=seed, action_masks=masked)
+    else:
+        base = MiniMetroVecEnv(num_envs, seed=seed)
     base = VecCheckNan(base, raise_exception=True)
     base = VecMonitor(base)
 
@@ -52,18 +57,27 @@ def build_vec_env(seed: int = 42, load_norm: bool = True):
     return venv
 
 
-def build_new_model(venv):
+def get_model_class(masked: bool = False):
+    """PPO, or sb3-contrib's MaskablePPO reading MiniMetroRLEnv.action_masks"""
+    if not masked:
+        return PPO
+    from sb3_contrib import MaskablePPO
+
+    return MaskablePPO
+
+
+def build_new_model(venv, masked: bool = False):
     policy_kwargs = dict(
         activation_fn=Tanh,
         net_arch=dict(pi=[256, 256], vf=[256, 256]),
     )
 
-    model = PPO(
+    model = get_model_class(masked)(
         policy="MlpPolicy",
         env=venv,
         policy_kwargs=policy_kwargs,
         learning_rate=3e-4,
-        n_steps=2048,
+        n_steps=max(64, 2048 // venv.num_envs),  # about 2048 samples per rollout
         batch_size=256,
         n_epochs=10,
         gamma=venv.gamma if hasattr(venv, "gamma") else 0.99,
@@ -94,6 +108,18 @@ def save_all(model, venv, tag: str = "latest"):
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train PPO on Mini Metro.")
+    parser.add_argument("--num-envs", type=int, default=1, help="Envs stepped together")
+    parser.add_argument(
+        "--workers", type=int, default=0, help="Processes running the envs, 0 for none"
+    )
+    parser.add_argument(
+        "--masked",
+        action="store_true",
+        help="Train MaskablePPO (sb3-contrib) with the env action masks",
+    )
+    args = parser.parse_args()
+
     RUN_DIR.mkdir(parents=True, exist_ok=True)
     TB_DIR.mkdir(parents=True, exist_ok=True)
     CKPT_DIR.mkdir(parents=True, exist_ok=True)
@@ -104,15 +130,24 @@ if __name__ == "__main__":
     hard_save_every = 100_000
 
     # --- env ---
-    venv = build_vec_env(seed=seed, load_norm=True)
+    venv = build_vec_env(
+        seed=seed,
+        load_norm=True,
+        num_envs=args.num_envs,
+        workers=args.workers,
+        masked=args.masked,
+    )
 
     # --- model ---
     if MODEL_PATH.exists():
         print(f"Loading existing model from {MODEL_PATH}")
-        model = PPO.load(str(MODEL_PATH), env=venv, device="auto")
+        # a model only loads with the class it was trained with
+        model = get_model_class(args.masked).load(
+            str(MODEL_PATH), env=venv, device="auto"
+        )
     else:
         print("No existing model found. Creating a new PPO model.")
-        model = build_new_model(venv)
+        model = build_new_model(venv, masked=args.masked)
 
     # --- callback ---
     callback = CheckpointCallback(
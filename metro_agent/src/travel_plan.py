@@ -1,25 +1,54 @@
-from typing import Sequence
+from collections.abc import Sequence
+from dataclasses import dataclass
 
 from src.entity import Path, Station
+from src.geometry.type import ShapeType
 from src.graph.node import Node
+from src.protocols.travel_plan import TravelPlanState
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class Route:
+    """
+    Way from a station to the nearest station of a given shape type.
+
+    Routes are interned by the routing table: every passenger going from the
+    same origin to the same shape type shares one instance, so routes compare
+    by identity.
+    """
+
+    origin: Station
+    destination: ShapeType
+    next_hop: Station
+    # transfer-compressed node path, without the origin station
+    node_path: tuple[Node, ...]
+    next_path: Path | None
+    # paths the route rides on
+    paths: frozenset[Path]
 
 
 class TravelPlan:
+    """A passenger's cursor on a shared route"""
+
     __slots__ = (
+        "route",
         "next_path",
         "next_station",
-        "node_path",
         "next_station_idx",
         "_passenger_num_id",
     )
 
-    def __init__(self, node_path: Sequence[Node], passenger_num_id: int) -> None:
+    def __init__(self, route: Route | None, passenger_num_id: int) -> None:
+        self.route = route
         self.next_path: Path | None = None
         self.next_station: Station | None = None
-        self.node_path = node_path
         self.next_station_idx = 0
         self._passenger_num_id = passenger_num_id
 
+    @property
+    def node_path(self) -> Sequence[Node]:
+        return self.route.node_path if self.route else ()
+
     def get_next_station(self) -> Station | None:
         if len(self.node_path) > 0:
             next_node = self.node_path[self.next_station_idx]
@@ -31,6 +60,12 @@ class TravelPlan:
     def increment_next_station(self) -> None:
         self.next_station_idx += 1
 
+    def snapshot(self) -> TravelPlanState:
+        return self.next_path, self.next_station, self.next_station_idx
+
+    def restore(self, state: TravelPlanState) -> None:
+        self.next_path, self.next_station, self.next_station_idx = state
+
     def __eq__(self, value: object) -> bool:
         if not isinstance(value, type(self)):
             return False
@@ -1,6 +1,6 @@
 import colorsys
 import random
-from typing import Sequence, Tuple
+from typing import Callable, Sequence, Tuple, TypeVar
 
 import numpy as np
 
@@ -17,16 +17,18 @@ from src.geometry.shape import Shape
 from src.geometry.type import ShapeType
 from src.type import Color
 
+T = TypeVar("T")
 
-def get_random_position(width: int, height: int) -> Point:
+
+def get_random_position(
+    width: int, height: int, rng: np.random.Generator | None = None
+) -> Point:
+    """Uses the global numpy random state when no generator is given"""
     padding_ratio = 0.1
+    rand: Callable[[], float] = rng.random if rng else np.random.rand
     return Point(
-        left=round(
-            width * (padding_ratio + np.random.rand() * (1 - padding_ratio * 2))
-        ),
-        top=round(
-            height * (padding_ratio + np.random.rand() * (1 - padding_ratio * 2))
-        ),
+        left=round(width * (padding_ratio + rand() * (1 - padding_ratio * 2))),
+        top=round(height * (padding_ratio + rand() * (1 - padding_ratio * 2))),
     )
 
 
@@ -39,20 +41,39 @@ def hue_to_rgb(hue: float) -> Color:
 
 
 def get_random_shape(
-    shape_type_list: Sequence[ShapeType], color: Color, size: int
+    shape_type_list: Sequence[ShapeType],
+    color: Color,
+    size: int,
+    rng: np.random.Generator | None = None,
 ) -> Shape:
-    shape_type = random.choice(shape_type_list)
+    shape_type = random_choice(shape_type_list, rng)
     return get_shape_from_type(shape_type, color, size)
 
 
-def get_random_station_shape() -> Shape:
-    return get_random_shape(station_shape_type_list, station_color, station_size)
+def get_random_station_shape(rng: np.random.Generator | None = None) -> Shape:
+    return get_random_shape(station_shape_type_list, station_color, station_size, rng)
 
 
 def get_random_passenger_shape() -> Shape:
     return get_random_shape(station_shape_type_list, get_random_color(), passenger_size)
 
 
+def random_choice(seq: Sequence[T], rng: np.random.Generator | None = None) -> T:
+    """Uses the global random state when no generator is given"""
+    if rng is None:
+        return random.choice(seq)
+    return seq[rng.integers(len(seq))]
+
+
+def random_shuffle(items: list[T], rng: np.random.Generator | None = None) -> None:
+    """Uses the global random state when no generator is given"""
+    if rng is None:
+        random.shuffle(items)
+    else:
+        # same draws and order as rng.shuffle, which NumPy types for arrays only
+        items[:] = [items[idx] for idx in rng.permutation(len(items))]
+
+
 def tuple_to_point(tuple: Tuple[int, int]) -> Point:
     return Point(left=tuple[0], top=tuple[1])
 
@@ -0,0 +1,539 @@
+"""
+Vector envs stepping several MiniMetroRLEnv, for PPO rollouts.
+
+Compared to wrapping the envs in stable-baselines3's `DummyVecEnv`, the
+observations are written in one preallocated `(num_envs, obs_dim)` buffer
+instead of a dict of per-env buffers, and infos are handed over as they are
+instead of being deep-copied on every step.
+
+`MiniMetroSubprocVecEnv` spreads the envs over worker processes. Unlike
+`SubprocVecEnv`, nothing is pickled on a step: the workers write in shared
+memory and the info dicts are reduced to a record of numbers.
+"""
+
+from __future__ import annotations
+
+import multiprocessing as mp
+import threading
+import traceback
+from collections.abc import Sequence
+from multiprocessing.connection import wait
+from multiprocessing.shared_memory import SharedMemory
+from multiprocessing.synchronize import Barrier
+from typing import TYPE_CHECKING, Any, Final, Literal
+
+import numpy as np
+from gymnasium import spaces
+from stable_baselines3.common.env_util import is_wrapped
+from stable_baselines3.common.vec_env.base_vec_env import (
+    VecEnv,
+    VecEnvIndices,
+    VecEnvObs,
+    VecEnvStepReturn,
+)
+
+from src.rl_env import MiniMetroRLEnv
+
+if TYPE_CHECKING:
+    from multiprocessing.context import ForkContext, ForkServerContext, SpawnContext
+
+
+class MiniMetroVecEnv(VecEnv):
+    """
+    `num_envs` envs created with `env_kwargs`, reset automatically when their
+    episode ends. With a `seed`, env i is reset with `seed + i` the first time.
+    """
+
+    def __init__(self, num_envs: int, seed: int | None = None, **env_kwargs: Any):
+        # read by VecEnv.__init__
+        self.envs = [MiniMetroRLEnv(**env_kwargs) for _ in range(num_envs)]
+        env = self.envs[0]
+        super().__init__(num_envs, env.observation_space, env.action_space)
+        assert env.observation_space.shape is not None
+
+        self._obs = np.zeros((num_envs, *env.observation_space.shape), dtype=np.float32)
+        self._rewards = np.zeros(num_envs, dtype=np.float32)
+        self._dones = np.zeros(num_envs, dtype=bool)
+        self._infos: list[dict[str, Any]] = [{} for _ in range(num_envs)]
+        self._actions: np.ndarray | None = None
+        if seed is not None:
+            self.seed(seed)
+
+    def reset(self) -> VecEnvObs:
+        for i, env in enumerate(self.envs):
+            self._obs[i], self.reset_infos[i] = env.reset(
+                seed=self._seeds[i], options=self._options[i]
+            )
+        # seeds and options only apply to the next reset
+        self._reset_seeds()
+        self._reset_options()
+        # rollout buffers keep the previous observations, do not hand out the buffer
+        return self._obs.copy()
+
+    def step_async(self, actions: np.ndarray) -> None:
+        self._actions = actions
+
+    def step_wait(self) -> VecEnvStepReturn:
+        assert self._actions is not None
+        for i, env in enumerate(self.envs):
+            obs, reward, terminated, truncated, info = _step_in_place(
+                env, self._actions[i]
+            )
+            done = terminated or truncated
+            # bootstrapped by the value function, see OffPolicyAlgorithm/PPO
+            info["TimeLimit.truncated"] = truncated and not terminated
+            if done:
+                info["terminal_observation"] = obs.copy()
+                _, self.reset_infos[i] = env.reset()
+            self._obs[i] = obs
+            self._rewards[i] = reward
+            self._dones[i] = done
+            self._infos[i] = info
+        self._actions = None
+        return (
+            self._obs.copy(),
+            self._rewards.copy(),
+            self._dones.copy(),
+            list(self._infos),
+        )
+
+    def close(self) -> None:
+        for env in self.envs:
+            env.close()
+
+    def get_attr(self, attr_name: str, indices: VecEnvIndices = None) -> list[Any]:
+        return [getattr(env, attr_name) for env in self._target_envs(indices)]
+
+    def set_attr(
+        self, attr_name: str, value: Any, indices: VecEnvIndices = None
+    ) -> None:
+        for env in self._target_envs(indices):
+            setattr(env, attr_name, value)
+
+    def env_method(
+        self,
+        method_name: str,
+        *method_args: Any,
+        indices: VecEnvIndices = None,
+        **method_kwargs: Any,
+    ) -> list[Any]:
+        return [
+            getattr(env, method_name)(*method_args, **method_kwargs)
+            for env in self._target_envs(indices)
+        ]
+
+    def env_is_wrapped(
+        self, wrapper_class: type, indices: VecEnvIndices = None
+    ) -> list[bool]:
+        return [is_wrapped(env, wrapper_class) for env in self._target_envs(indices)]
+
+    def _target_envs(self, indices: VecEnvIndices) -> Sequence[MiniMetroRLEnv]:
+        return [self.envs[i] for i in self._get_indices(indices)]
+
+
+# numeric entries of MiniMetroRLEnv infos, see MiniMetroSubprocVecEnv.info_records
+INFO_FIELDS: Final = (
+    "max_queue",
+    "total_waiting",
+    "num_warning",
+    "num_critical",
+    "congested",
+    "failed",
+    "score",
+    "engine_ticks",
+    "elapsed_ms",
+    "decision_step",
+    "num_paths",
+    "paths_left",
+    "ms_until_next_spawn",
+    "min_overflow_remaining_ms",
+    "invalid_action",
+    "invalid_streak",
+)
+INFO_DTYPE: Final = np.dtype([(name, np.float64) for name in INFO_FIELDS])
+
+StartMethod = Literal["fork", "forkserver", "spawn"]
+
+# what the workers do once the start barrier is passed
+_STEP: Final = 0
+_RESET: Final = 1
+_CALL: Final = 2
+_CLOSE: Final = 3
+
+# time given to the workers to stop on close before they are terminated
+_STOP_TIMEOUT_S: Final = 5.0
+
+
+class MiniMetroSubprocVecEnv(VecEnv):
+    """
+    `num_envs` envs split over `workers` processes, otherwise as
+    `MiniMetroVecEnv`.
+
+    A step passes a barrier to start the workers and another one once they
+    are done; observations, rewards, dones and info records are read from
+    shared memory. Infos only hold what stable-baselines3 reads, the numeric
+    entries of the env infos are in `info_records`. `get_attr`, `set_attr`
+    and `env_method` go through pipes, they are not meant for every step.
+    With `action_masks`, the workers also write the masks of the envs in
+    shared memory after every step and reset, `env_method("action_masks")`
+    reads them from there as MaskablePPO calls it on every step.
+
+    When a worker fails, all of them stop and the vec env is closed; the error
+    of the worker is raised again in the main process.
+    """
+
+    def __init__(
+        self,
+        num_envs: int,
+        workers: int,
+        seed: int | None = None,
+        start_method: StartMethod | None = None,
+        action_masks: bool = False,
+        **env_kwargs: Any,
+    ):
+        workers = min(workers, num_envs)
+        # the spaces only, no engine is created before reset
+        probe = MiniMetroRLEnv(**env_kwargs)
+        assert probe.observation_space.shape is not None
+        assert isinstance(probe.action_space, spaces.MultiDiscrete)
+        obs_shape = (num_envs, *probe.observation_space.shape)
+        # the masks of the action dimensions, concatenated
+        mask_dim = int(probe.action_space.nvec.sum()) if action_masks else 0
+
+        self._arrays = _SharedArrays(
+            {
+                "obs": (obs_shape, np.float32),
+                "terminal_obs": (obs_shape, np.float32),
+                "actions": ((num_envs, len(probe.action_space.nvec)), np.int64),
+                "rewards": ((num_envs,), np.float32),
+                "dones": ((num_envs,), np.bool_),
+                "truncated": ((num_envs,), np.bool_),
+                "infos": ((num_envs,), INFO_DTYPE),
+                "action_masks": ((num_envs, mask_dim), np.bool_),
+                "command": ((1,), np.int64),
+            }
+        )
+        self._has_action_masks: Final = action_masks
+        arrays = self._arrays.arrays
+
+        if start_method is None:
+            # fork is unsafe with the threads of torch, as in SubprocVecEnv
+            methods = mp.get_all_start_methods()
+            start_method = "forkserver" if "forkserver" in methods else "spawn"
+        ctx = _get_context(start_method)
+        self._barrier = ctx.Barrier(workers + 1)
+        self._pipes = []
+        self._processes = []
+        bounds = np.linspace(0, num_envs, workers + 1).astype(int).tolist()
+        for start, stop in zip(bounds, bounds[1:]):
+            pipe, worker_pipe = ctx.Pipe()
+            process = ctx.Process(
+                target=_worker,
+                args=(
+                    self._arrays.spec,
+                    range(start, stop),
+                    env_kwargs,
+                    self._barrier,
+                    worker_pipe,
+                ),
+                daemon=True,
+            )
+            process.start()
+            worker_pipe.close()
+            self._pipes.append((pipe, range(start, stop)))
+            self._processes.append(process)
+
+        self._closed = False
+        threading.Thread(target=self._watch_workers, daemon=True).start()
+        # reads render_mode from the workers
+        super().__init__(num_envs, probe.observation_space, probe.action_space)
+        if seed is not None:
+            self.seed(seed)
+
+    @property
+    def info_records(self) -> np.ndarray:
+        """Numeric entries of the last infos, one record of `INFO_DTYPE` per env"""
+        return self._arrays.arrays["infos"].copy()
+
+    def reset(self) -> VecEnvObs:
+        # resets are rare, seeds, options and infos go through the pipes
+        for pipe, env_idxs in self._pipes:
+            pipe.send({i: (self._seeds[i], self._options[i]) for i in env_idxs})
+        self._run(_RESET)
+        for pipe, _ in self._pipes:
+            for i, info in pipe.recv().items():
+                self.reset_infos[i] = info
+        # seeds and options only apply to the next reset
+        self._reset_seeds()
+        self._reset_options()
+        return self._arrays.arrays["obs"].copy()
+
+    def step_async(self, actions: np.ndarray) -> None:
+        arrays = self._arrays.arrays
+        arrays["actions"][:] = actions
+        arrays["command"][0] = _STEP
+        self._wait()
+
+    def step_wait(self) -> VecEnvStepReturn:
+        self._wait()
+        arrays = self._arrays.arrays
+        infos: list[dict[str, Any]] = []
+        for i, truncated in enumerate(arrays["truncated"].tolist()):
+            info: dict[str, Any] = {"TimeLimit.truncated": truncated}
+            if arrays["dones"][i]:
+                info["terminal_observation"] = arrays["terminal_obs"][i].copy()
+            infos.append(info)
+        return (
+            arrays["obs"].copy(),
+            arrays["rewards"].copy(),
+            arrays["dones"].copy(),
+            infos,
+        )
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._arrays.arrays["command"][0] = _CLOSE
+        try:
+            self._barrier.wait(_STOP_TIMEOUT_S)
+        except threading.BrokenBarrierError:
+            # the workers have stopped already, or are stuck
+            pass
+        try:
+            for process in self._processes:
+                process.join(_STOP_TIMEOUT_S)
+                if process.is_alive():
+                    process.terminate()
+                    process.join()
+            for pipe, _ in self._pipes:
+                pipe.close()
+        finally:
+            self._arrays.release()
+
+    def get_attr(self, attr_name: str, indices: VecEnvIndices = None) -> list[Any]:
+        return self._call("getattr", attr_name, (), {}, indices)
+
+    def set_attr(
+        self, attr_name: str, value: Any, indices: VecEnvIndices = None
+    ) -> None:
+        self._call("setattr", attr_name, (value,), {}, indices)
+
+    def env_method(
+        self,
+        method_name: str,
+        *method_args: Any,
+        indices: VecEnvIndices = None,
+        **method_kwargs: Any,
+    ) -> list[Any]:
+        if method_name == "action_masks" and self._has_action_masks:
+            masks = self._arrays.arrays["action_masks"]
+            return list(masks[list(self._get_indices(indices))])
+        return self._call("method", method_name, method_args, method_kwargs, indices)
+
+    def env_is_wrapped(
+        self, wrapper_class: type, indices: VecEnvIndices = None
+    ) -> list[bool]:
+        return self._call("is_wrapped", "", (wrapper_class,), {}, indices)
+
+    def _run(self, command: int) -> None:
+        self._arrays.arrays["command"][0] = command
+        self._wait()
+        self._wait()
+
+    def _wait(self) -> None:
+        """Waits on the barrier, raises the error of a worker if it is broken"""
+        try:
+            self._barrier.wait()
+        except threading.BrokenBarrierError:
+            error = self._get_worker_error()
+            self.close()
+            if error is None:
+                raise RuntimeError("a worker process has stopped") from None
+            raise error from None
+
+    def _get_worker_error(self) -> BaseException | None:
+        # other messages are results, sent as dicts
+        for pipe, _ in self._pipes:
+            try:
+                while pipe.poll():
+                    message = pipe.recv()
+                    if isinstance(message, BaseException):
+                        return message
+            except (EOFError, OSError):
+                # the worker has died with its end of the pipe
+                continue
+        return None
+
+    def _watch_workers(self) -> None:
+        """Breaks the barrier when a worker dies, the main process would wait forever"""
+        wait([process.sentinel for process in self._processes])
+        if not self._closed:
+            self._barrier.abort()
+
+    def _call(
+        self,
+        kind: str,
+        name: str,
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+        indices: VecEnvIndices,
+    ) -> list[Any]:
+        targets = set(self._get_indices(indices))
+        for pipe, env_idxs in self._pipes:
+            pipe.send((kind, name, args, kwargs, [i for i in env_idxs if i in targets]))
+        self._run(_CALL)
+        results: dict[int, Any] = {}
+        for pipe, _ in self._pipes:
+            results.update(pipe.recv())
+        return [results[i] for i in self._get_indices(indices)]
+
+
+class _SharedArrays:
+    """Named arrays in one shared memory block, attached again from `spec`"""
+
+    def __init__(
+        self,
+        layout: dict[str, tuple[tuple[int, ...], Any]],
+        name: str | None = None,
+    ) -> None:
+        offsets = {}
+        size = 0
+        for key, (shape, dtype) in layout.items():
+            # aligned for any dtype
+            size = -(-size // 64) * 64
+            offsets[key] = size
+            size += int(np.prod(shape)) * np.dtype(dtype).itemsize
+        self._memory = (
+            SharedMemory(name, create=False)
+            if name
+            else SharedMemory(create=True, size=max(size, 1))
+        )
+        self._owner = name is None
+        self.spec: Final = (layout, self._memory.name)
+        self.arrays: Final[dict[str, np.ndarray]] = {
+            key: np.ndarray(shape, dtype, self._memory.buf, offsets[key])
+            for key, (shape, dtype) in layout.items()
+        }
+        if self._owner:
+            for array in self.arrays.values():
+                array.fill(0)
+
+    def release(self) -> None:
+        # the arrays must not outlive the memory they point to
+        self.arrays.clear()
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
+
+
+def _get_context(
+    start_method: StartMethod,
+) -> ForkContext | ForkServerContext | SpawnContext:
+    """The concrete context, `get_context` types it as a BaseContext for a str"""
+    if start_method == "fork":
+        return mp.get_context("fork")
+    if start_method == "forkserver":
+        return mp.get_context("forkserver")
+    return mp.get_context("spawn")
+
+
+def _worker(
+    spec: tuple[dict[str, tuple[tuple[int, ...], Any]], str],
+    env_idxs: range,
+    env_kwargs: dict[str, Any],
+    barrier: Barrier,
+    pipe: Any,
+) -> None:
+    shared = _SharedArrays(*spec)
+    arrays = shared.arrays
+    obs, terminal_obs = arrays["obs"], arrays["terminal_obs"]
+    actions, rewards = arrays["actions"], arrays["rewards"]
+    dones, truncations, records = arrays["dones"], arrays["truncated"], arrays["infos"]
+    # empty rows without action masks
+    masks = arrays["action_masks"]
+    has_masks = masks.shape[1] > 0
+    envs: dict[int, MiniMetroRLEnv] = {}
+    try:
+        envs.update((i, MiniMetroRLEnv(**env_kwargs)) for i in env_idxs)
+        while True:
+            barrier.wait()
+            command = int(arrays["command"][0])
+            if command == _CLOSE:
+                break
+            if command == _STEP:
+                for i, env in envs.items():
+                    observation, reward, terminated, truncated, info = _step_in_place(
+                        env, actions[i]
+                    )
+                    records[i] = tuple(info[name] for name in INFO_FIELDS)
+                    if terminated or truncated:
+                        terminal_obs[i] = observation
+                        env.reset()
+                    obs[i] = observation
+                    rewards[i] = reward
+                    dones[i] = terminated or truncated
+                    truncations[i] = truncated and not terminated
+                    if has_masks:
+                        masks[i] = env.action_masks()
+            elif command == _RESET:
+                infos = {}
+                for i, (seed, options) in pipe.recv().items():
+                    obs[i], infos[i] = envs[i].reset(seed=seed, options=options)
+                    if has_masks:
+                        masks[i] = envs[i].action_masks()
+                pipe.send(infos)
+            elif command == _CALL:
+                kind, name, args, kwargs, idxs = pipe.recv()
+                pipe.send(
+                    {i: _call_env(envs[i], kind, name, args, kwargs) for i in idxs}
+                )
+            barrier.wait()
+    except threading.BrokenBarrierError:
+        # another worker has failed, or the main process has stopped waiting
+        pass
+    except BaseException as error:
+        # sent before breaking the barrier, the main process reads it once broken
+        note = f"in the worker of envs {list(env_idxs)}:\n{traceback.format_exc()}"
+        error.add_note(note)
+        try:
+            pipe.send(error)
+        except Exception:
+            # not picklable
+            pipe.send(RuntimeError(f"{error!r}\n{note}"))
+        barrier.abort()
+    finally:
+        for env in envs.values():
+            env.close()
+        del obs, terminal_obs, actions, rewards, dones, truncations, records, masks
+        del arrays
+        shared.release()
+
+
+def _step_in_place(
+    env: MiniMetroRLEnv, action: np.ndarray
+) -> tuple[np.ndarray, float, bool, bool, dict[str, Any]]:
+    """
+    `env.step` returning the observation buffer of the env instead of a copy,
+    it is overwritten by the next step or reset.
+    """
+    result = env._step(action)  # pyright: ignore [reportPrivateUsage]
+    obs = env._obs_builder.buffer  # pyright: ignore [reportPrivateUsage]
+    return (obs, *result)
+
+
+def _call_env(
+    env: MiniMetroRLEnv,
+    kind: str,
+    name: str,
+    args: tuple[Any, ...],
+    kwargs: dict[str, Any],
+) -> Any:
+    if kind == "getattr":
+        return getattr(env, name)
+    if kind == "setattr":
+        setattr(env, name, *args)
+        return None
+    if kind == "is_wrapped":
+        return is_wrapped(env, *args)
+    return getattr(env, name)(*args, **kwargs)
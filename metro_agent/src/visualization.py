@@ -1,20 +1,19 @@
 # space to pause
 # d to show/hide panel
 # esc to escape
+#
+# --record LOG saves the episode played by the policy, --replay LOG plays a
+# saved episode (or a game recorded with src.main --record) without the policy,
+# from step --start
 
+import argparse
 import os
 import sys
 import numpy as np
 import pygame
 
-print("before torch")
-from stable_baselines3 import PPO
-print("after torch")
-
-from stable_baselines3.common.vec_env import DummyVecEnv, VecNormalize
-
 from src.config import Config
-from src.rl_env import MiniMetroRLEnv
+from src.replay import EnvReplayer, ReplayLog, UIReplayer, replay
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 RUN_DIR = os.path.join(BASE_DIR, "python3.11agent", "ppo_minimetro")
@@ -23,8 +22,12 @@ NORM_PATH = os.path.join(RUN_DIR, "vecnormalize.pkl")
 
 
 
-def build_eval_env(seed: int = 42):
-    raw_env = MiniMetroRLEnv()
+def build_eval_env(seed: int = 42, record_replay: bool = False):
+    from stable_baselines3.common.vec_env import DummyVecEnv, VecNormalize
+
+    from src.rl_env import MiniMetroRLEnv
+
+    raw_env = MiniMetroRLEnv(record_replay=record_replay)
     raw_env.reset(seed=seed)
 
     venv = DummyVecEnv([lambda: raw_env])
@@ -57,6 +60,23 @@ def ensure_action_shape(action):
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Watch the PPO agent play.")
+    parser.add_argument("--record", help="Save a replay log of the episode")
+    parser.add_argument("--replay", help="Play a replay log instead of the agent")
+    parser.add_argument("--start", type=int, default=0, help="First replayed step")
+    args = parser.parse_args()
+
+    if args.replay:
+        play_replay(args.replay, args.start)
+    else:
+        play_policy(args.record)
+
+
+def play_policy(record_path: str | None = None):
+    print("before torch")
+    from stable_baselines3 import PPO
+    print("after torch")
+
     if not os.path.exists(MODEL_PATH):
         raise FileNotFoundError(
             f"Missing PPO model: {MODEL_PATH}\n"
@@ -69,7 +89,7 @@ def main():
 
     clock = pygame.time.Clock()
 
-    raw_env, venv, obs = build_eval_env(seed=42)
+    raw_env, venv, obs = build_eval_env(seed=42, record_replay=bool(record_path))
     print("build eval env")
 
     model = PPO.load(MODEL_PATH, env=venv)
@@ -81,6 +101,7 @@ def main():
     paused = False
     done = False
     step_idx = 0
+    replay_log = raw_env.replay_log
 
     while not done:
         for event in pygame.event.get():
@@ -101,6 +122,8 @@ def main():
             action, _ = model.predict(obs, deterministic=True)
             action = ensure_action_shape(action)
 
+            # the vec env resets the finished episode, and its log with it
+            replay_log = raw_env.replay_log
             obs, reward, done_arr, infos = venv.step(action)
 
             info0 = infos[0] if isinstance(infos, (list, tuple)) else infos
@@ -125,11 +148,65 @@ def main():
 
         clock.tick(10)
 
+    if record_path:
+        replay_log.save(record_path)
+        print(f"replay log saved to {record_path}")
     venv.close()
     pygame.quit()
     sys.exit()
 
 
+def play_replay(log_path: str, start: int = 0):
+    log = ReplayLog.load(log_path)
+    pygame.init()
+    pygame.display.set_caption("Mini Metro Replay")
+    screen = pygame.display.set_mode((Config.screen_width, Config.screen_height))
+    clock = pygame.time.Clock()
+
+    replayer = replay(log)
+    # checkpoints make jumping ahead cheap, the steps before are not drawn
+    replayer.seek(min(start, replayer.num_steps))
+    if isinstance(replayer, EnvReplayer):
+        engine = replayer.env.engine
+        fps = 10
+    else:
+        assert isinstance(replayer, UIReplayer)
+        engine = replayer.engine
+        fps = Config.framerate
+    engine.set_clock(clock)
+    engine.showing_debug = True
+
+    paused = False
+    done = False
+    while not done:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                done = True
+
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    done = True
+
+                elif event.key == pygame.K_SPACE:
+                    paused = not paused
+
+                elif event.key == pygame.K_d:
+                    engine.showing_debug = not engine.showing_debug
+
+        if not paused and replayer.step < replayer.num_steps:
+            replayer.advance()
+            print(f"t={replayer.step:4d}/{replayer.num_steps}")
+
+        screen.fill((0, 0, 0))
+        engine.render(screen)
+        pygame.display.flip()
+
+        clock.tick(fps)
+
+    pygame.quit()
+    sys.exit()
+
+
 if __name__ == "__main__":
     print("hello")
     main()
\ No newline at end of file
@@ -11,7 +11,7 @@ from src.protocols.passenger_mediator import PassengersMediatorProtocol
 
 
 def legacy_get_engine_passengers(engine: Engine) -> list[Passenger]:
-    return engine._components.passengers  # pyright: ignore [reportPrivateUsage]
+    return list(engine._components.passengers)  # pyright: ignore [reportPrivateUsage]
 
 
 def legacy_get_engine_paths(engine: Engine) -> list[Path]:
@@ -0,0 +1,81 @@
+import unittest
+
+import numpy as np
+
+from src.engine.demand_model import (
+    FixedIntervalDemand,
+    PoissonDemand,
+    TimeVaryingDemand,
+)
+from src.engine.passenger_creator import PassengerCreator
+from src.entity import get_random_stations
+from src.passengers_mediator import PassengersMediator
+
+from test.random_seed_config import RANDOM_SEED
+
+
+class TestDemandModel(unittest.TestCase):
+    def setUp(self) -> None:
+        self.rng = np.random.default_rng(RANDOM_SEED)
+
+    def test_fixed_interval_spawns_one_passenger_per_station(self) -> None:
+        demand = FixedIntervalDemand(1000, first_time_divisor=4)
+        demand.increment_time(200)
+        self.assertIsNone(demand.sample_arrivals(3, self.rng))
+        self.assertEqual(demand.ms_until_next_spawn, 50)
+
+        demand.increment_time(50)
+        arrivals = demand.sample_arrivals(3, self.rng)
+        assert arrivals is not None
+        self.assertSequenceEqual(arrivals.tolist(), [1, 1, 1])
+        self.assertEqual(demand.ms_until_next_spawn, 1000)
+
+    def test_poisson_arrivals_follow_the_rate(self) -> None:
+        demand = PoissonDemand(rate_per_s=0.5)
+        demand.increment_time(1000 * 1000)
+        arrivals = demand.sample_arrivals(4, self.rng)
+        assert arrivals is not None
+        self.assertEqual(arrivals.shape, (4,))
+        for count in arrivals.tolist():
+            self.assertAlmostEqual(count / 500, 1, delta=0.2)
+        # nothing left to sample until time passes
+        self.assertIsNone(demand.sample_arrivals(4, self.rng))
+
+    def test_time_varying_rate_is_interpolated_and_periodic(self) -> None:
+        demand = TimeVaryingDemand([0, 10, 20], [0, 2, 0], period_s=20)
+        self.assertAlmostEqual(demand.get_rate_per_s(5_000), 1)
+        self.assertAlmostEqual(demand.get_rate_per_s(30_000), 2)
+
+        demand.increment_time(100)
+        self.assertIsNone(demand.sample_arrivals(10, self.rng))
+
+    def test_creator_sends_passengers_to_other_shape_types(self) -> None:
+        stations = get_random_stations(8, PassengersMediator(), self.rng)
+        creator = PassengerCreator(self.rng)
+        counts = np.arange(len(stations), dtype=np.int64)
+        created = creator.create_passengers(stations, counts)
+
+        station_types = {station.shape.type for station in stations}
+        for station, count, passengers in zip(stations, counts.tolist(), created):
+            self.assertEqual(len(passengers), count)
+            for passenger in passengers:
+                self.assertNotEqual(
+                    passenger.destination_shape.type, station.shape.type
+                )
+                self.assertIn(passenger.destination_shape.type, station_types)
+
+    def test_passengers_to_the_same_shape_type_share_their_shape(self) -> None:
+        stations = get_random_stations(8, PassengersMediator(), self.rng)
+        creator = PassengerCreator(self.rng)
+        counts = np.full(len(stations), 5, dtype=np.int64)
+        created = creator.create_passengers(stations, counts)
+
+        shapes = [p.destination_shape for passengers in created for p in passengers]
+        shape_types = {shape.type for shape in shapes}
+        self.assertGreater(len(shape_types), 1)
+        # one shape object per shape type
+        self.assertEqual(len({id(shape) for shape in shapes}), len(shape_types))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,14 +1,17 @@
+import random
 import unittest
 from math import ceil
 from typing import Any, Final
 from unittest.mock import Mock, create_autospec, patch
 
+import numpy as np
 import pygame
 
 from src.config import Config, station_color, station_size
+from src.engine import travel_plan_finder
 from src.engine.engine import Engine
 from src.engine.passenger_spawner import PassengerSpawner
-from src.entity import Station, get_random_stations
+from src.entity import Passenger, Station, get_random_stations
 from src.event.mouse import MouseEvent
 from src.event.type import MouseEventType
 from src.geometry.circle import Circle
@@ -16,14 +19,16 @@ from src.geometry.point import Point
 from src.geometry.polygons import Rect, Triangle
 from src.geometry.type import ShapeType
 from src.reactor import UI_Reactor
-from src.utils import get_random_color, get_random_position
+from src.utils import get_random_color, get_random_position, get_shape_from_type
 
 from test.base_test import GameplayBaseTestCase
 from test.legacy_access import (
     legacy_get_engine_passengers,
     legacy_get_engine_passengers_mediator,
+    legacy_get_engine_paths,
     legacy_get_engine_stations,
 )
+from test.random_seed_config import RANDOM_SEED
 
 # some tests break under lower/higher framerate
 # TODO: analize why
@@ -247,6 +252,325 @@ class TestEngine(GameplayBaseTestCase):
                 assert passenger.travel_plan
                 self.assertEqual(len(passenger.travel_plan.node_path), 1)
 
+    def test_travel_plan_graph_is_only_rebuilt_when_topology_changes(self) -> None:
+        self._replace_stations(
+            get_random_stations(5, legacy_get_engine_passengers_mediator(self.engine))
+        )
+        for station in legacy_get_engine_stations(self.engine):
+            station.draw(self.screen)
+        with patch.object(
+            travel_plan_finder,
+            "StationGraph",
+            wraps=travel_plan_finder.StationGraph,
+        ) as mock_build:
+            for _ in range(3):
+                self.engine.increment_time(dt_ms)
+            self.assertEqual(mock_build.call_count, 1)
+
+            self._connect_stations([0, 1, 2])
+            for _ in range(3):
+                self.engine.increment_time(dt_ms)
+            self.assertEqual(mock_build.call_count, 2)
+
+    def test_new_passengers_get_a_travel_plan_without_topology_change(self) -> None:
+        self._replace_stations(
+            get_random_stations(5, legacy_get_engine_passengers_mediator(self.engine))
+        )
+        for station in legacy_get_engine_stations(self.engine):
+            station.draw(self.screen)
+        self._connect_stations([i for i in range(5)])
+        self.engine.increment_time(dt_ms)
+
+        self.engine._passenger_spawner._spawn_passengers()  # pyright: ignore [reportPrivateUsage]
+        self.engine.increment_time(dt_ms)
+
+        for station in legacy_get_engine_stations(self.engine):
+            for passenger in station.passengers:
+                self.assertIsNotNone(passenger.travel_plan)
+
+    def test_passengers_share_routes_until_their_paths_change(self) -> None:
+        mediator = legacy_get_engine_passengers_mediator(self.engine)
+        shape_types = [
+            ShapeType.RECT,
+            ShapeType.CIRCLE,
+            ShapeType.TRIANGLE,
+            ShapeType.CROSS,
+        ]
+        self._replace_stations(
+            [
+                Station(
+                    get_shape_from_type(shape_type, station_color, station_size),
+                    Point(100 + 200 * i, 100 + 150 * (i % 2)),
+                    mediator,
+                )
+                for i, shape_type in enumerate(shape_types)
+            ]
+        )
+        stations = legacy_get_engine_stations(self.engine)
+        for station in stations:
+            station.draw(self.screen)
+        passengers = [
+            Passenger(get_shape_from_type(ShapeType.CIRCLE, station_color, 10))
+            for _ in range(3)
+        ]
+        for passenger in passengers:
+            stations[0].add_new_passenger(passenger)
+        finder = self.engine._travel_plan_finder  # pyright: ignore [reportPrivateUsage]
+
+        self._connect_stations([0, 1])
+        finder.find_travel_plan_for_passengers()
+        routes = [p.travel_plan.route if p.travel_plan else None for p in passengers]
+        assert routes[0]
+        self.assertIs(routes[0].next_hop, stations[1])
+        self.assertTrue(all(route is routes[0] for route in routes))
+
+        # a path elsewhere in the network keeps the route
+        self._connect_stations([2, 3])
+        finder.find_travel_plan_for_passengers()
+        for passenger in passengers:
+            assert passenger.travel_plan
+            self.assertIs(passenger.travel_plan.route, routes[0])
+
+        # rebuilding the path the route rides on invalidates it
+        self.engine.path_manager.remove_path(legacy_get_engine_paths(self.engine)[0])
+        self._connect_stations([0, 2, 1])
+        finder.find_travel_plan_for_passengers()
+        for passenger in passengers:
+            assert passenger.travel_plan
+            self.assertIsNotNone(passenger.travel_plan.route)
+            self.assertIsNot(passenger.travel_plan.route, routes[0])
+
+    def test_headless_engine_creates_the_gui_on_first_render(self) -> None:
+        self.engine = Engine(headless=True)
+        self.reactor = UI_Reactor(self.engine)
+        self.assertEqual(self.engine.gui.buttons, [])
+
+        for station in legacy_get_engine_stations(self.engine):
+            station.draw(self.screen)
+        self._connect_stations([0, 1])
+        self._connect_stations([2, 3])
+        self.engine.path_manager.remove_path(legacy_get_engine_paths(self.engine)[0])
+        self.assertEqual(self.engine.gui.path_to_button, {})
+
+        self.engine.render(self.screen)
+
+        self.assertTrue(self.engine.gui.buttons)
+        self.assertIn(
+            legacy_get_engine_paths(self.engine)[0], self.engine.gui.path_to_button
+        )
+
+    def test_reset_generates_the_same_stations_as_a_new_engine(self) -> None:
+        for station in legacy_get_engine_stations(self.engine):
+            station.draw(self.screen)
+        self._connect_stations([0, 1, 2])
+        for _ in range(Config.passenger_spawning.interval_step * 30):
+            self.engine.increment_time(dt_ms)
+        assert legacy_get_engine_passengers(self.engine)
+
+        new_engine = Engine(headless=True, seed=RANDOM_SEED + 1)
+        self.engine.reset(RANDOM_SEED + 1)
+
+        self.assertEqual(legacy_get_engine_paths(self.engine), [])
+        self.assertEqual(legacy_get_engine_passengers(self.engine), [])
+        self.assertEqual(self.engine.gui.path_to_button, {})
+        self.assertEqual(
+            self.engine._components.status.score,  # pyright: ignore [reportPrivateUsage]
+            0,
+        )
+        self.assertEqual(
+            self.engine._passenger_spawner.ms_until_next_spawn,  # pyright: ignore [reportPrivateUsage]
+            new_engine._passenger_spawner.ms_until_next_spawn,  # pyright: ignore [reportPrivateUsage]
+        )
+        self.assertEqual(
+            [
+                (station.position, station.shape.type)
+                for station in legacy_get_engine_stations(self.engine)
+            ],
+            [
+                (station.position, station.shape.type)
+                for station in legacy_get_engine_stations(new_engine)
+            ],
+        )
+
+        for station in legacy_get_engine_stations(self.engine):
+            station.draw(self.screen)
+        self._connect_stations([0, 1])
+        self.assertEqual(len(legacy_get_engine_paths(self.engine)), 1)
+
+    def test_engines_with_the_same_seed_do_not_share_random_state(self) -> None:
+        engines = [Engine(headless=True, seed=RANDOM_SEED) for _ in range(2)]
+        for _ in range(Config.passenger_spawning.interval_step * 60):
+            for engine in engines:
+                random.random()
+                np.random.rand()
+                engine.increment_time(dt_ms)
+
+        stations_0, stations_1 = (legacy_get_engine_stations(e) for e in engines)
+        self.assertEqual(
+            [station.position for station in stations_0],
+            [station.position for station in stations_1],
+        )
+        destinations_0, destinations_1 = (
+            [
+                [passenger.destination_shape.type for passenger in station.passengers]
+                for station in stations
+            ]
+            for stations in (stations_0, stations_1)
+        )
+        self.assertTrue(any(destinations_0))
+        self.assertEqual(destinations_0, destinations_1)
+
+    def test_engines_number_their_entities_independently(self) -> None:
+        engines = [Engine(headless=True, seed=RANDOM_SEED) for _ in range(2)]
+        for engine in engines:
+            engine._passenger_spawner._spawn_passengers()  # pyright: ignore [reportPrivateUsage]
+
+        station_ids = [
+            [station.id for station in legacy_get_engine_stations(engine)]
+            for engine in engines
+        ]
+        passenger_ids = [
+            [passenger.id for passenger in legacy_get_engine_passengers(engine)]
+            for engine in engines
+        ]
+        self.assertEqual(station_ids[0], list(range(Config.num_stations)))
+        self.assertEqual(station_ids[0], station_ids[1])
+        self.assertEqual(passenger_ids[0], passenger_ids[1])
+        self.assertEqual(repr(legacy_get_engine_stations(engines[0])[1]), "Station-1")
+
+        engines[0].reset(RANDOM_SEED)
+        self.assertEqual(
+            [station.id for station in legacy_get_engine_stations(engines[0])],
+            station_ids[1],
+        )
+
+    def test_stations_of_different_engines_are_never_equal(self) -> None:
+        engines = [Engine(headless=True, seed=RANDOM_SEED) for _ in range(2)]
+        stations_0, stations_1 = (legacy_get_engine_stations(e) for e in engines)
+        self.assertEqual([s.id for s in stations_0], [s.id for s in stations_1])
+        for station in stations_0:
+            self.assertNotIn(station, stations_1)
+            self.assertNotIn(station, set(stations_1))
+        self.assertEqual(stations_0, list(stations_0))
+
+        # nor are those built outside of an engine, with the default allocator
+        mediator = legacy_get_engine_passengers_mediator(engines[0])
+        others = get_random_stations(2 * Config.num_stations, mediator)
+        self.assertFalse(any(station in stations_0 for station in others))
+
+    def test_advance_matches_fixed_steps(self) -> None:
+        def run(fast_forward: bool) -> Engine:
+            random.seed(RANDOM_SEED)
+            np.random.seed(RANDOM_SEED)
+            self.engine = Engine()
+            self.reactor = UI_Reactor(self.engine)
+            self.engine.render(self.screen)
+            self._connect_stations([0, 1, 2, 3])
+            self._connect_stations([4, 5, 6])
+            for _ in range(80):
+                if fast_forward:
+                    self.engine.advance(250, dt_ms)
+                else:
+                    for _ in range(250 // dt_ms):
+                        self.engine.increment_time(dt_ms)
+                    self.engine.increment_time(250 % dt_ms)
+            return self.engine
+
+        fixed_engine = run(fast_forward=False)
+        fast_engine = run(fast_forward=True)
+
+        self.assertLess(
+            fast_engine._components.status.game_time,  # pyright: ignore [reportPrivateUsage]
+            fixed_engine._components.status.game_time,  # pyright: ignore [reportPrivateUsage]
+        )
+        self.assertEqual(
+            fast_engine._components.status.score,  # pyright: ignore [reportPrivateUsage]
+            fixed_engine._components.status.score,  # pyright: ignore [reportPrivateUsage]
+        )
+        self.assertEqual(
+            [
+                len(station.passengers)
+                for station in legacy_get_engine_stations(fast_engine)
+            ],
+            [
+                len(station.passengers)
+                for station in legacy_get_engine_stations(fixed_engine)
+            ],
+        )
+        fixed_metros = (
+            fixed_engine._components.metros  # pyright: ignore [reportPrivateUsage]
+        )
+        fast_metros = (
+            fast_engine._components.metros  # pyright: ignore [reportPrivateUsage]
+        )
+        self.assertEqual(len(fast_metros), 2)
+        for fast_metro, fixed_metro in zip(fast_metros, fixed_metros):
+            self.assertAlmostEqual(fast_metro.position.left, fixed_metro.position.left)
+            self.assertAlmostEqual(fast_metro.position.top, fixed_metro.position.top)
+            self.assertEqual(len(fast_metro.passengers), len(fixed_metro.passengers))
+
+    def test_restoring_a_snapshot_replays_the_same_game(self) -> None:
+        def play() -> list[Any]:
+            # extending the line rebuilds the segments under the first metro
+            path = legacy_get_engine_paths(self.engine)[0]
+            self.engine.path_manager.start_expanding_path_on_station(
+                path.last_station, 0
+            )
+            expanding = (
+                self.engine.path_manager._creating_or_expanding_path  # pyright: ignore [reportPrivateUsage]
+            )
+            assert expanding
+            # stops expanding once the station is added
+            expanding.add_station_to_path(legacy_get_engine_stations(self.engine)[4])
+            self._connect_stations([5, 6])
+            for _ in range(1000):
+                self.engine.increment_time(dt_ms)
+            self.engine.render(self.screen)
+            passengers = (
+                self.engine._components.passengers  # pyright: ignore [reportPrivateUsage]
+            )
+            # entities created after the snapshot are created again, compare ids
+            return [
+                self.engine._components.status.score,  # pyright: ignore [reportPrivateUsage]
+                [
+                    (passenger.id, holder.id)
+                    for passenger in passengers
+                    if (holder := passengers.get_holder(passenger))
+                ],
+                [
+                    (metro.id, metro.position, metro.current_station)
+                    for metro in self.engine._components.metros  # pyright: ignore [reportPrivateUsage]
+                ],
+                [
+                    [passenger.id for passenger in station.passengers]
+                    for station in legacy_get_engine_stations(self.engine)
+                ],
+            ]
+
+        for vectorized in (False, True):
+            with patch.object(Config, "vectorized_metro_movement", vectorized):
+                self.setUp()
+            self._connect_stations([0, 1, 2, 3])
+            for _ in range(200):
+                self.engine.increment_time(dt_ms)
+            snapshot = self.engine.snapshot()
+            num_passengers = len(legacy_get_engine_passengers(self.engine))
+
+            first_outcome = play()
+            self.assertEqual(len(legacy_get_engine_paths(self.engine)), 2)
+            self.engine.restore(snapshot)
+            self.assertEqual(len(legacy_get_engine_paths(self.engine)), 1)
+            self.assertEqual(
+                len(legacy_get_engine_passengers(self.engine)), num_passengers
+            )
+            second_outcome = play()
+            self.engine.restore(snapshot)
+            third_outcome = play()
+
+            self.assertGreater(first_outcome[0], 0)
+            self.assertEqual(second_outcome, first_outcome)
+            self.assertEqual(third_outcome, first_outcome)
+
 
 if __name__ == "__main__":
     unittest.main()
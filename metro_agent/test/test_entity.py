@@ -3,10 +3,12 @@ from unittest.mock import Mock
 
 from src.entity.metro import Metro
 from src.entity.passenger import Passenger
+from src.entity.path import Path
 from src.entity.station import Station
 from src.geometry.point import Point
 from src.geometry.shape import Shape
 from src.passengers_mediator import PassengersMediator
+from src.travel_plan import TravelPlan
 
 
 class TestEntity(unittest.TestCase):
@@ -28,6 +30,34 @@ class TestEntity(unittest.TestCase):
         mock_mediator.on_new_passenger_added.assert_called_once_with(passenger)
         mock_mediator.on_passenger_exit.assert_called_once_with(station, passenger)
 
+    def test_holders_queue_passengers_by_next_path(self) -> None:
+        mediator = PassengersMediator()
+        station = Station(
+            shape=Mock(spec=Shape),
+            position=Mock(spec=Point),
+            passengers_mediator=mediator,
+        )
+        path = Mock(spec=Path, id="Path-1")
+        passengers = [Passenger(Mock(spec=Shape)) for _ in range(3)]
+        for passenger in passengers:
+            station.add_new_passenger(passenger)
+        self.assertEqual(station.get_queued_passengers(path.id), [])
+
+        for passenger in passengers[1:]:
+            travel_plan = TravelPlan(None, passenger.num_id)
+            travel_plan.next_path = path
+            passenger.travel_plan = travel_plan
+            station.requeue_passenger(passenger)
+        self.assertEqual(station.get_queued_passengers(path.id), passengers[1:])
+        self.assertEqual(
+            station.get_queued_passengers(path.id, limit=1), passengers[1:2]
+        )
+        self.assertEqual(station.get_queued_passengers(None), passengers[:1])
+
+        metro = Metro(mediator)
+        station.move_passenger(passengers[1], metro)
+        self.assertEqual(station.get_queued_passengers(path.id), passengers[2:])
+
 
 if __name__ == "__main__":
     unittest.main()
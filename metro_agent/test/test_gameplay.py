@@ -338,3 +338,62 @@ class TestGameplay(GameplayBaseTestCase):
         assert len(paths) == 1
         assert path is paths[0]
         assert len(path.stations) == 3
+
+    def test_can_create_and_can_remove_follow_the_paths(self) -> None:
+        self._replace_with_random_stations(5)
+        stations = legacy_get_engine_stations(self.engine)
+        for station in stations:
+            station.draw(self.screen)
+        path_manager = self.engine.path_manager
+
+        self.assertFalse(path_manager.can_create(stations[0], stations[0]))
+        for _ in range(path_manager.max_num_paths):
+            self.assertTrue(path_manager.can_create(stations[0], stations[1]))
+            self._connect_stations([0, 1])
+        paths = list(legacy_get_engine_paths(self.engine))
+        self.assertEqual(len(paths), path_manager.max_num_paths)
+        self.assertFalse(path_manager.can_create(stations[0], stations[1]))
+
+        self.assertTrue(path_manager.can_remove(paths[0]))
+        path_manager.remove_path(paths[0])
+        self.assertFalse(path_manager.can_remove(paths[0]))
+        self.assertTrue(path_manager.can_create(stations[0], stations[1]))
+
+    def test_can_expand_agrees_with_path_expansion(self) -> None:
+        """can_expand tells if expanding the path 0-1-2 changes it, without doing it"""
+        for anchor, target in ((2, 3), (0, 3), (2, 1), (2, 2), (0, 0), (2, 0), (0, 2)):
+            with self.subTest(anchor=anchor, target=target):
+                self.setUp()
+                try:
+                    self._subtest_can_expand(anchor, target)
+                finally:
+                    self.tearDown()
+
+    def _subtest_can_expand(self, anchor: int, target: int) -> None:
+        self._replace_with_random_stations(5)
+        stations = legacy_get_engine_stations(self.engine)
+        for station in stations:
+            station.draw(self.screen)
+        self._connect_stations([0, 1, 2])
+        path = legacy_get_engine_paths(self.engine)[0]
+        path_stations = list(path.stations)
+
+        expected = self.engine.path_manager.can_expand(
+            path, stations[anchor], stations[target]
+        )
+        self.assertEqual(path.stations, path_stations)
+        self.assertFalse(path.is_looped)
+
+        self._send_event_to_station(MouseEventType.MOUSE_DOWN, anchor)
+        self._send_event_to_station(MouseEventType.MOUSE_UP, anchor)
+        self._send_event_to_station(MouseEventType.MOUSE_DOWN, anchor)
+        self._send_event_to_station(MouseEventType.MOUSE_MOTION, anchor, Point(2, 2))
+        self._send_event_to_station(MouseEventType.MOUSE_MOTION, target)
+        self._send_event_to_station(MouseEventType.MOUSE_UP, target)
+
+        changed = path.stations != path_stations or path.is_looped
+        self.assertEqual(changed, expected)
+        if path.is_looped:
+            self.assertFalse(
+                self.engine.path_manager.can_expand(path, stations[2], stations[3])
+            )
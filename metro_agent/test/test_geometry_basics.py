@@ -1,9 +1,11 @@
 import unittest
+from dataclasses import FrozenInstanceError
 
 from src.geometry.circle import Circle
 from src.geometry.line import Line
 from src.geometry.point import Point
 from src.geometry.polygons import Rect, Triangle
+from src.geometry.types import create_degrees
 
 
 class TestGeometryBasics(unittest.TestCase):
@@ -59,6 +61,40 @@ class TestGeometryBasics(unittest.TestCase):
         self.assertTrue(other_same_position in points)
         self.assertTrue(Point(200, 100) not in points)
 
+    def test_point_arithmetic_and_lazy_id(self) -> None:
+        point = Point(1.5, 2)
+
+        self.assertEqual(point + Point(1, 1), Point(2.5, 3))
+        self.assertEqual(point - 1, Point(0.5, 1))
+        self.assertEqual(2 * point, Point(3, 4))
+        self.assertEqual(hash(point), hash(Point(1.5, 2)))
+        self.assertFalse(hasattr(point, "_id"))
+        self.assertEqual(point.id, point.id)
+        self.assertNotEqual(point.id, Point(1.5, 2).id)
+
+    def test_point_is_immutable(self) -> None:
+        point = Point(1, 2)
+        points = {point}
+
+        with self.assertRaises(FrozenInstanceError):
+            point.left = 3
+        with self.assertRaises(FrozenInstanceError):
+            del point.top
+
+        self.assertEqual(point, Point(1, 2))
+        self.assertIn(Point(1, 2), points)
+
+    def test_polygon_rotated_points_follow_degrees(self) -> None:
+        rect = Rect(self.color, 2, 4)
+        self.assertEqual(rect._get_rotated_points(), list(rect.points))
+
+        rect.set_degrees(create_degrees(90))
+
+        self.assertEqual(
+            rect._get_rotated_points(),
+            [point.rotate(create_degrees(90)) for point in rect.points],
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -5,13 +5,19 @@ import pygame
 
 from src.config import Config, station_color, station_size
 from src.engine.engine import Engine
+from src.engine.path_index import PathIndex
+from src.engine.routing_table import RoutingTable
+from src.engine.topology import NetworkTopology
 from src.entity import Station, get_random_stations
 from src.geometry.circle import Circle
+from src.geometry.point import Point
 from src.geometry.polygons import Rect
+from src.geometry.type import ShapeType
 from src.graph.graph_algo import bfs, build_station_nodes_dict
 from src.graph.node import Node
+from src.graph.station_graph import NO_STATION, StationGraph
 from src.reactor import UI_Reactor
-from src.utils import get_random_color, get_random_position
+from src.utils import get_random_color, get_random_position, get_shape_from_type
 
 from test.base_test import GameplayBaseTestCase
 from test.legacy_access import (
@@ -144,6 +150,122 @@ class TestGraph(GameplayBaseTestCase):
             [],
         )
 
+    def test_routing_table_uses_nearest_station_of_shape_type(self) -> None:
+        shape_types = [
+            ShapeType.RECT,
+            ShapeType.CIRCLE,
+            ShapeType.TRIANGLE,
+            ShapeType.TRIANGLE,
+        ]
+        self._replace_stations(
+            [
+                Station(
+                    get_shape_from_type(shape_type, station_color, station_size),
+                    Point(200 + 250 * i, 300 + 100 * (i % 2)),
+                    legacy_get_engine_passengers_mediator(self.engine),
+                )
+                for i, shape_type in enumerate(shape_types)
+            ]
+        )
+        for station in legacy_get_engine_stations(self.engine):
+            station.draw(self.screen)
+
+        self._connect_stations([0, 1, 2])
+        self._connect_stations([0, 3])
+
+        stations = legacy_get_engine_stations(self.engine)
+        paths = legacy_get_engine_paths(self.engine)
+        routing_table = RoutingTable(
+            StationGraph(stations, paths),
+            {
+                shape_type: [s for s in stations if s.shape.type == shape_type]
+                for shape_type in shape_types
+            },
+            PathIndex(paths, NetworkTopology()),
+        )
+
+        route = routing_table.get_route(stations[0], ShapeType.TRIANGLE)
+        assert route
+        self.assertIs(route.next_hop, stations[3])
+        self.assertSequenceEqual([n.station for n in route.node_path], [stations[3]])
+        self.assertIs(route.next_path, paths[1])
+
+        route = routing_table.get_route(stations[3], ShapeType.CIRCLE)
+        assert route
+        self.assertSequenceEqual(
+            [n.station for n in route.node_path], [stations[0], stations[1]]
+        )
+        self.assertIs(route.next_path, paths[1])
+
+        self.assertIsNone(routing_table.get_route(stations[0], ShapeType.RECT))
+
+    def test_station_graph_csr_adjacency(self) -> None:
+        self._replace_with_random_stations(5)
+        for station in legacy_get_engine_stations(self.engine):
+            station.draw(self.screen)
+
+        self._connect_stations([0, 1, 2])
+        self._connect_stations([0, 3])
+
+        graph = StationGraph(
+            legacy_get_engine_stations(self.engine),
+            legacy_get_engine_paths(self.engine),
+        )
+        self.assertSequenceEqual(graph.indptr.tolist(), [0, 2, 4, 5, 6, 6])
+        self.assertSequenceEqual(graph.indices.tolist(), [1, 3, 0, 2, 1, 0])
+        self.assertSequenceEqual(graph.edge_path_mask.tolist(), [1, 2, 1, 1, 1, 2])
+        self.assertSequenceEqual(graph.station_path_mask.tolist(), [3, 1, 1, 2, 0])
+
+        self.assertSequenceEqual(graph.bfs(1, 3), [1, 0, 3])
+        self.assertSequenceEqual(graph.bfs(0, 4), [])
+        self.assertSequenceEqual(
+            graph.skip_stations_on_same_path([2, 1, 0, 3]), [2, 0, 3]
+        )
+
+    def test_station_graph_find_nearest(self) -> None:
+        self._replace_with_random_stations(5)
+        for station in legacy_get_engine_stations(self.engine):
+            station.draw(self.screen)
+
+        self._connect_stations([0, 1, 2, 3])
+
+        graph = StationGraph(
+            legacy_get_engine_stations(self.engine),
+            legacy_get_engine_paths(self.engine),
+        )
+        distances, next_hops = graph.find_nearest([0, 3])
+        self.assertSequenceEqual(distances, [0, 1, 1, 0, NO_STATION])
+        self.assertSequenceEqual(next_hops, [NO_STATION, 0, 3, NO_STATION, NO_STATION])
+
+    def test_path_index_follows_the_network(self) -> None:
+        self._replace_with_random_stations(5)
+        for station in legacy_get_engine_stations(self.engine):
+            station.draw(self.screen)
+
+        self._connect_stations([0, 1, 2])
+        self._connect_stations([0, 3])
+
+        stations = legacy_get_engine_stations(self.engine)
+        paths = legacy_get_engine_paths(self.engine)
+        path_manager = self.engine.path_manager
+        self.assertSequenceEqual(
+            path_manager.get_paths_with_station(stations[0]), paths
+        )
+        self.assertSequenceEqual(
+            path_manager.get_shared_paths(stations[2], stations[0]), [paths[0]]
+        )
+        self.assertSequenceEqual(
+            path_manager.get_shared_paths(stations[2], stations[3]), []
+        )
+        self.assertTrue(path_manager.is_station_connected(stations[3]))
+        self.assertFalse(path_manager.is_station_connected(stations[4]))
+
+        path_manager.remove_path(paths[1])
+        self.assertSequenceEqual(
+            path_manager.get_paths_with_station(stations[0]), [paths[0]]
+        )
+        self.assertFalse(path_manager.is_station_connected(stations[3]))
+
 
 if __name__ == "__main__":
     unittest.main()
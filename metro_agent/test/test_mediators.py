@@ -7,7 +7,9 @@ from src.entity.station import Station
 from src.exceptions import GameException
 from src.geometry.point import Point
 from src.geometry.shape import Shape
+from src.geometry.type import ShapeType
 from src.passengers_mediator import PassengersMediator
+from src.utils import get_shape_from_type
 
 
 class TestMediators(unittest.TestCase):
@@ -20,6 +22,52 @@ class TestMediators(unittest.TestCase):
         with self.assertRaises(GameException):
             metro.add_new_passenger(passenger)
 
+    def test_keeps_track_of_the_holder_of_each_passenger(self) -> None:
+        passenger = Mock(spec=Passenger)
+        passenger.travel_plan = None
+        mediator = PassengersMediator()
+        station = Station(Mock(spec=Shape), Mock(spec=Point), mediator)
+        metro = Metro(mediator)
+
+        station.add_new_passenger(passenger)
+        self.assertIs(mediator.get_holder(passenger), station)
+
+        station.move_passenger(passenger, metro)
+        self.assertIs(mediator.get_holder(passenger), metro)
+        self.assertIs(passenger.last_station, station)
+
+        metro.passenger_arrives(passenger)
+        self.assertIsNone(mediator.get_holder(passenger))
+        self.assertEqual(metro.passengers, [])
+        # once it has arrived it can be added again
+        station.add_new_passenger(passenger)
+        self.assertIs(mediator.get_holder(passenger), station)
+
+    def test_passenger_registry_counts_destinations(self) -> None:
+        mediator = PassengersMediator()
+        station = Station(Mock(spec=Shape), Mock(spec=Point), mediator)
+        metro = Metro(mediator)
+        passengers = [
+            Passenger(get_shape_from_type(shape_type, (0, 0, 0), 10))
+            for shape_type in [ShapeType.RECT, ShapeType.RECT, ShapeType.CIRCLE]
+        ]
+        for passenger in passengers:
+            station.add_new_passenger(passenger)
+        station.move_passenger(passengers[0], metro)
+        station.passenger_arrives(passengers[2])
+
+        registry = mediator.passengers
+        self.assertEqual(len(registry), 2)
+        self.assertEqual(list(registry), passengers[:2])
+        self.assertEqual(registry.count_with_destination(ShapeType.RECT), 2)
+        self.assertEqual(registry.count_with_destination(ShapeType.CIRCLE), 0)
+        self.assertEqual(registry.get_destination_counts(station)[ShapeType.RECT], 1)
+        self.assertEqual(registry.get_destination_counts(metro)[ShapeType.RECT], 1)
+        self.assertEqual(registry.get_destination_counts(station)[ShapeType.CIRCLE], 0)
+
+        mediator.reset()
+        self.assertEqual(len(registry), 0)
+
 
 if __name__ == "__main__":
     unittest.main()
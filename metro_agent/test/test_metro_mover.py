@@ -0,0 +1,74 @@
+import unittest
+from math import ceil
+from typing import Final
+
+from src.engine.game_components import GameComponents
+from src.engine.metro_mover import VectorizedMetroMover
+from src.engine.status import EngineStatus
+from src.entity import Metro, Path, Station
+from src.geometry.point import Point
+from src.passengers_mediator import PassengersMediator
+from src.utils import get_random_color, get_random_station_shape
+
+from test.base_test import BaseTestCase
+
+framerate: Final = 60
+dt_ms: Final = ceil(1000 / framerate)
+
+
+class TestVectorizedMetroMover(BaseTestCase):
+    def _create_network(self) -> tuple[list[Path], list[Metro]]:
+        mediator = PassengersMediator()
+        positions = [Point(100, 100), Point(400, 120), Point(420, 400), Point(90, 380)]
+        stations = [
+            Station(get_random_station_shape(), position, mediator)
+            for position in positions
+        ]
+        paths: list[Path] = []
+        metros: list[Metro] = []
+        for order, (station_idxs, looped) in enumerate(
+            [([0, 1, 2], False), ([0, 1, 2, 3], True), ([3, 1], False)]
+        ):
+            path = Path(get_random_color(), order)
+            for idx in station_idxs:
+                path.add_station(stations[idx])
+            if looped:
+                path.set_loop()
+            for _ in range(2 if looped else 1):
+                metro = Metro(mediator)
+                path.add_metro(metro)
+                metros.append(metro)
+            paths.append(path)
+        return paths, metros
+
+    def test_moves_metros_like_the_path_movement_system(self) -> None:
+        expected_paths, expected_metros = self._create_network()
+        paths, metros = self._create_network()
+        mover = VectorizedMetroMover(
+            GameComponents(
+                paths=paths,
+                stations=[],
+                metros=metros,
+                status=EngineStatus(),
+                passengers_mediator=PassengersMediator(),
+            )
+        )
+
+        for _ in range(10 * framerate):
+            for path in expected_paths:
+                for metro in path.metros:
+                    path.move_metro(metro, dt_ms)
+            mover.move_metros(dt_ms)
+            mover.sync_positions()
+
+            for expected, metro in zip(expected_metros, metros):
+                self.assertAlmostEqual(metro.position.left, expected.position.left)
+                self.assertAlmostEqual(metro.position.top, expected.position.top)
+                self.assertEqual(metro.is_forward, expected.is_forward)
+                self.assertEqual(
+                    metro.current_station is None, expected.current_station is None
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+from math import ceil
+from unittest.mock import create_autospec
+
+import numpy as np
+import pygame
+
+from src.config import max_num_paths, station_capacity, station_shape_type_list
+from src.engine.engine import Engine
+from src.observation import ObservationBuilder
+from src.reactor import UI_Reactor
+
+from test.base_test import GameplayBaseTestCase
+from test.legacy_access import legacy_get_engine_paths, legacy_get_engine_stations
+from test.random_seed_config import RANDOM_SEED
+
+dt_ms = ceil(1000 / 60)
+max_stations = 10
+
+
+class TestObservationBuilder(GameplayBaseTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.engine = Engine(seed=RANDOM_SEED)
+        self.reactor = UI_Reactor(self.engine)
+        self.engine.render(create_autospec(pygame.surface.Surface))
+        self.builder = ObservationBuilder(
+            max_stations,
+            max_num_paths,
+            station_shape_type_list,
+            5.0,
+            station_capacity,
+            1000,
+        )
+        self.stations = legacy_get_engine_stations(self.engine)[:max_stations]
+        self.ranks = {station.id: idx for idx, station in enumerate(self.stations)}
+
+    def _build(self) -> tuple[np.ndarray, ...]:
+        obs = self.builder.build(self.engine, self.stations, self.ranks)
+        num_shapes = len(station_shape_type_list)
+        return tuple(
+            np.split(
+                obs.astype(np.float64),
+                np.cumsum(
+                    [max_stations] * 2
+                    + [num_shapes * max_stations] * 2
+                    + [max_num_paths] * 5
+                ),
+            )
+        )
+
+    def test_network_blocks_follow_the_topology(self) -> None:
+        _, on_path, _, _, exists, start, end, length, _, globals_ = self._build()
+        self.assertFalse(on_path.any())
+        self.assertFalse(exists.any())
+
+        self._connect_stations([0, 1, 2])
+        _, on_path, _, _, exists, start, end, length, _, globals_ = self._build()
+        self.assertEqual(on_path.tolist()[:4], [1, 1, 1, 0])
+        self.assertEqual(exists.tolist()[:2], [1, 0])
+        self.assertEqual(start[0], 0)
+        self.assertAlmostEqual(end[0], 2 / (max_stations - 1), places=6)
+        self.assertAlmostEqual(length[0], 3 / max_stations, places=6)
+        self.assertAlmostEqual(globals_[0], 1 / max_num_paths, places=6)
+
+        self.engine.path_manager.remove_path(legacy_get_engine_paths(self.engine)[0])
+        _, on_path, _, _, exists, *_ = self._build()
+        self.assertFalse(on_path.any())
+        self.assertFalse(exists.any())
+
+    def test_station_blocks_follow_the_passengers(self) -> None:
+        self._connect_stations([0, 1, 2, 3])
+        for _ in range(1000):
+            self.engine.increment_time(dt_ms)
+        queues, _, self_shapes, dest_shapes, *_, loads, _ = self._build()
+        occupations = np.array([s.occupation for s in self.stations], dtype=float)
+        self.assertTrue(occupations.any())
+        np.testing.assert_allclose(
+            queues, np.minimum(occupations / station_capacity, 5.0), rtol=1e-6
+        )
+        # one shape per station, destinations sum to one where passengers wait
+        np.testing.assert_array_equal(
+            self_shapes.reshape(-1, max_stations).sum(axis=0), 1
+        )
+        np.testing.assert_allclose(
+            dest_shapes.reshape(-1, max_stations).sum(axis=0),
+            occupations > 0,
+            rtol=1e-6,
+        )
+        self.assertAlmostEqual(
+            loads[0],
+            min(occupations[:4].sum() / (4 * station_capacity), 1.0),
+            places=6,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
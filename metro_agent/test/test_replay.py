@@ -0,0 +1,133 @@
+import importlib.util
+import os
+import tempfile
+import unittest
+from math import ceil
+from typing import Any
+from unittest.mock import patch
+
+import numpy as np
+import pygame
+
+from src.config import Config
+from src.engine.engine import Engine
+from src.event.keyboard import KeyboardEvent
+from src.event.type import KeyboardEventType, MouseEventType
+from src.reactor import UI_Reactor
+from src.replay import (
+    EnvReplayer,
+    EnvReplayLog,
+    ReplayLog,
+    UIRecorder,
+    UIReplayer,
+    UIReplayLog,
+)
+
+from test.base_test import GameplayBaseTestCase
+from test.random_seed_config import RANDOM_SEED
+
+dt_ms = ceil(1000 / 60)
+
+
+def _state(engine: Engine) -> list[Any]:
+    components = engine._components  # pyright: ignore [reportPrivateUsage]
+    return [
+        components.status.score,
+        components.status.elapsed_ms,
+        engine.is_paused,
+        sorted(passenger.id for passenger in components.passengers),
+        [[s.id for s in path.stations] for path in components.paths],
+    ]
+
+
+class TestUIReplay(GameplayBaseTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.engine = Engine(seed=RANDOM_SEED)
+        screen = pygame.Surface((Config.screen_width, Config.screen_height))
+        self.recorder = UIRecorder(self.engine, checkpoint_every=100)
+        self.reactor = UI_Reactor(self.engine, self.recorder)
+        self.states: dict[int, list[Any]] = {}
+        inputs = {
+            50: lambda: self._connect_stations([0, 1, 2]),
+            # a path is being drawn when checkpoint 200 comes
+            199: lambda: self._send_event_to_station(MouseEventType.MOUSE_DOWN, 3),
+            205: lambda: self._finish_drawing([4, 5]),
+            320: lambda: self._press(pygame.K_SPACE),
+            400: lambda: self._press(pygame.K_SPACE),
+            # quitting is not replayed
+            500: lambda: self._press(pygame.K_ESCAPE),
+        }
+        with patch.object(Engine, "exit") as exit:
+            for frame in range(800):
+                self.states[frame] = _state(self.engine)
+                self.recorder.start_frame(dt_ms, can_checkpoint=self.reactor.is_idle)
+                self.engine.increment_time(dt_ms)
+                self.engine.render(screen)
+                if frame in inputs:
+                    inputs[frame]()
+        exit.assert_called_once()
+        self.states[800] = _state(self.engine)
+
+    def _finish_drawing(self, station_indexes: list[int]) -> None:
+        for idx in station_indexes:
+            self._send_event_to_station(MouseEventType.MOUSE_MOTION, idx)
+        self._send_event_to_station(MouseEventType.MOUSE_UP, station_indexes[-1])
+
+    def _press(self, key: int) -> None:
+        self.reactor.react(KeyboardEvent(KeyboardEventType.KEY_DOWN, key))
+        self.reactor.react(KeyboardEvent(KeyboardEventType.KEY_UP, key))
+
+    def test_replay_ends_as_the_recorded_game(self) -> None:
+        log = ReplayLog.from_bytes(self.recorder.log.to_bytes())
+        assert isinstance(log, UIReplayLog)
+        self.assertEqual(log.num_steps, 800)
+        self.assertNotIn(200, log.checkpoints)
+
+        replayer = UIReplayer(log)
+        replayer.run()
+        self.assertEqual(len(self.states[800][4]), 2)
+        self.assertEqual(_state(replayer.engine), self.states[800])
+
+    def test_seek_goes_back_and_forth(self) -> None:
+        replayer = UIReplayer(self.recorder.log)
+        for step in (650, 330, 330, 120, 420, 0):
+            replayer.seek(step)
+            self.assertEqual(replayer.step, step)
+            self.assertEqual(_state(replayer.engine), self.states[step])
+
+
+@unittest.skipUnless(importlib.util.find_spec("gymnasium"), "needs gymnasium")
+class TestEnvReplay(unittest.TestCase):
+    def test_replay_gives_the_recorded_steps(self) -> None:
+        from src.rl_env import MiniMetroRLEnv
+
+        env = MiniMetroRLEnv(record_replay=True, replay_checkpoint_every=40)
+        observations = [env.reset(seed=RANDOM_SEED)[0]]
+        rewards = []
+        rng = np.random.default_rng(RANDOM_SEED)
+        for _ in range(150):
+            action = rng.integers(0, [5, env.max_paths, env.max_stations])
+            obs, reward, terminated, truncated, _ = env.step(action)
+            observations.append(obs)
+            rewards.append(reward)
+            if terminated or truncated:
+                break
+        assert env.replay_log
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "episode.log")
+            env.replay_log.save(file_path)
+            log = ReplayLog.load(file_path)
+        assert isinstance(log, EnvReplayLog)
+        self.assertEqual(log.num_steps, len(rewards))
+
+        replayer = EnvReplayer(log)
+        replayed = [replayer.advance()[1] for _ in range(log.num_steps)]
+        self.assertEqual(replayed, rewards)
+        for step in (100, 45, 0):
+            replayer.seek(step)
+            np.testing.assert_equal(replayer.env._get_obs(), observations[step])
+
+
+if __name__ == "__main__":
+    unittest.main()
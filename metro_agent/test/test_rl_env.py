@@ -0,0 +1,109 @@
+import importlib.util
+import unittest
+
+import numpy as np
+
+from src.entity.ids import EntityId
+
+from test.random_seed_config import RANDOM_SEED
+
+
+@unittest.skipUnless(importlib.util.find_spec("gymnasium"), "needs gymnasium")
+class TestActionMasks(unittest.TestCase):
+    def setUp(self) -> None:
+        from src.rl_env import MiniMetroRLEnv
+
+        self.env = MiniMetroRLEnv()
+        self.env.reset(seed=RANDOM_SEED)
+
+    def _split(self, masks: np.ndarray) -> list[np.ndarray]:
+        return np.split(
+            masks, [self.env.n_actions, self.env.n_actions + self.env.max_stations]
+        )
+
+    def test_masks_of_a_new_game(self) -> None:
+        type_mask, i_mask, j_mask = self._split(self.env.action_masks())
+        # no path to expand or remove yet
+        self.assertEqual(type_mask.tolist(), [True, True, False, False, False])
+        num_stations = len(self.env._sorted_stations()[: self.env.max_stations])
+        self.assertEqual(i_mask.sum(), num_stations)
+        self.assertEqual(j_mask.sum(), num_stations)
+
+        self.env.step([1, 0, 1])
+        type_mask, *_ = self._split(self.env.action_masks())
+        # the new path is too young to be replaced
+        self.assertEqual(type_mask.tolist(), [True, True, True, False, True])
+
+    def test_masked_action_types_are_invalid(self) -> None:
+        from gymnasium import spaces
+
+        action_space = self.env.action_space
+        assert isinstance(action_space, spaces.MultiDiscrete)
+        rng = np.random.default_rng(RANDOM_SEED)
+        num_masked = 0
+        for _ in range(150):
+            type_mask, _, _ = self._split(self.env.action_masks())
+            snapshot = self.env.snapshot()
+            for action_type in np.flatnonzero(~type_mask):
+                num_masked += 1
+                action = [action_type, *rng.integers(0, self.env.max_stations, size=2)]
+                info = self.env.step(action)[4]
+                self.assertTrue(info["invalid_action"], action)
+                self.env.restore(snapshot)
+            self.env.step(rng.integers(0, action_space.nvec))
+        self.assertGreater(num_masked, 0)
+
+
+@unittest.skipUnless(importlib.util.find_spec("gymnasium"), "needs gymnasium")
+class TestObservations(unittest.TestCase):
+    def test_observations_can_be_kept(self) -> None:
+        from src.rl_env import MiniMetroRLEnv
+
+        env = MiniMetroRLEnv(max_episode_steps=3)
+        observations = [env.reset(seed=RANDOM_SEED)[0]]
+        for _ in range(3):
+            observations.append(env.step([0, 0, 0])[0])
+        expected = [obs.copy() for obs in observations]
+        env.reset(seed=RANDOM_SEED)
+        env.step([0, 0, 0])
+        for obs, expected_obs in zip(observations, expected):
+            np.testing.assert_array_equal(obs, expected_obs)
+        # time goes by, the observations differ
+        self.assertFalse(np.array_equal(observations[0], observations[-1]))
+
+
+@unittest.skipUnless(importlib.util.find_spec("gymnasium"), "needs gymnasium")
+class TestFastForward(unittest.TestCase):
+    def _play_episode(
+        self, fast_forward: bool, random_actions: bool
+    ) -> list[tuple[float, dict[EntityId, int], bool, bool]]:
+        from gymnasium import spaces
+
+        from src.rl_env import MiniMetroRLEnv
+
+        env = MiniMetroRLEnv(fast_forward=fast_forward)
+        action_space = env.action_space
+        assert isinstance(action_space, spaces.MultiDiscrete)
+        env.reset(seed=RANDOM_SEED)
+        rng = np.random.default_rng(RANDOM_SEED)
+        steps = []
+        terminated = truncated = False
+        while not (terminated or truncated):
+            action = rng.integers(0, action_space.nvec) if random_actions else [0] * 3
+            _, reward, terminated, truncated, _ = env.step(action)
+            timers = dict(env._timeout_ms_by_station_id)
+            steps.append((reward, timers, terminated, truncated))
+        return steps
+
+    def test_fast_forward_matches_fixed_steps(self) -> None:
+        for random_actions in (False, True):
+            with self.subTest(random_actions=random_actions):
+                fast_steps = self._play_episode(True, random_actions)
+                fixed_steps = self._play_episode(False, random_actions)
+                # the episode ends with an overflowing station
+                self.assertTrue(fixed_steps[-1][2])
+                self.assertEqual(fast_steps, fixed_steps)
+
+
+if __name__ == "__main__":
+    unittest.main()
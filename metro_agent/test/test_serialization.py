@@ -0,0 +1,100 @@
+import os
+import tempfile
+import unittest
+from math import ceil
+from typing import Any
+from unittest.mock import create_autospec
+
+import pygame
+
+from src.engine.engine import Engine
+from src.engine.serialization import StateArchive, StateArchiveWriter
+from src.exceptions import GameException
+from src.reactor import UI_Reactor
+
+from test.base_test import GameplayBaseTestCase
+from test.legacy_access import legacy_get_engine_paths, legacy_get_engine_stations
+from test.random_seed_config import RANDOM_SEED
+
+dt_ms = ceil(1000 / 60)
+
+
+class TestSerialization(GameplayBaseTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.screen = create_autospec(pygame.surface.Surface)
+        self.engine = Engine(seed=RANDOM_SEED)
+        self.reactor = UI_Reactor(self.engine)
+        self.engine.render(self.screen)
+        self._connect_stations([0, 1, 2, 3])
+        self._connect_stations([4, 5, 6, 4])
+        self._play(400)
+
+    def _play(self, num_steps: int, engine: Engine | None = None) -> list[Any]:
+        engine = engine or self.engine
+        for _ in range(num_steps):
+            engine.increment_time(dt_ms)
+        # writes the metro positions back
+        engine.render(self.screen)
+        components = engine._components  # pyright: ignore [reportPrivateUsage]
+        return [
+            components.status.score,
+            components.status.elapsed_ms,
+            [
+                (passenger.id, passenger.destination_shape.type, holder.id)
+                for passenger in components.passengers
+                if (holder := components.passengers.get_holder(passenger))
+            ],
+            [(metro.id, metro.position) for metro in components.metros],
+            [[p.id for p in path.stations] for path in components.paths],
+        ]
+
+    def test_loaded_game_goes_on_as_the_saved_one(self) -> None:
+        self.setUp()
+        loaded = Engine(headless=True, seed=RANDOM_SEED + 1)
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "game.bin")
+            self.engine.save(file_path)
+            loaded.load(file_path)
+        self.assertEqual(
+            [s.id for s in legacy_get_engine_stations(loaded)],
+            [s.id for s in legacy_get_engine_stations(self.engine)],
+        )
+        self.assertEqual(len(legacy_get_engine_paths(loaded)), 2)
+        self.assertTrue(legacy_get_engine_paths(loaded)[1].is_looped)
+
+        self.assertEqual(self._play(1000, loaded), self._play(1000))
+
+    def test_archive_packs_many_games(self) -> None:
+        elapsed_ms: list[float] = []
+        loaded = Engine(headless=True)
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "games.bin")
+            with StateArchiveWriter(file_path) as writer:
+                for _ in range(3):
+                    elapsed_ms.append(self._play(300)[1])
+                    writer.append(self.engine.serialize())
+
+            with StateArchive(file_path) as archive:
+                self.assertEqual(len(archive), 3)
+                for data, ms in zip(reversed(list(archive)), reversed(elapsed_ms)):
+                    loaded.deserialize(data)
+                    self.assertEqual(
+                        loaded._components.status.elapsed_ms,  # pyright: ignore [reportPrivateUsage]
+                        ms,
+                    )
+                loaded.deserialize(archive[-1])
+        self.assertEqual(self._play(500, loaded), self._play(500))
+
+    def test_other_formats_are_rejected(self) -> None:
+        data = bytearray(self.engine.serialize())
+        with self.assertRaises(GameException):
+            self.engine.deserialize(b"not a saved game")
+        # the version follows the magic bytes
+        data[8] += 1
+        with self.assertRaises(GameException):
+            self.engine.deserialize(bytes(data))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import importlib.util
+import unittest
+
+import numpy as np
+
+from test.random_seed_config import RANDOM_SEED
+
+
+@unittest.skipUnless(
+    importlib.util.find_spec("stable_baselines3"), "needs stable-baselines3"
+)
+class TestMiniMetroVecEnv(unittest.TestCase):
+    def test_steps_as_separate_envs(self) -> None:
+        from src.rl_env import MiniMetroRLEnv
+        from src.vec_env import MiniMetroVecEnv
+
+        num_envs = 3
+        venv = MiniMetroVecEnv(num_envs, seed=RANDOM_SEED, max_episode_steps=20)
+        envs = [MiniMetroRLEnv(max_episode_steps=20) for _ in range(num_envs)]
+        obs = venv.reset()
+        for i, env in enumerate(envs):
+            np.testing.assert_equal(obs[i], env.reset(seed=RANDOM_SEED + i)[0])
+
+        rng = np.random.default_rng(RANDOM_SEED)
+        for _ in range(30):
+            actions = rng.integers(0, venv.action_space.nvec, size=(num_envs, 3))
+            obs, rewards, dones, infos = venv.step(actions)
+            for i, env in enumerate(envs):
+                env_obs, reward, terminated, truncated, _ = env.step(actions[i])
+                self.assertEqual(dones[i], terminated or truncated)
+                self.assertAlmostEqual(rewards[i], reward, places=5)
+                if dones[i]:
+                    np.testing.assert_equal(infos[i]["terminal_observation"], env_obs)
+                    self.assertTrue(infos[i]["TimeLimit.truncated"])
+                    env_obs = env.reset()[0]
+                np.testing.assert_equal(obs[i], env_obs)
+
+        self.assertEqual(venv.get_attr("max_episode_steps", 1), [20])
+
+    def test_workers_step_as_in_process_envs(self) -> None:
+        from src.vec_env import MiniMetroSubprocVecEnv, MiniMetroVecEnv
+
+        num_envs = 3
+        local = MiniMetroVecEnv(num_envs, seed=RANDOM_SEED, max_episode_steps=20)
+        venv = MiniMetroSubprocVecEnv(
+            num_envs, workers=2, seed=RANDOM_SEED, max_episode_steps=20
+        )
+        try:
+            np.testing.assert_equal(venv.reset(), local.reset())
+            self.assertEqual(venv.reset_infos, local.reset_infos)
+            rng = np.random.default_rng(RANDOM_SEED)
+            for _ in range(30):
+                actions = rng.integers(0, venv.action_space.nvec, size=(num_envs, 3))
+                obs, rewards, dones, infos = venv.step(actions)
+                expected = local.step(actions)
+                np.testing.assert_equal(obs, expected[0])
+                np.testing.assert_equal(rewards, expected[1])
+                np.testing.assert_equal(dones, expected[2])
+                for info, expected_info in zip(infos, expected[3]):
+                    np.testing.assert_equal(
+                        info.get("terminal_observation"),
+                        expected_info.get("terminal_observation"),
+                    )
+                self.assertEqual(
+                    venv.info_records["score"].tolist(),
+                    [info["score"] for info in expected[3]],
+                )
+            self.assertEqual(
+                venv.env_method("_num_paths", indices=[0, 2]),
+                [env._num_paths() for env in local.envs[::2]],
+            )
+        finally:
+            venv.close()
+
+    def test_workers_share_action_masks(self) -> None:
+        from src.rl_env import MiniMetroRLEnv
+        from src.vec_env import MiniMetroSubprocVecEnv
+
+        num_envs = 3
+        venv = MiniMetroSubprocVecEnv(
+            num_envs, workers=2, seed=RANDOM_SEED, action_masks=True
+        )
+        envs = [MiniMetroRLEnv() for _ in range(num_envs)]
+        try:
+            venv.reset()
+            for i, env in enumerate(envs):
+                env.reset(seed=RANDOM_SEED + i)
+            rng = np.random.default_rng(RANDOM_SEED)
+            for _ in range(10):
+                masks = venv.env_method("action_masks")
+                for env_masks, env in zip(masks, envs):
+                    np.testing.assert_equal(env_masks, env.action_masks())
+                actions = rng.integers(0, venv.action_space.nvec, size=(num_envs, 3))
+                venv.step(actions)
+                for i, env in enumerate(envs):
+                    env.step(actions[i])
+            self.assertEqual(len(venv.env_method("action_masks", indices=[1])), 1)
+        finally:
+            venv.close()
+
+    def test_worker_errors_are_raised(self) -> None:
+        from multiprocessing.shared_memory import SharedMemory
+
+        from src.vec_env import MiniMetroSubprocVecEnv
+
+        venv = MiniMetroSubprocVecEnv(3, workers=2, seed=RANDOM_SEED)
+        processes = venv._processes  # pyright: ignore [reportPrivateUsage]
+        _, memory_name = venv._arrays.spec  # pyright: ignore [reportPrivateUsage]
+        try:
+            venv.reset()
+            with self.assertRaises(AttributeError):
+                venv.env_method("no_such_method")
+            # the vec env is closed, its workers and shared memory are gone
+            for process in processes:
+                self.assertFalse(process.is_alive())
+            with self.assertRaises(FileNotFoundError):
+                SharedMemory(memory_name)
+        finally:
+            venv.close()
+
+    def test_dead_workers_are_detected(self) -> None:
+        from src.vec_env import MiniMetroSubprocVecEnv
+
+        venv = MiniMetroSubprocVecEnv(3, workers=2, seed=RANDOM_SEED)
+        try:
+            venv.reset()
+            venv._processes[0].kill()  # pyright: ignore [reportPrivateUsage]
+            with self.assertRaises(RuntimeError):
+                venv.step(np.zeros((3, 3), dtype=np.int64))
+        finally:
+            venv.close()
+
+
+if __name__ == "__main__":
+    unittest.main()